@@ -48,6 +48,16 @@ def build_exe():
         '--add-data=zipcracker_config.json;.',
         '--add-data=crack_history.json;.',
         '--add-data=zipcracker_ui.py;.',
+        '--add-data=zipcracker_process.py;.',
+        '--add-data=zipcracker_tools.py;.',
+        '--add-data=zipcracker_batch.py;.',
+        '--add-data=zipcracker_cache.py;.',
+        '--add-data=zipcracker_extractors.py;.',
+        '--add-data=zipcracker_scanner.py;.',
+        '--add-data=zipcracker_store.py;.',
+        '--add-data=zipcracker_verify.py;.',
+        '--add-data=zipcracker_history.py;.',
+        '--add-data=common_passwords.txt;.',
         '--noconfirm',
         '--clean',
         '--noupx',
@@ -5,6 +5,8 @@ import subprocess
 import time
 from PySide6.QtCore import QThread, Signal
 from utils import get_current_dir, check_cuda_support, find_tool, get_file_format
+from zipcracker_process import iter_line_batches
+from zipcracker_verify import get_verifier, find_password, load_common_passwords, common_passwords_path
 
 class CrackThread(QThread):
     update_log = Signal(str)  # 只接收一个字符串参数
@@ -115,11 +117,23 @@ class CrackThread(QThread):
                 raise Exception("无法识别算法类型")
             self.update_log.emit(f"算法编号: {algo_id}")
 
-            # 3. 创建临时文件
+            # 3. 进程内校验常用密码，命中时无需启动任何外部进程
+            common_checked = False
+            verifier = get_verifier(hash_value)
+            if verifier is not None:
+                self.update_log.emit("步骤3: 进程内校验常用密码")
+                password, common_checked = find_password(verifier, load_common_passwords())
+                if password:
+                    self.update_log.emit(f"常用密码命中: {password}")
+                    self.is_running = False
+                    self.crack_result.emit(password)
+                    return
+
+            # 4. 创建临时文件
             temp_hash_file = self.create_temp_file(hash_value)
             
-            # 4. 调用Hashcat破解
-            self.update_log.emit("步骤3: 开始破解")
+            # 5. 调用Hashcat破解
+            self.update_log.emit("步骤4: 开始破解")
             hashcat_path = find_tool("hashcat.exe", self.tool_paths)
             if not hashcat_path:
                 raise Exception("找不到hashcat工具")
@@ -127,20 +141,9 @@ class CrackThread(QThread):
             # 设置工作目录为 hashcat 所在目录
             hashcat_dir = os.path.dirname(hashcat_path)
             
-            # 创建临时字典文件
-            dict_file = os.path.join(self.current_dir, "common_passwords.txt")
-            with open(dict_file, "w", encoding='utf-8') as f:
-                # 添加常见密码
-                common_passwords = [
-                    "123456", "123456789", "12345678", "password", "12345",
-                    "1234", "1234567", "123123", "111111", "666666",
-                    "888888", "000000", "abc123", "password123", "admin",
-                    "admin123", "root", "121212", "123", "1234567890"
-                ]
-                f.write("\n".join(common_passwords))
-
-            try:
-                # 1. 先使用字典模式尝试常见密码
+            # 1. 先使用字典模式尝试常见密码（常用密码表随程序分发，进程内已校验完全部条目时跳过）
+            dict_file = common_passwords_path()
+            if dict_file and not common_checked:
                 dict_cmd = (f'cd /d "{hashcat_dir}" && hashcat.exe -m {algo_id} -a 0 "{temp_hash_file}" '
                           f'"{dict_file}" --potfile-disable --session=crack_session --restore-disable '
                           f'--status --status-timer=1 --force')
@@ -148,56 +151,45 @@ class CrackThread(QThread):
                 self.update_log.emit("第1阶段: 尝试常见密码")
                 self.update_log.emit(f"执行命令: {dict_cmd}")
                 
-                proc = subprocess.Popen(dict_cmd, shell=True, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, 
-                                     text=True, bufsize=1, universal_newlines=True)
+                proc = subprocess.Popen(dict_cmd, shell=True, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
                 
                 # 处理输出
                 password = self.process_output(proc)
                 if password:
                     return
 
-                # 2. 如果字典模式失败，尝试6位数字组合
-                if self.is_running:
-                    num_cmd = (f'cd /d "{hashcat_dir}" && hashcat.exe -m {algo_id} -a 3 "{temp_hash_file}" '
-                             f'"?d?d?d?d?d?d" --potfile-disable --session=crack_session --restore-disable '
-                             f'--status --status-timer=1 --force')
-                    
-                    self.update_log.emit("第2阶段: 尝试6位数字组合")
-                    self.update_log.emit(f"执行命令: {num_cmd}")
-                    
-                    proc = subprocess.Popen(num_cmd, shell=True, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, 
-                                         text=True, bufsize=1, universal_newlines=True)
-                    
-                    # 处理输出
-                    password = self.process_output(proc)
-                    if password:
-                        return
-
-                # 3. 如果还是失败，尝试1-8位任意字符组合
-                if self.is_running:
-                    brute_cmd = (f'cd /d "{hashcat_dir}" && hashcat.exe -m {algo_id} -a 3 "{temp_hash_file}" '
-                                f'--increment --increment-min=1 --increment-max=8 "?a?a?a?a?a?a?a?a" '
-                                f'--potfile-disable --session=crack_session --restore-disable '
-                                f'--status --status-timer=1 --force')
-                    
-                    self.update_log.emit("第3阶段: 尝试1-8位任意字符组合")
-                    self.update_log.emit(f"执行命令: {brute_cmd}")
-                    
-                    proc = subprocess.Popen(brute_cmd, shell=True, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, 
-                                         text=True, bufsize=1, universal_newlines=True)
-                    
-                    # 处理输出
-                    password = self.process_output(proc)
-                    if password:
-                        return
+            # 2. 如果字典模式失败，尝试6位数字组合
+            if self.is_running:
+                num_cmd = (f'cd /d "{hashcat_dir}" && hashcat.exe -m {algo_id} -a 3 "{temp_hash_file}" '
+                         f'"?d?d?d?d?d?d" --potfile-disable --session=crack_session --restore-disable '
+                         f'--status --status-timer=1 --force')
+                
+                self.update_log.emit("第2阶段: 尝试6位数字组合")
+                self.update_log.emit(f"执行命令: {num_cmd}")
+                
+                proc = subprocess.Popen(num_cmd, shell=True, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+                
+                # 处理输出
+                password = self.process_output(proc)
+                if password:
+                    return
 
-            finally:
-                # 清理临时字典文件
-                try:
-                    if os.path.exists(dict_file):
-                        os.remove(dict_file)
-                except:
-                    pass
+            # 3. 如果还是失败，尝试1-8位任意字符组合
+            if self.is_running:
+                brute_cmd = (f'cd /d "{hashcat_dir}" && hashcat.exe -m {algo_id} -a 3 "{temp_hash_file}" '
+                            f'--increment --increment-min=1 --increment-max=8 "?a?a?a?a?a?a?a?a" '
+                            f'--potfile-disable --session=crack_session --restore-disable '
+                            f'--status --status-timer=1 --force')
+                
+                self.update_log.emit("第3阶段: 尝试1-8位任意字符组合")
+                self.update_log.emit(f"执行命令: {brute_cmd}")
+                
+                proc = subprocess.Popen(brute_cmd, shell=True, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+                
+                # 处理输出
+                password = self.process_output(proc)
+                if password:
+                    return
 
         except Exception as e:
             self.handle_error(str(e))
@@ -317,46 +309,48 @@ class CrackThread(QThread):
     def process_output(self, proc):
         """处理破解进程的输出"""
         try:
-            while True:
-                line = proc.stdout.readline()
-                if not line:
-                    break
-                    
-                line = line.strip()
-                if line:
-                    self.update_log.emit(line)
-                
-                # 检测错误信息
-                if "ERROR" in line.upper() or "FAILED" in line.upper():
-                    self.update_log.emit(f"检测到错误: {line}")
-                
-                # 处理成功信息
-                if ":" in line and not line.startswith("[") and not line.startswith("*") and not line.startswith("Approaching"):
-                    try:
-                        # 格式应该是 hash:password
-                        hash_part, password = line.split(":", 1)
-                        # 验证这是否真的是结果行
-                        if hash_part.startswith("$"):
-                            self.is_running = False
-                            self.crack_result.emit(password.strip())
-                            return password.strip()
-                    except Exception as e:
-                        self.update_log.emit(f"解析结果时出错: {str(e)}")
-                
-                # 处理进度信息
-                if "Progress" in line:
-                    try:
-                        progress_part = line.split("Progress")[1].strip()
-                        if "/" in progress_part:
-                            current, total = progress_part.split("/")[0:2]
-                            current = int(current.strip())
-                            total = int(total.split()[0].strip())
-                            progress = int((current / total) * 100)
-                            self.update_progress.emit(progress)
-                    except Exception as e:
-                        self.update_log.emit(f"解析进度时出错: {str(e)}")
+            for batch in iter_line_batches(proc.stdout):
+                # 整批输出日志
+                self.update_log.emit("\n".join(batch))
+                for line in batch:
+                    password = self.process_line(line)
+                    if password:
+                        return password
         except Exception as e:
             self.update_log.emit(f"处理输出时出错: {str(e)}")
         finally:
             proc.wait()
+        return None
+
+    def process_line(self, line):
+        """处理单行输出，找到密码时返回密码"""
+        # 检测错误信息
+        if "ERROR" in line.upper() or "FAILED" in line.upper():
+            self.update_log.emit(f"检测到错误: {line}")
+        
+        # 处理成功信息
+        if ":" in line and not line.startswith("[") and not line.startswith("*") and not line.startswith("Approaching"):
+            try:
+                # 格式应该是 hash:password
+                hash_part, password = line.split(":", 1)
+                # 验证这是否真的是结果行
+                if hash_part.startswith("$"):
+                    self.is_running = False
+                    self.crack_result.emit(password.strip())
+                    return password.strip()
+            except Exception as e:
+                self.update_log.emit(f"解析结果时出错: {str(e)}")
+        
+        # 处理进度信息
+        if "Progress" in line:
+            try:
+                progress_part = line.split("Progress")[1].strip()
+                if "/" in progress_part:
+                    current, total = progress_part.split("/")[0:2]
+                    current = int(current.strip())
+                    total = int(total.split()[0].strip())
+                    progress = int((current / total) * 100)
+                    self.update_progress.emit(progress)
+            except Exception as e:
+                self.update_log.emit(f"解析进度时出错: {str(e)}")
         return None
\ No newline at end of file
@@ -2,6 +2,7 @@ import os
 import sys
 import subprocess
 import re
+from zipcracker_tools import ToolIndex
 
 def get_current_dir():
     """获取程序运行目录（考虑打包为exe的情况）"""
@@ -23,52 +24,24 @@ def check_cuda_support():
     except Exception:
         return False
 
+# 进程内的工具位置索引，首次查找时按深度限制扫描一次，之后只做校验
+_tool_index = ToolIndex()
+
 def find_tool(tool_name, tool_paths=None):
     """查找工具路径"""
     if tool_paths and tool_name in tool_paths:
         return tool_paths[tool_name]
         
     current_dir = get_current_dir()
+    candidates = _tool_index.find_all(tool_name, current_dir)
     
-    # 特别处理John工具，它们通常在run目录下
-    for root, dirs, files in os.walk(current_dir):
-        # 对于John工具
-        if ('john' in os.path.basename(root).lower() or 
-            any(f.startswith('rar2john') for f in files)) and tool_name != 'hashcat.exe':
-            # 优先检查run子目录
-            run_dir = os.path.join(root, "run")
-            if os.path.exists(run_dir):
-                tool_path = os.path.join(run_dir, tool_name)
-                if os.path.exists(tool_path):
-                    if tool_paths is not None:
-                        tool_paths[tool_name] = tool_path
-                    return tool_path
-                    
-                # 检查run目录下的子目录
-                for subdir in os.listdir(run_dir):
-                    subdir_path = os.path.join(run_dir, subdir)
-                    if os.path.isdir(subdir_path):
-                        tool_path = os.path.join(subdir_path, tool_name)
-                        if os.path.exists(tool_path):
-                            if tool_paths is not None:
-                                tool_paths[tool_name] = tool_path
-                            return tool_path
-            
-            # 如果没有run子目录或在run目录中找不到，尝试当前目录
-            tool_path = os.path.join(root, tool_name)
-            if os.path.exists(tool_path):
-                if tool_paths is not None:
-                    tool_paths[tool_name] = tool_path
-                return tool_path
-        
-        # 对于hashcat，直接在目录中查找
-        if ('hashcat' in os.path.basename(root).lower() or 
-            'hashcat.exe' in files) and tool_name == 'hashcat.exe':
-            tool_path = os.path.join(root, tool_name)
-            if os.path.exists(tool_path):
-                if tool_paths is not None:
-                    tool_paths[tool_name] = tool_path
-                return tool_path
+    # 特别处理John工具，它们通常在run目录下，优先选择
+    if tool_name != 'hashcat.exe':
+        candidates.sort(key=lambda p: 0 if 'run' in [part.lower() for part in p.split(os.sep)] else 1)
+    if candidates:
+        if tool_paths is not None:
+            tool_paths[tool_name] = candidates[0]
+        return candidates[0]
     
     # 如果上面的方法找不到，尝试使用where命令
     try:
@@ -9,34 +9,49 @@ ZIP Cracker - 应用程序主类
 import os
 import sys
 import time
+
+# 启动耗时统计，起点需在其他导入之前记录；使用 --profile-startup 参数时输出
+PROFILE_STARTUP = "--profile-startup" in sys.argv
+_startup_marks = [("进程启动", time.perf_counter())]
+
+def mark_startup(stage):
+    """记录启动阶段的完成时间点"""
+    _startup_marks.append((stage, time.perf_counter()))
+
 import traceback
 import json
 import datetime
-import subprocess
-import webbrowser
 import queue
 import threading
-import urllib.request
-import zipfile
 import shutil
 import tempfile
-import glob
 import re
+import html
 import atexit
 import logging
+mark_startup("导入标准库")
 
 from PyQt5 import QtWidgets, QtGui, QtCore
 from PyQt5.QtCore import pyqtSignal, QMetaType, Qt, QProcess, QIODevice
+mark_startup("导入PyQt5")
 
 # 导入自定义模块
-from zipcracker_models import TaskManager, TaskType, TaskStatus, HashcatThread, CrackHistory
-from zipcracker_models import SUPPORTED_EXTS, HASHCAT_MODE_MAP, JOHN_FORMAT_MAP
-from zipcracker_utils import log_error, safe_ui_update, extract_hash_safe, run_cmd_with_output
+from zipcracker_models import TaskManager, TaskType, TaskStatus, HashcatThread
+from zipcracker_history import CrackHistory
+from zipcracker_models import SUPPORTED_EXTS, HASHCAT_MODE_MAP, JOHN_FORMAT_MAP, SLOW_HASH_MODES
+from zipcracker_utils import log_error, safe_ui_update, extract_hash_cached, normalize_extracted_hash, prefetch_hash, get_hash_prefetcher, write_hash_file
 from zipcracker_utils import get_formatted_time, format_duration, is_supported_file, has_chinese
 from zipcracker_utils import init_logging, show_error_dialog, show_info_dialog  # 新增
+from zipcracker_utils import LogPipeline
+from zipcracker_process import get_supervisor, JohnSessionMonitor
+from zipcracker_tools import get_tool_index, get_tool_probes
+from zipcracker_store import get_result_store, create_known_wordlist
+from zipcracker_store import PRESTAGE_MAX_CANDIDATES, PRESTAGE_MAX_CANDIDATES_SLOW
+from zipcracker_verify import precheck_password
 from zipcracker_config import config
-from zipcracker_dialogs import ToolPathsDialog, AboutDialog, HelpDialog, MaskGeneratorDialog, DictManagerDialog, PerformanceSettingsDialog, HistoryDialog
 from zipcracker_models import DownloadThread
+# 对话框模块较大，首次使用时才导入
+mark_startup("导入业务模块")
 
 class MarqueeLabel(QtWidgets.QLabel):
     def __init__(self, text, color="#4CAF50", parent=None):
@@ -88,6 +103,10 @@ class MainWindow(QtWidgets.QMainWindow):
         self.file_ext = ""
         self.is_cracking = False
         self.hashcat_thread = None
+        self.prestage_thread = None  # 已知密码预检线程
+        self._prestage_wordlist = None
+        self._known_prechecked_hash = None  # 已在进程内校验过全部已知密码的哈希
+        self.batch_thread = None  # 批量破解线程
         self.moving = False
         self.last_pos = None
         self.start_time = None
@@ -101,6 +120,9 @@ class MainWindow(QtWidgets.QMainWindow):
         # 创建历史记录管理器
         self.history_manager = CrackHistory()
         
+        # 首次使用时才构建的对话框缓存
+        self._dialog_cache = {}
+        
         # 设置界面
         self.setup_ui()
         
@@ -118,8 +140,8 @@ class MainWindow(QtWidgets.QMainWindow):
         # 连接哈希更新信号
         self.hash_update_signal.connect(self.update_hash_ui)
         
-        # 检测工具路径 - 使用同步检测更直接地更新UI
-        self.force_detect_tools()
+        # 检测工具路径 - 推迟到主窗口显示之后，避免拖慢启动
+        QtCore.QTimer.singleShot(0, self.force_detect_tools)
         
         # 设置计时器
         self.timer = QtCore.QTimer(self)
@@ -787,11 +809,17 @@ class MainWindow(QtWidgets.QMainWindow):
         
         logCardLayout.addLayout(logTitleLayout)
         
-        # 日志文本框
-        self.logText = QtWidgets.QTextEdit()
+        # 日志文本框：QPlainTextEdit限制最大行数，由日志管道批量刷新
+        self.logText = QtWidgets.QPlainTextEdit()
         self.logText.setReadOnly(True)
-        self.logText.setLineWrapMode(QtWidgets.QTextEdit.WidgetWidth)
+        self.logText.setLineWrapMode(QtWidgets.QPlainTextEdit.WidgetWidth)
+        self.logText.setMaximumBlockCount(config.get("log_view_max_blocks", 5000))
         logCardLayout.addWidget(self.logText)
+        self.log_pipeline = LogPipeline(
+            self.logText,
+            interval=config.get("log_flush_interval_ms", 100),
+            log_file=os.path.join(config.get("log_dir", "logs"), config.get("view_log_file", "zipcracker_view.log"))
+        )
         
         # 设置文本拖放事件
         self.logText.setAcceptDrops(True)
@@ -816,8 +844,9 @@ class MainWindow(QtWidgets.QMainWindow):
         self.statusLabel.clicked.connect(self.on_status_label_clicked)
         statusCardLayout.addWidget(self.statusLabel)
         statusCardLayout.addStretch()
-        gpu_info = self.get_gpu_info()
-        self.gpuLabel = QtWidgets.QLabel(f"显卡: {gpu_info}")
+        # 显卡信息（wmic较慢）在主窗口显示后再后台获取
+        self.gpuLabel = QtWidgets.QLabel("显卡: 检测中...")
+        QtCore.QTimer.singleShot(0, self.update_gpu_label_async)
         self.gpuLabel.setCursor(Qt.PointingHandCursor)
         self.gpuLabel.mousePressEvent = self.on_gpu_label_clicked
         statusCardLayout.addWidget(self.gpuLabel)
@@ -842,102 +871,118 @@ class MainWindow(QtWidgets.QMainWindow):
         # 使用QTimer在UI完全加载后强制应用哈希值输入框的高度
         QtCore.QTimer.singleShot(100, lambda: self.hashValueEdit.setFixedHeight(83))
     
+    # 启动检测时每个候选路径的探测超时（秒）
+    TOOL_DETECT_TIMEOUT = 5
+    JOHN_DEFAULT_PATHS = ["john", "john.exe", "./john", "/usr/bin/john", "/usr/local/bin/john"]
+    HASHCAT_DEFAULT_PATHS = ["hashcat", "hashcat.exe", "./hashcat", "/usr/bin/hashcat", "/usr/local/bin/hashcat"]
+
+    def set_tool_status(self, tool, state):
+        """更新底部工具状态标签
+
+        Args:
+            tool: "john" 或 "hashcat"
+            state: "installed"、"missing" 或 "error"
+        """
+        label = getattr(self, 'johnStatusLabel' if tool == "john" else 'hashcatStatusLabel', None)
+        if label is None:
+            return
+        name = "John" if tool == "john" else "Hashcat"
+        text = {"installed": "已安装", "missing": "未安装", "error": "检测错误"}[state]
+        label.setText(f"{name}: {text}")
+        label.setStyleSheet("color: #4CAF50;" if state == "installed" else "color: #F44336;")
+
     def detect_tools_async(self):
-        """异步检测工具路径"""
-        QtWidgets.QApplication.processEvents()
+        """异步检测工具路径
+
+        先按上次成功的检测结果立即显示状态，再在后台并行校验配置路径和
+        所有默认路径，每个工具取最先成功的候选，其余尚未开始的探测直接取消。
+        """
+        from concurrent.futures import ThreadPoolExecutor, as_completed
+        last_status = config.get("tool_status", {}) or {}
+        for tool in ("john", "hashcat"):
+            if last_status.get(tool):
+                self.set_tool_status(tool, "installed")
+        probes = get_tool_probes()
+        timeout = self.TOOL_DETECT_TIMEOUT
+
+        def probe_john(path):
+            return path if probes.get_john_banner(path, timeout=timeout) else None
+
+        def probe_hashcat(path):
+            result = probes.get_version_output(path, timeout=timeout)
+            # 判断条件更精确，检查输出是否包含版本号格式(vX.X.X)
+            if result and ('v' in result.lower() or 'version' in result.lower()):
+                return path
+            return None
+
+        def first_success(futures):
+            for future in as_completed(futures):
+                try:
+                    path = future.result()
+                except Exception as e:
+                    log_error(e)
+                    continue
+                if path:
+                    for other in futures:
+                        other.cancel()
+                    return path, futures[future]
+            return None, False
+
+        def configured_ok(futures):
+            # 默认路径先成功时，确认已配置的路径是否同样可用，可用则保留配置
+            for future, configured in futures.items():
+                if configured and not future.cancelled():
+                    try:
+                        return bool(future.result())
+                    except Exception:
+                        return False
+            return False
+
         def detect_tools():
+            executor = ThreadPoolExecutor(max_workers=8)
             try:
-                # 检测John the Ripper
-                john_installed = False
-                if self.john_path:
-                    try:
-                        john_exe = self.find_john_executable(self.john_path)
-                        if john_exe and os.path.exists(john_exe):
-                            result = run_cmd_with_output([john_exe], timeout=2)
-                            if "John the Ripper" in result:
-                                safe_ui_update(lambda: setattr(self.johnStatusLabel, "text", "John: 已安装"))
-                                safe_ui_update(lambda: setattr(self.johnStatusLabel, "styleSheet", "color: #4CAF50;"))
-                                john_installed = True
-                    except Exception as e:
-                        log_error(e)
-                # 如果John未安装，尝试查找默认路径
-                if not john_installed:
-                    default_paths = ["john", "john.exe", "./john", "/usr/bin/john", "/usr/local/bin/john"]
-                    for path in default_paths:
-                        try:
-                            result = run_cmd_with_output([path], timeout=2)
-                            if "John the Ripper" in result:
-                                self.john_path = path
-                                config.set("john_path", path)
-                                # 更新UI
-                                safe_ui_update(lambda: setattr(self.johnStatusLabel, "text", "John: 已安装"))
-                                safe_ui_update(lambda: setattr(self.johnStatusLabel, "styleSheet", "color: #4CAF50;"))
-                                john_installed = True
-                                break
-                        except Exception:
-                            continue
-                
-                # 如果仍未找到John
-                if not john_installed:
-                    # 未找到John
-                    safe_ui_update(lambda: setattr(self.johnStatusLabel, "text", "John: 未安装"))
-                    safe_ui_update(lambda: setattr(self.johnStatusLabel, "styleSheet", "color: #F44336;"))
-                
-                # 检测Hashcat
-                hashcat_installed = False
-                if self.hashcat_path:
-                    try:
-                        # 获取Hashcat可执行文件路径
-                        hashcat_exe = self.find_hashcat_executable(self.hashcat_path)
-                        
-                        if hashcat_exe and os.path.exists(hashcat_exe):
-                            # 尝试运行hashcat --version命令
-                            result = run_cmd_with_output([hashcat_exe, "--version"], timeout=2)
-                            # 判断条件更精确，检查输出是否包含版本号格式(vX.X.X)
-                            if result and ('v' in result.lower() or 'version' in result.lower()):
-                                # 更新UI
-                                safe_ui_update(lambda: setattr(self.hashcatStatusLabel, "text", "Hashcat: 已安装"))
-                                safe_ui_update(lambda: setattr(self.hashcatStatusLabel, "styleSheet", "color: #4CAF50;"))
-                                hashcat_installed = True
-                    except Exception as e:
-                        log_error(e)
-                
-                # 如果Hashcat未安装，尝试查找默认路径
-                if not hashcat_installed:
-                    default_paths = ["hashcat", "hashcat.exe", "./hashcat", "/usr/bin/hashcat", "/usr/local/bin/hashcat"]
-                    for path in default_paths:
-                        try:
-                            result = run_cmd_with_output([path, "--version"], timeout=2)
-                            # 判断条件更精确，检查输出是否包含版本号格式(vX.X.X)
-                            if result and ('v' in result.lower() or 'version' in result.lower()):
-                                self.hashcat_path = path
-                                config.set("hashcat_path", path)
-                                # 更新UI
-                                safe_ui_update(lambda: setattr(self.hashcatStatusLabel, "text", "Hashcat: 已安装"))
-                                safe_ui_update(lambda: setattr(self.hashcatStatusLabel, "styleSheet", "color: #4CAF50;"))
-                                hashcat_installed = True
-                                break
-                        except Exception:
-                            continue
-                
-                # 如果仍未找到Hashcat
-                if not hashcat_installed:
-                    # 未找到Hashcat
-                    safe_ui_update(lambda: setattr(self.hashcatStatusLabel, "text", "Hashcat: 未安装"))
-                    safe_ui_update(lambda: setattr(self.hashcatStatusLabel, "styleSheet", "color: #F44336;"))
-                
+                john_exe = self.find_john_executable(self.john_path) if self.john_path else None
+                hashcat_exe = self.find_hashcat_executable(self.hashcat_path) if self.hashcat_path else None
+                # 每个候选路径一个探测任务，值表示是否为已配置的路径
+                john_futures = {}
+                if john_exe and os.path.exists(john_exe):
+                    john_futures[executor.submit(probe_john, john_exe)] = True
+                for path in self.JOHN_DEFAULT_PATHS:
+                    john_futures[executor.submit(probe_john, path)] = False
+                hashcat_futures = {}
+                if hashcat_exe and os.path.exists(hashcat_exe):
+                    hashcat_futures[executor.submit(probe_hashcat, hashcat_exe)] = True
+                for path in self.HASHCAT_DEFAULT_PATHS:
+                    hashcat_futures[executor.submit(probe_hashcat, path)] = False
+
+                status = {}
+                john_found, john_configured = first_success(john_futures)
+                status["john"] = bool(john_found)
+                safe_ui_update(lambda: self.set_tool_status("john", "installed" if john_found else "missing"))
+                if john_found and not john_configured and not configured_ok(john_futures):
+                    self.john_path = john_found
+                    config.set("john_path", john_found)
+
+                hashcat_found, hashcat_configured = first_success(hashcat_futures)
+                status["hashcat"] = bool(hashcat_found)
+                safe_ui_update(lambda: self.set_tool_status("hashcat", "installed" if hashcat_found else "missing"))
+                if hashcat_found and not hashcat_configured and not configured_ok(hashcat_futures):
+                    self.hashcat_path = hashcat_found
+                    config.set("hashcat_path", hashcat_found)
+
+                if status != last_status:
+                    config.set("tool_status", status)
                 # 更新状态
                 safe_ui_update(lambda: self.set_status("检测", "success"))
-                
+
             except Exception as e:
                 # 确保设置默认状态
-                safe_ui_update(lambda: setattr(self.johnStatusLabel, "text", "John: 检测错误"))
-                safe_ui_update(lambda: setattr(self.johnStatusLabel, "styleSheet", "color: #F44336;"))
-                safe_ui_update(lambda: setattr(self.hashcatStatusLabel, "text", "Hashcat: 检测错误"))
-                safe_ui_update(lambda: setattr(self.hashcatStatusLabel, "styleSheet", "color: #F44336;"))
+                safe_ui_update(lambda: self.set_tool_status("john", "error"))
+                safe_ui_update(lambda: self.set_tool_status("hashcat", "error"))
                 safe_ui_update(lambda: self.set_status("工具检测出错", "error"))
                 log_error(e)
             finally:
+                executor.shutdown(wait=False)
                 # 自动修复：检测完成后强制刷新底部状态栏标签
                 safe_ui_update(self.refresh_tool_status_labels)
         threading.Thread(target=detect_tools, daemon=True).start()
@@ -971,9 +1016,9 @@ class MainWindow(QtWidgets.QMainWindow):
                 if os.path.exists(path):
                     return path
             # 递归查找所有子目录
-            for exe in glob.glob(os.path.join(john_path, '**', 'john.exe'), recursive=True):
+            for exe in get_tool_index().find_all('john.exe', john_path):
                 return exe
-            for exe in glob.glob(os.path.join(john_path, '**', 'john'), recursive=True):
+            for exe in get_tool_index().find_all('john', john_path):
                 return exe
         # 记录尝试过的路径
         self.log_message(f"未找到John the Ripper可执行文件，已尝试路径: {john_path}", "warning")
@@ -981,7 +1026,6 @@ class MainWindow(QtWidgets.QMainWindow):
 
     def find_hashcat_executable(self, hashcat_path):
         """增强版：递归查找Hashcat可执行文件"""
-        import glob
         if os.path.isfile(hashcat_path) and (hashcat_path.lower().endswith("hashcat.exe") or hashcat_path.lower().endswith("hashcat")):
             return hashcat_path
         if os.path.isdir(hashcat_path):
@@ -992,22 +1036,25 @@ class MainWindow(QtWidgets.QMainWindow):
             for path in possible_paths:
                 if os.path.exists(path):
                     return path
-            for exe in glob.glob(os.path.join(hashcat_path, '**', 'hashcat.exe'), recursive=True):
+            for exe in get_tool_index().find_all('hashcat.exe', hashcat_path):
                 return exe
-            for exe in glob.glob(os.path.join(hashcat_path, '**', 'hashcat'), recursive=True):
+            for exe in get_tool_index().find_all('hashcat', hashcat_path):
                 return exe
         self.log_message(f"未找到Hashcat可执行文件，已尝试路径: {hashcat_path}", "warning")
         return None
     
     def show_tool_paths_dialog(self):
+        from zipcracker_dialogs import ToolPathsDialog
         dialog = ToolPathsDialog(self, self.john_path, self.hashcat_path, self.opencl_path, self.perl_path)
         def refresh_and_update_fields():
-            import glob, os
+            import os
             base_dir = os.getcwd()
-            john_candidates = glob.glob(os.path.join(base_dir, '**', 'john.exe'), recursive=True)
-            hashcat_candidates = glob.glob(os.path.join(base_dir, '**', 'hashcat.exe'), recursive=True)
-            opencl_candidates = glob.glob(os.path.join(base_dir, '**', 'OpenCL*'), recursive=True)
-            perl_candidates = glob.glob(os.path.join(base_dir, '**', 'perl.exe'), recursive=True)
+            # 用户主动刷新时丢弃旧索引，重新扫描
+            get_tool_index().invalidate(base_dir)
+            john_candidates = get_tool_index().find_all('john.exe', base_dir)
+            hashcat_candidates = get_tool_index().find_all('hashcat.exe', base_dir)
+            opencl_candidates = get_tool_index().find_all('OpenCL*', base_dir)
+            perl_candidates = get_tool_index().find_all('perl.exe', base_dir)
             updated = False
             if john_candidates:
                 john_dir = os.path.dirname(john_candidates[0])
@@ -1047,6 +1094,7 @@ class MainWindow(QtWidgets.QMainWindow):
     
     def show_about(self):
         """显示关于对话框"""
+        from zipcracker_dialogs import AboutDialog
         dialog = AboutDialog(self, "4.0.5")
         dialog.exec_()
     
@@ -1137,15 +1185,43 @@ class MainWindow(QtWidgets.QMainWindow):
         except Exception as e:
             show_error_dialog(self, "显示贡献名单时发生异常", detail=str(e))
     
+    def get_cached_dialog(self, key, factory):
+        """获取缓存的对话框，首次使用时才构建
+        
+        Args:
+            key: 缓存键名
+            factory: 无参数的构建函数
+        
+        Returns:
+            QDialog: 对话框实例
+        """
+        dialog = self._dialog_cache.get(key)
+        if dialog is None:
+            dialog = factory()
+            self._dialog_cache[key] = dialog
+        return dialog
+    
+    def get_dict_manager_dialog(self):
+        """获取缓存的字典管理对话框，并清除上一次的选择、刷新本地字典"""
+        from zipcracker_dialogs import DictManagerDialog
+        created = "dict_manager" not in self._dialog_cache
+        dialog = self.get_cached_dialog("dict_manager", lambda: DictManagerDialog(self))
+        if not created:
+            dialog.selected_dict_path = None
+            dialog.load_local_dicts()
+        return dialog
+    
     def show_help(self):
         """显示帮助对话框"""
-        dialog = HelpDialog(self)
+        from zipcracker_dialogs import HelpDialog
+        dialog = self.get_cached_dialog("help", lambda: HelpDialog(self))
         dialog.exec_()
     
     def show_online_help(self):
         """打开在线帮助网页"""
         try:
             # 打开在线帮助页面，已更新为新链接
+            import webbrowser
             online_help_url = "https://www.axiu.xyz/index.php/archives/3/"
             webbrowser.open(online_help_url)
             self.set_status("正在打开在线帮助...", "success")
@@ -1194,6 +1270,7 @@ class MainWindow(QtWidgets.QMainWindow):
                         )
                         
                         if reply == QtWidgets.QMessageBox.Yes:
+                            import webbrowser
                             webbrowser.open(download_url)
                 
                 # 使用安全的UI更新方法
@@ -1304,6 +1381,8 @@ class MainWindow(QtWidgets.QMainWindow):
     
     def closeEvent(self, event):
         """窗口关闭事件"""
+        # 撤销排队中的预提取任务
+        get_hash_prefetcher().cancel_pending()
         # 如果正在破解，询问是否退出
         if self.is_cracking:
             reply = QtWidgets.QMessageBox.question(
@@ -1367,6 +1446,11 @@ class MainWindow(QtWidgets.QMainWindow):
     def logTextDropEvent(self, event):
         """处理日志区域拖拽释放事件"""
         if event.mimeData().hasUrls():
+            # 拖入多个文件或文件夹时进入批量模式
+            paths = [u.toLocalFile() for u in event.mimeData().urls() if u.isLocalFile()]
+            if len(paths) > 1 or any(os.path.isdir(p) for p in paths):
+                self.start_batch_crack(paths)
+                return
             # 获取第一个URL（只处理一个文件）
             url = event.mimeData().urls()[0]
             # 转换为本地路径
@@ -1394,8 +1478,7 @@ class MainWindow(QtWidgets.QMainWindow):
                 tool_path = None
                 if tool_name and john_dir:
                     # 递归查找john目录下的辅助工具
-                    import glob
-                    candidates = glob.glob(os.path.join(john_dir, '**', tool_name), recursive=True)
+                    candidates = get_tool_index().find_all(tool_name, john_dir)
                     if candidates:
                         tool_path = candidates[0]
                 if tool_name:
@@ -1414,13 +1497,8 @@ class MainWindow(QtWidgets.QMainWindow):
             message (str): 日志消息
             level (str): 日志级别，可选值：info, success, warning, error
         """
-        # 检查是否在主线程
-        if QtCore.QThread.currentThread() == QtWidgets.QApplication.instance().thread():
-            # 在主线程，直接调用
-            self._actual_log_message(message, level)
-        else:
-            # 在子线程，使用信号-槽
-            self.log_signal.emit(message, level)
+        # 日志管道本身线程安全，任意线程都可以直接入队
+        self._actual_log_message(message, level)
     
     @QtCore.pyqtSlot(str, str)
     def safe_log_message(self, message, level="info"):
@@ -1455,21 +1533,12 @@ class MainWindow(QtWidgets.QMainWindow):
             prefix = "ERROR"
             color = "#F44336"
         
-        # 格式化消息
-        formatted_message = f"[{current_time}] [{prefix}] {message}"
-        
-        # 设置HTML格式以支持颜色
-        html_message = f"<span style='color: {color};'>{formatted_message}</span>"
-        
-        # 添加到日志文本框
-        self.logText.append(html_message)
-        
-        # 自动滚动到底部
-        self.logText.moveCursor(QtGui.QTextCursor.End)
+        # 入队，由日志管道定时批量刷新到文本框（多行消息逐行加前缀）
+        self.log_pipeline.append(message, color, prefix=f"[{current_time}] [{prefix}] ")
     
     def clear_log(self):
         """清空日志文本框"""
-        self.logText.clear()
+        self.log_pipeline.clear()
         self.log_message("日志已清空")
     
     def export_log(self):
@@ -1485,12 +1554,8 @@ class MainWindow(QtWidgets.QMainWindow):
         
         if filename:
             try:
-                # 获取纯文本内容
-                log_content = self.logText.toPlainText()
-                
-                # 写入文件
-                with open(filename, "w", encoding="utf-8") as f:
-                    f.write(log_content)
+                # 从磁盘日志文件流式导出，不受文本框行数限制
+                self.log_pipeline.export(filename)
                 
                 self.set_status(f"日志已导出到 {filename}", "success")
             except Exception as e:
@@ -1510,10 +1575,19 @@ class MainWindow(QtWidgets.QMainWindow):
                 action = recentFilesMenu.addAction(os.path.basename(file_path))
                 action.setData(file_path)
                 action.triggered.connect(lambda checked, path=file_path: self.select_file(path))
+            # 预提取最近文件的哈希，排在前面的文件最后提交、最先处理
+            for file_path in reversed(recent_files[:5]):
+                self.prefetch_hash(file_path)
         else:
             emptyAction = recentFilesMenu.addAction("无最近文件")
             emptyAction.setEnabled(False)
         menu.addMenu(recentFilesMenu)
+        # 批量破解：选择文件夹，递归收集其中的加密文件
+        batchAction = menu.addAction("批量破解文件夹")
+        batchAction.triggered.connect(self.choose_batch_folder)
+        batchAction.setEnabled(not self.is_cracking)
+        importPotAction = menu.addAction("导入potfile")
+        importPotAction.triggered.connect(self.import_potfile)
         menu.addSeparator()
         saveResultAction = menu.addAction("保存破解结果")
         saveResultAction.triggered.connect(self.save_crack_result)
@@ -1785,10 +1859,12 @@ QRadioButton::indicator:unchecked {
         # 日志输出
         logLabel = QtWidgets.QLabel("日志输出：")
         mainLayout.addWidget(logLabel)
-        logEdit = QtWidgets.QTextEdit()
+        logEdit = QtWidgets.QPlainTextEdit()
         logEdit.setReadOnly(True)
         logEdit.setFixedHeight(90)
+        logEdit.setMaximumBlockCount(1000)
         mainLayout.addWidget(logEdit)
+        john_log = LogPipeline(logEdit)
         # 关闭按钮
         btnBox = QtWidgets.QDialogButtonBox()
         closeBtn = btnBox.addButton("关闭", QtWidgets.QDialogButtonBox.RejectRole)
@@ -1807,9 +1883,8 @@ QRadioButton::indicator:unchecked {
                 show_error_dialog(dialog, "请先选择有效的加密文件！")
                 return
             try:
-                from zipcracker_utils import extract_hash_safe
                 file_ext = os.path.splitext(file_path)[1].lower().lstrip('.')
-                hash_val = extract_hash_safe(self.john_path, file_path, file_ext)
+                hash_val = extract_hash_cached(self.john_path, file_path, file_ext)
                 if hash_val:
                     hashEdit.setText(hash_val[0])
                     self.log_message(f"[John] 哈希提取成功: {hash_val[0][:60]}...", "success")
@@ -1821,8 +1896,7 @@ QRadioButton::indicator:unchecked {
         hashBtn.clicked.connect(on_extract_hash)
         # 字典/规则/掩码文件浏览逻辑
         def on_dict_manager():
-            from zipcracker_dialogs import DictManagerDialog
-            dialog = DictManagerDialog(self)
+            dialog = self.get_dict_manager_dialog()
             if dialog.exec_() == QtWidgets.QDialog.Accepted:
                 selected_path = dialog.get_selected_dict_path()
                 if selected_path:
@@ -1832,10 +1906,15 @@ QRadioButton::indicator:unchecked {
         ruleFileBtn.clicked.connect(lambda: ruleFileEdit.setText(QtWidgets.QFileDialog.getOpenFileName(dialog, "选择规则文件", "", "规则文件 (*.rule);;所有文件 (*)")[0]))
         # 破解进程管理
         john_process = None
+        john_timers = []
+        def cancel_john_timers():
+            for timer in john_timers:
+                timer.cancel()
+            john_timers.clear()
         def safe_append_log(msg):
             try:
                 if logEdit and not hasattr(logEdit, 'wasDeleted'):
-                    logEdit.append(msg)
+                    john_log.append_html(msg)
             except Exception:
                 pass
         def get_office_format():
@@ -1846,13 +1925,24 @@ QRadioButton::indicator:unchecked {
                 safe_append_log("已有破解进程在运行，请先停止！")
                 return
             hash_val = hashEdit.toPlainText().strip()
+            known_password = get_result_store().lookup(hash_val)
+            if known_password:
+                safe_append_log(f"[结果库] 该哈希已破解过，密码: {html.escape(known_password)}")
+                pwdEdit.setText(known_password)
+                self.passwordEdit.setText(known_password)
+                self.copyPasswordBtn.setEnabled(True)
+                self.set_status("结果库中已有该哈希的密码，已自动填充", "success")
+                return
             mode_idx = attackModeCombo.currentIndex()
             cmd = []
             john_exe = self.find_john_executable(self.john_path) if hasattr(self, 'john_path') else "john"
             is_office = hash_val.strip().startswith("$office$")
             session_name = f"zipcracker_{int(time.time())}"
             import glob, os
-            rec_dir = os.path.dirname(john_exe)
+            rec_dir = os.path.dirname(os.path.abspath(john_exe))
+            # 会话文件（.rec/.log）用绝对路径写在John目录下，与下面的清理位置一致；
+            # 不改变工作目录，用户输入的相对字典/规则/字符集路径仍按当前目录解析
+            session_path = os.path.join(rec_dir, session_name)
             for f in glob.glob(os.path.join(rec_dir, "*.rec")):
                 try:
                     os.remove(f)
@@ -1863,7 +1953,7 @@ QRadioButton::indicator:unchecked {
                 cmd.append(f"--format={get_office_format()}")
             else:
                 cmd.append(john_exe)
-            cmd.append(f"--session={session_name}")
+            cmd.append(f"--session={session_path}")
             if mode_idx == 0:
                 cmd.append("--wordlist=" + dictEdit.text().strip())
             elif mode_idx == 1:
@@ -1909,38 +1999,36 @@ QRadioButton::indicator:unchecked {
             from PyQt5.QtCore import QProcess, QIODevice
             john_process = QProcess(dialog)
             john_process.setProcessChannelMode(QProcess.MergedChannels)
-            # 实时进度线程
-            progress_stop = threading.Event()
-            def progress_worker():
-                import subprocess
-                while not progress_stop.is_set() and john_process.state() == QProcess.Running:
-                    try:
-                        result = subprocess.run([john_exe, f"--status={session_name}"], capture_output=True, text=True, encoding="utf-8", errors="ignore")
-                        status = result.stdout.strip()
-                        if status:
-                            safe_append_log("[进度] " + status.splitlines()[-1])
-                    except Exception:
-                        pass
-                    time.sleep(2)
-            progress_thread = threading.Thread(target=progress_worker, daemon=True)
-            # 新增：最大运行时长检测线程
+            # 增量解码，只把完整的行交给日志，避免多字节字符和半行被截断
+            from zipcracker_process import LineDecoder
+            john_decoder = LineDecoder(errors="ignore")
+            # 实时进度和最大运行时长都交给全局监管器的定时器，不再单开线程
+            # 进度通过增量读取会话 .log 和解析 .rec 获得，不再反复启动 john --status
+            def on_john_progress(info):
+                elapsed = format_duration(info['elapsed'])
+                text = f"[进度] 已运行 {elapsed}，已破解 {info['guesses']} 个"
+                if info.get('progress') is not None:
+                    text += f"，进度 {info['progress']}%"
+                safe_append_log(text)
+            session_monitor = JohnSessionMonitor(
+                session_path,
+                on_progress=on_john_progress,
+                on_log_line=lambda line: safe_append_log("[会话] " + html.escape(line))
+            )
             MAX_RUNTIME_SECONDS = 2 * 60 * 60  # 2小时
-            def john_timeout_watcher():
-                import time
-                start_time = time.time()
-                while john_process is not None and john_process.state() == QProcess.Running:
-                    if time.time() - start_time > MAX_RUNTIME_SECONDS:
+            def on_john_timeout():
+                def kill_and_warn():
+                    if john_process is not None and john_process.state() == QProcess.Running:
                         safe_append_log(f"<span style='color:#F44336;'><b>[超时] John破解进程已运行超过{MAX_RUNTIME_SECONDS//3600}小时，已自动终止！</b></span>")
                         john_process.kill()
                         QtWidgets.QMessageBox.warning(dialog, "破解超时", f"John破解进程已运行超过{MAX_RUNTIME_SECONDS//3600}小时，已自动终止！")
-                        break
-                    time.sleep(10)
-            timeout_thread = threading.Thread(target=john_timeout_watcher, daemon=True)
+                safe_ui_update(kill_and_warn)
             def on_ready():
                 try:
                     if logEdit:
-                        data = john_process.readAllStandardOutput().data().decode(errors="ignore")
-                        if data:
+                        lines = john_decoder.feed(john_process.readAllStandardOutput().data())
+                        if lines:
+                            data = "\n".join(lines)
                             # 检查常见报错并高亮输出
                             if "No OpenCL devices found" in data:
                                 safe_append_log("<span style='color:#F44336;'><b>[错误] 未检测到OpenCL设备，无法使用GPU破解。请检查显卡驱动和OpenCL环境，或切换到CPU破解。</b></span>")
@@ -1949,17 +2037,14 @@ QRadioButton::indicator:unchecked {
                                 safe_append_log("<span style='color:#F44336;'><b>[错误] 哈希无效或未能加载。请检查哈希格式和完整性。</b></span>")
                                 show_error_dialog(dialog, "哈希无效或未能加载。", suggestion="请检查哈希格式和完整性。")
                             else:
-                                safe_append_log(data.rstrip())
-                            if logEdit.document().blockCount() > 1000:
-                                logEdit.clear()
-                                safe_append_log("[日志已自动清空，防止卡顿]")
+                                john_log.append(data)
                 except Exception:
                     pass
             john_process.readyReadStandardOutput.connect(on_ready)
             john_process.readyReadStandardError.connect(on_ready)
             def on_finished(exitCode, exitStatus):
                 try:
-                    progress_stop.set()
+                    cancel_john_timers()
                     safe_append_log(f"[完成] 进程退出，代码: {exitCode}")
                     startBtn.setEnabled(True)
                     stopBtn.setEnabled(False)
@@ -1981,10 +2066,12 @@ QRadioButton::indicator:unchecked {
                                 if password:
                                     pwdEdit.setText(password)
                                     found = True
+                                    get_result_store().add(hash_val, password, file_path=fileEdit.text().strip() or None, source="john")
                                     # --- 新增：同步到主界面 ---
                                     self.passwordEdit.setText(password)
                                     self.copyPasswordBtn.setEnabled(True)
                                     self.set_status("John破解获得密码，已自动填充", "success")
+                                    john_log.flush()
                                     for log_line in logEdit.toPlainText().splitlines():
                                         self.log_message(log_line)
                                     break
@@ -2005,8 +2092,9 @@ QRadioButton::indicator:unchecked {
                 john_process.start(cmd[0], cmd[1:])
                 if not john_process.waitForStarted(2000):
                     raise RuntimeError("无法启动John进程！")
-                progress_thread.start()
-                timeout_thread.start()
+                supervisor = get_supervisor()
+                john_timers.append(supervisor.call_every(0.5, session_monitor.poll))
+                john_timers.append(supervisor.call_later(MAX_RUNTIME_SECONDS, on_john_timeout))
             except Exception as e:
                 safe_append_log(f"[错误] 启动John失败: {e}")
                 QtWidgets.QMessageBox.critical(dialog, "John启动失败", f"无法启动John进程：{e}\n请检查路径、权限和依赖。")
@@ -2020,6 +2108,7 @@ QRadioButton::indicator:unchecked {
         def stop_crack():
             nonlocal john_process
             if john_process is not None:
+                cancel_john_timers()
                 john_process.kill()
                 safe_append_log("[操作] 已请求终止John进程")
                 john_process = None
@@ -2033,10 +2122,12 @@ QRadioButton::indicator:unchecked {
         result = {"password": "", "log": ""}
         def on_dialog_close(event):
             nonlocal john_process
+            cancel_john_timers()
             if john_process is not None:
                 john_process.kill()
                 john_process = None
             # 收集密码和日志并同步到主界面
+            john_log.flush()
             password = pwdEdit.text()
             log_content = logEdit.toPlainText()
             print(f"[DEBUG] on_dialog_close: pwdEdit={password}, logEdit={log_content}")
@@ -2112,10 +2203,26 @@ QRadioButton::indicator:unchecked {
             
             # 添加到最近文件列表
             self.add_to_recent_files(file_path)
+            
+            # 后台预提取哈希，点击"提取哈希"时可直接命中缓存
+            self.prefetch_hash(file_path)
         except Exception as e:
             self.set_status(f"设置文件失败: {str(e)}", "error")
             log_error(e)
     
+    def prefetch_hash(self, file_path):
+        """在后台低优先级预提取文件哈希
+        
+        Args:
+            file_path (str): 文件路径
+        """
+        if not config.get("speculative_extract", True):
+            return
+        try:
+            prefetch_hash(self.john_path, file_path)
+        except Exception as e:
+            log_error(e)
+    
     def add_to_recent_files(self, file_path):
         """添加文件到最近文件列表
         
@@ -2323,6 +2430,9 @@ QRadioButton::indicator:unchecked {
                         with zipfile.ZipFile(zip_path, 'r') as zip_ref:
                             zip_ref.extractall(os.path.dirname(install_dir))
                         shutil.rmtree(temp_dir)
+                        # 新解压的工具不在旧索引中，丢弃相关根目录的索引
+                        get_tool_index().invalidate(install_dir)
+                        get_tool_index().invalidate(os.getcwd())
                         self.john_path = install_dir
                         config.set("john_path", install_dir)
                         john_exe = self.find_john_executable(install_dir)
@@ -2389,30 +2499,25 @@ QRadioButton::indicator:unchecked {
                 self.log_signal.emit(f"正在提取哈希，文件类型: {file_ext}", "info")
                 
                 # 提取哈希
-                hash_value, hash_file = extract_hash_safe(
+                hash_value, hash_file = extract_hash_cached(
                     self.john_path, self.selected_file, file_ext
                 )
                 
                 if hash_value:
-                    # 基本清理哈希值，移除空行和前后空白
-                    hash_value = hash_value.strip()
-                    if "\n" in hash_value:
-                        lines = [line.strip() for line in hash_value.split("\n") if line.strip()]
-                        hash_value = lines[0] if lines else ""
-                    
-                    # 对于RAR5哈希，进行额外验证
-                    if file_ext == "rar" and "$rar5$" in hash_value:
-                        import re
-                        match = re.search(r'(\$rar5\$[^\s]+)', hash_value)
-                        if match:
-                            hash_value = match.group(1)
+                    # 基本清理哈希值，移除空行和前后空白；RAR5只保留$rar5$部分
+                    hash_value = normalize_extracted_hash(hash_value, file_ext)
                     
                     self.log_signal.emit(f"哈希提取成功: {hash_value[:100]}...", "success")
                     self.hash_update_signal.emit(hash_value, hash_file)
-                    # 提取成功后，禁用"提取哈希"，启用"开始破解"，启用"打开文件"
+                    # 提取成功后，禁用"提取哈希"，启用"打开文件"
                     safe_ui_update(lambda: self.copyHashBtn.setEnabled(False))
-                    safe_ui_update(lambda: self.startCrackBtn.setEnabled(True))
                     safe_ui_update(lambda: self.extractHashBtn.setEnabled(True))
+                    # 启动任何破解工具之前，先查结果库并在进程内预检已知密码和常用密码；
+                    # 预检结束后才启用"开始破解"，避免预检期间启动的攻击与预检结果重复
+                    safe_ui_update(lambda: self.set_status("正在预检已知密码和常用密码...", "normal"))
+                    if not self.precheck_extracted_hash(hash_value):
+                        safe_ui_update(lambda: self.set_status("哈希提取成功，可以开始破解", "normal"))
+                    safe_ui_update(lambda: self.startCrackBtn.setEnabled(True))
                 else:
                     # 失败时，启用"提取哈希"，禁用"开始破解"
                     safe_ui_update(lambda: self.copyHashBtn.setEnabled(True))
@@ -2433,6 +2538,40 @@ QRadioButton::indicator:unchecked {
                 pass  # 其他按钮状态已在上面处理
         threading.Thread(target=extract_task, daemon=True).start()
     
+    def precheck_extracted_hash(self, hash_value):
+        """哈希提取后立即查询结果库，并用原生校验器校验已知密码变形和常用密码表
+        
+        运行在提取线程中，命中时直接显示密码并写入结果库，无需启动hashcat或john。
+        
+        Args:
+            hash_value (str): 提取出的哈希值
+        
+        Returns:
+            str: 命中的密码，未命中时返回None
+        """
+        self._known_prechecked_hash = None
+        password = get_result_store().lookup(hash_value)
+        source = "结果库"
+        if not password and config.get("common_password_precheck", True):
+            source = "常用密码预检"
+            password, known_checked = precheck_password(
+                hash_value, known=config.get("known_password_prestage", True))
+            if known_checked:
+                self._known_prechecked_hash = hash_value
+            if password:
+                get_result_store().add(hash_value, password,
+                                       hash_mode=HASHCAT_MODE_MAP.get(self.file_ext),
+                                       file_path=self.selected_file or None, source="precheck")
+        if not password:
+            return None
+        self.log_signal.emit(f"{source}命中，无需启动破解工具，密码: {password}", "success")
+        def show_password():
+            self.passwordEdit.setText(password)
+            self.copyPasswordBtn.setEnabled(True)
+            self.set_status(f"{source}命中，密码: {password}", "success")
+        safe_ui_update(show_password)
+        return password
+    
     @QtCore.pyqtSlot(str, str)
     def update_hash_ui(self, hash_value, hash_file):
         """线程安全地更新哈希UI，分批加载哈希内容，避免卡顿
@@ -2483,12 +2622,11 @@ QRadioButton::indicator:unchecked {
                         display_hash = fixed_hash
                         self.hash_value = fixed_hash
                         
-                        # 重新写入哈希文件
+                        # 重新写入哈希文件（哈希文件按内容复用，修复后的哈希写入新文件）
                         if self.hash_file:
                             try:
                                 hash_line = self.hash_value.strip().splitlines()[0] if self.hash_value.strip() else ''
-                                with open(self.hash_file, "w", encoding="utf-8") as f:
-                                    f.write(hash_line + "\n")
+                                self.hash_file = write_hash_file(hash_line + "\n")
                                 self.log_message("哈希文件已更新为修复后格式", "success")
                             except Exception as e:
                                 self.log_message(f"更新哈希文件失败: {str(e)}", "error")
@@ -2679,29 +2817,21 @@ QRadioButton::indicator:unchecked {
         elif self.is_paused:
             self.resume_crack()
     
-    def start_crack(self):
-        """开始破解"""
-        if not self.hash_value:
-            self.log_message("请先提取哈希值", "warning")
-            return
-        
-        # 检查必要的工具
-        if not self.hashcat_path:
-            self.log_message("请先设置Hashcat路径", "warning")
-            self.show_tool_paths_dialog()
-            return
-            
-        # 寻找hashcat可执行文件
-        hashcat_exe = self.find_hashcat_executable(self.hashcat_path)
-        if not hashcat_exe or not os.path.exists(hashcat_exe):
-            self.log_message("未找到Hashcat可执行文件，请重新设置路径", "error")
-            self.show_tool_paths_dialog()
-            return
+    def get_hashcat_transcript_path(self):
+        """获取hashcat完整输出的压缩转储路径，未启用时返回None"""
+        if not config.get("keep_hashcat_transcript", False) or not self.hashcat_session_name:
+            return None
+        return os.path.join(config.get("log_dir", "logs"), f"{self.hashcat_session_name}.log.gz")
+    
+    def build_crack_params(self):
+        """根据当前界面的攻击模式设置构建破解参数
         
+        Returns:
+            dict: hashcat攻击参数（attack_mode、dict_path、mask等），参数不完整时返回None
+        """
         # 获取选择的攻击模式
         attack_mode = self.current_attack_mode
         
-        # 构建破解参数字典
         crack_params = {}
         
         # 根据攻击模式设置参数
@@ -2710,10 +2840,10 @@ QRadioButton::indicator:unchecked {
             dict_path = self.dictPathEdit.text()
             if not dict_path:
                 self.log_message("请先选择字典文件", "warning")
-                return
+                return None
             if not os.path.exists(dict_path):
                 self.log_message(f"字典文件不存在: {dict_path}", "error")
-                return
+                return None
             crack_params["dict_path"] = dict_path
         elif attack_mode == 1:  # 组合攻击
             crack_params["attack_mode"] = 1
@@ -2721,13 +2851,13 @@ QRadioButton::indicator:unchecked {
             dict2_path = self.dict2PathEdit.text()
             if not dict1_path or not dict2_path:
                 self.log_message("请先选择两个字典文件", "warning")
-                return
+                return None
             if not os.path.exists(dict1_path):
                 self.log_message(f"字典文件不存在: {dict1_path}", "error")
-                return
+                return None
             if not os.path.exists(dict2_path):
                 self.log_message(f"字典文件不存在: {dict2_path}", "error")
-                return
+                return None
             crack_params["dict1_path"] = dict1_path
             crack_params["dict2_path"] = dict2_path
         elif attack_mode == 2:  # 掩码攻击
@@ -2735,7 +2865,7 @@ QRadioButton::indicator:unchecked {
             mask = self.maskEdit.text()
             if not mask:
                 self.log_message("请先设置掩码", "warning")
-                return
+                return None
             # 检查掩码格式
             if not mask.startswith("?") and not any(c in "?*[]" for c in mask):
                 self.log_message("警告: 掩码格式可能不正确，一般掩码应包含?d、?l、?u等字符", "warning")
@@ -2745,13 +2875,13 @@ QRadioButton::indicator:unchecked {
             dict_path = self.dictHybridPathEdit.text()
             if not dict_path:
                 self.log_message("请先选择字典文件", "warning")
-                return
+                return None
             if not os.path.exists(dict_path):
                 self.log_message(f"字典文件不存在: {dict_path}", "error")
-                return
+                return None
             if not mask:
                 self.log_message("请先设置掩码", "warning")
-                return
+                return None
             # 判断是否为前缀掩码或后缀掩码
             is_prefix = self.maskHybridPosCombo.currentIndex() == 1  # 索引1为"前缀"
             if is_prefix:
@@ -2792,7 +2922,14 @@ QRadioButton::indicator:unchecked {
             # 这里只用第一个长度（可扩展为多轮）
             crack_params["mask"] = masks[0]
             self.log_message(f"暴力攻击掩码: {masks[0]}")
+        return crack_params
+    
+    def get_performance_params(self):
+        """读取性能设置
         
+        Returns:
+            dict: workload、threads、device、memory_limit、use_gpu
+        """
         # 获取性能设置
         performance_settings = config.get("performance_settings", {})
         
@@ -2816,6 +2953,52 @@ QRadioButton::indicator:unchecked {
         
         # 获取是否使用GPU
         use_gpu = self.gpuRadio.isChecked()
+        return {
+            "workload": workload,
+            "threads": threads,
+            "device": device,
+            "memory_limit": memory_limit,
+            "use_gpu": use_gpu,
+        }
+    
+    def start_crack(self):
+        """开始破解"""
+        if not self.hash_value:
+            self.log_message("请先提取哈希值", "warning")
+            return
+        
+        # 结果库中已有该哈希的密码时直接给出结果，不启动任何攻击
+        known_password = get_result_store().lookup(self.hash_value)
+        if known_password:
+            self.log_message("结果库中已有该哈希的破解结果，无需再次破解", "info")
+            self.on_crack_finished({'success': True, 'password': known_password, 'from_store': True})
+            return
+        
+        # 检查必要的工具
+        if not self.hashcat_path:
+            self.log_message("请先设置Hashcat路径", "warning")
+            self.show_tool_paths_dialog()
+            return
+            
+        # 寻找hashcat可执行文件
+        hashcat_exe = self.find_hashcat_executable(self.hashcat_path)
+        if not hashcat_exe or not os.path.exists(hashcat_exe):
+            self.log_message("未找到Hashcat可执行文件，请重新设置路径", "error")
+            self.show_tool_paths_dialog()
+            return
+        
+        # 构建破解参数字典
+        crack_params = self.build_crack_params()
+        if crack_params is None:
+            return
+        
+        # 获取性能设置
+        perf = self.get_performance_params()
+        workload = perf["workload"]
+        threads = perf["threads"]
+        device = perf["device"]
+        memory_limit = perf["memory_limit"]
+        use_gpu = perf["use_gpu"]
         
         # 检测是否是RAR5格式，需要特殊提醒
         is_rar5 = self.file_ext.lower() == "rar" and "$rar5$" in self.hash_value
@@ -2851,7 +3034,8 @@ QRadioButton::indicator:unchecked {
             device=device,
             memory_limit=memory_limit,
             cwd=os.path.dirname(hashcat_exe),  # 设置工作目录为hashcat可执行文件所在目录
-            session=self.hashcat_session_name  # 新增session参数
+            session=self.hashcat_session_name,  # 新增session参数
+            transcript_path=self.get_hashcat_transcript_path()
         )
         
         # 连接信号
@@ -2859,6 +3043,8 @@ QRadioButton::indicator:unchecked {
         self.hashcat_thread.status_signal.connect(self.set_status)
         # 移除进度条相关的信号连接
         self.hashcat_thread.finished_signal.connect(self.on_crack_finished)
+        self.hashcat_thread.ready_signal.connect(self.on_crack_ready)
+        self.hashcat_thread.preflight_failed_signal.connect(self.on_crack_preflight_failed)
         
         # 记录开始时间
         self.start_time = time.time()
@@ -2873,8 +3059,9 @@ QRadioButton::indicator:unchecked {
         self.timer.start(1000)
         self.crackTimeLabel.setText("破解时间: 00:00:00")
         
-        # 添加任务
-        self.task_manager.add_task(self.hashcat_thread)
+        # 先用已知密码及其变形快速预检，未命中再启动正式攻击
+        if not self.start_known_prestage(hashcat_exe, hash_mode, perf):
+            self.task_manager.add_task(self.hashcat_thread)
         
         # 记录日志
         attack_mode_names = ["字典攻击", "字典+规则", "掩码攻击", "混合攻击"]
@@ -2911,26 +3098,6 @@ QRadioButton::indicator:unchecked {
         
         # 设置状态
         self.set_status("正在破解中...", "normal")
-        
-        # 启动 John 实时进度刷新线程
-        self.john_status_stop = threading.Event()
-        session_name = getattr(self, 'john_session_name', None) or getattr(self, 'hashcat_session_name', None) or 'zipcracker_session'
-        john_exe = self.find_john_executable(self.john_path)
-        def status_worker():
-            while not self.john_status_stop.is_set():
-                try:
-                    result = subprocess.run(
-                        [john_exe, f"--status={session_name}"],
-                        capture_output=True, text=True, timeout=5
-                    )
-                    status = result.stdout.strip()
-                    if status:
-                        self.log_message("[进度] " + status.splitlines()[-1])
-                except Exception:
-                    pass
-                time.sleep(2)
-        self.john_status_thread = threading.Thread(target=status_worker, daemon=True)
-        self.john_status_thread.start()
     
     def pause_crack(self):
         """暂停破解（kill进程，保留session）"""
@@ -2977,11 +3144,14 @@ QRadioButton::indicator:unchecked {
                 attack_mode=None,
                 cwd=os.path.dirname(hashcat_exe),
                 session=self.hashcat_session_name,
-                restore=True
+                restore=True,
+                transcript_path=self.get_hashcat_transcript_path()
             )
             self.hashcat_thread.log_signal.connect(self.log_message)
             self.hashcat_thread.status_signal.connect(self.set_status)
             self.hashcat_thread.finished_signal.connect(self.on_crack_finished)
+            self.hashcat_thread.ready_signal.connect(self.on_crack_ready)
+            self.hashcat_thread.preflight_failed_signal.connect(self.on_crack_preflight_failed)
             self.start_time = time.time()
             self.is_cracking = True
             self.is_paused = False
@@ -2990,33 +3160,196 @@ QRadioButton::indicator:unchecked {
             self.pauseResumeBtn.setText("暂停破解")
             self.pauseResumeBtn.setEnabled(True)
             self.timer.start(1000)
+            # 启动前检查（版本探测、进程扫描）可能耗时较长，检查通过后3秒内仍无进程才提示；
+            # 检查失败和进程退出分别由preflight_failed_signal和finished_signal处理界面状态
+            restore_thread = self.hashcat_thread
+            def check_restore_started():
+                if getattr(restore_thread, 'process', None) is not None and restore_thread.process.pid:
+                    return  # 已启动
+                if not restore_thread.isRunning():
+                    return  # 线程已结束，由on_crack_finished处理
+                safe_ui_update(lambda: self.log_message("恢复破解的Hashcat进程尚未启动，请稍候或检查restore文件", "warning"))
+            restore_thread.ready_signal.connect(lambda: get_supervisor().call_later(3, check_restore_started))
+            # 启动线程，启动前检查在线程内完成
+            self.task_manager.add_task(self.hashcat_thread)
             self.set_status("正在继续破解...", "normal")
             self.log_message("已恢复破解进度，继续破解", "info")
-            # 新增：3秒内无进程ID日志则自动提示
-            def check_restore_started():
-                import time
-                for _ in range(30):  # 最多等3秒
-                    time.sleep(0.1)
-                    if hasattr(self.hashcat_thread, 'process') and self.hashcat_thread.process is not None:
-                        if self.hashcat_thread.process.pid:
-                            return  # 已启动
-                # 检查日志内容
-                if not any("进程ID" in l for l in getattr(self.hashcat_thread, 'cmd_output', [])):
-                    QtWidgets.QMessageBox.critical(self, "恢复破解失败", "未能成功恢复破解进度，可能restore文件不匹配、已损坏或环境不一致。请检查restore文件和参数。")
-                    self.set_status("恢复破解失败", "error")
-                    self.is_cracking = False
-                    self.is_paused = False
-                    self.startCrackBtn.setText("开始破解")
-                    self.startCrackBtn.setEnabled(True)
-                    self.pauseResumeBtn.setText("暂停破解")
-                    self.pauseResumeBtn.setEnabled(False)
-            import threading
-            threading.Thread(target=check_restore_started, daemon=True).start()
+    
+    def start_known_prestage(self, hashcat_exe, hash_mode, perf):
+        """用结果库中的已知密码及其变形（大小写、追加数字和年份）对当前哈希做一次小规模字典攻击
+        
+        Args:
+            hashcat_exe (str): hashcat可执行文件路径
+            hash_mode (str): hashcat模式号
+            perf (dict): 性能参数
+            
+        Returns:
+            bool: 是否启动了预检（预检结束后由on_prestage_finished决定是否启动正式攻击）
+        """
+        if not config.get("known_password_prestage", True):
+            return False
+        if self.hash_value and self.hash_value == self._known_prechecked_hash:
+            # 提取哈希后已用原生校验器校验过全部已知密码
+            return False
+        max_candidates = PRESTAGE_MAX_CANDIDATES_SLOW if hash_mode in SLOW_HASH_MODES else PRESTAGE_MAX_CANDIDATES
+        wordlist, count = create_known_wordlist(max_candidates)
+        if not wordlist:
+            return False
+        self._prestage_wordlist = wordlist
+        self.log_message(f"已知密码预检: 尝试 {count} 个已破解过的密码及其变形", "info")
+        self.prestage_thread = HashcatThread(
+            hashcat_path=hashcat_exe,
+            hash_value=self.hash_value,
+            hash_mode=hash_mode,
+            attack_mode=0,
+            dict_path=wordlist,
+            use_gpu=perf["use_gpu"],
+            workload=perf["workload"],
+            threads=perf["threads"],
+            device=perf["device"],
+            memory_limit=perf["memory_limit"],
+            cwd=os.path.dirname(hashcat_exe)
+        )
+        self.prestage_thread.log_signal.connect(self.log_message)
+        self.prestage_thread.finished_signal.connect(self.on_prestage_finished)
+        self.prestage_thread.preflight_failed_signal.connect(self.on_prestage_preflight_failed)
+        # 预检期间没有可暂停的会话
+        self.pauseResumeBtn.setEnabled(False)
+        self.prestage_thread.start()
+        return True
+    
+    def on_prestage_preflight_failed(self, title, message):
+        """预检启动前检查失败时直接进入正式攻击，由正式攻击报告具体原因"""
+        self.on_prestage_finished({'success': False, 'error': f"{title}: {message}"})
+    
+    def on_prestage_finished(self, result_dict):
+        """已知密码预检完成的回调：命中则直接给出结果，否则启动正式攻击"""
+        if self.sender() is not None and self.sender() is not self.prestage_thread:
+            return
+        self.prestage_thread = None
+        if self._prestage_wordlist:
+            try:
+                os.remove(self._prestage_wordlist)
+            except OSError:
+                pass
+            self._prestage_wordlist = None
+        if not self.is_cracking:
+            # 预检期间已停止破解
+            return
+        if result_dict.get('success'):
+            self.log_message("已知密码预检命中", "success")
+            self.on_crack_finished(result_dict)
+            return
+        self.log_message("已知密码预检未命中，启动正式攻击", "info")
+        self.pauseResumeBtn.setEnabled(True)
+        self.task_manager.add_task(self.hashcat_thread)
+    
+    def choose_batch_folder(self):
+        """选择文件夹并开始批量破解"""
+        folder = QtWidgets.QFileDialog.getExistingDirectory(self, "选择要批量破解的文件夹", config.get("last_batch_dir", ""))
+        if folder:
+            config.set("last_batch_dir", folder)
+            self.start_batch_crack([folder])
+    
+    def import_potfile(self):
+        """导入hashcat/John的potfile到结果库，之后遇到其中的哈希直接给出密码"""
+        potfile, _ = QtWidgets.QFileDialog.getOpenFileName(
+            self, "选择potfile", "", "Potfile (*.potfile *.pot);;所有文件 (*.*)")
+        if not potfile:
+            return
+        added = get_result_store().import_potfile(potfile)
+        if added < 0:
+            self.set_status("导入potfile失败", "error")
+        else:
+            self.log_message(f"已从 {os.path.basename(potfile)} 导入 {added} 条新的破解结果，"
+                             f"结果库共 {get_result_store().count()} 条", "success")
+    
+    def start_batch_crack(self, paths):
+        """对多个文件或文件夹启动批量破解
+        
+        先按魔数扫描出加密文件，哈希提取在有界线程池中并行执行，按hashcat模式分组后使用当前界面的
+        攻击设置依次破解，破解出的密码即时写入历史记录。
+        
+        Args:
+            paths (list): 文件或文件夹路径列表
+        """
+        from zipcracker_batch import BatchCrackThread
+        if self.is_cracking or (self.batch_thread is not None and self.batch_thread.isRunning()):
+            self.log_message("已有破解任务在运行，请先停止", "warning")
+            return
+        paths = [p for p in paths if p and os.path.exists(p)]
+        if not paths:
+            self.set_status("未找到可扫描的文件或文件夹", "error")
+            return
+        if not self.john_path:
+            self.set_status("未找到John the Ripper，请在设置中配置路径", "error")
+            self.show_tool_paths_dialog()
+            return
+        hashcat_exe = self.find_hashcat_executable(self.hashcat_path) if self.hashcat_path else None
+        if not hashcat_exe or not os.path.exists(hashcat_exe):
+            self.log_message("未找到Hashcat可执行文件，请重新设置路径", "error")
+            self.show_tool_paths_dialog()
+            return
+        crack_params = self.build_crack_params()
+        if crack_params is None:
+            return
+        self.log_message(f"批量破解: 扫描 {len(paths)} 个文件/文件夹中的加密文件", "info")
+        self.batch_thread = BatchCrackThread(
+            paths, self.john_path, hashcat_exe, crack_params,
+            performance=self.get_performance_params(),
+            known_prestage=config.get("known_password_prestage", True),
+            precheck=config.get("common_password_precheck", True)
+        )
+        self.batch_thread.log_signal.connect(self.log_message)
+        self.batch_thread.status_signal.connect(self.set_status)
+        self.batch_thread.result_signal.connect(self.on_batch_result)
+        self.batch_thread.finished_signal.connect(self.on_batch_finished)
+        self.start_time = time.time()
+        self.is_cracking = True
+        self.is_paused = False
+        self.startCrackBtn.setText("停止破解")
+        self.startCrackBtn.setEnabled(True)
+        self.pauseResumeBtn.setEnabled(False)
+        self.timer.start(1000)
+        self.batch_thread.start()
+    
+    def on_batch_result(self, found):
+        """批量破解中某个文件破解成功，立即写入历史记录"""
+        self.history_manager.add_record(
+            file_path=found["file_path"],
+            hash_value=found["hash_value"],
+            password=found["password"],
+            crack_time=found.get("crack_time")
+        )
+        self.log_message(f"[批量] 破解成功: {found['file_path']} 密码: {found['password']}", "success")
+    
+    def on_batch_finished(self, summary):
+        """批量破解完成的回调"""
+        if self.sender() is not None and self.sender() is not self.batch_thread:
+            return
+        self.batch_thread = None
+        self.is_cracking = False
+        self.is_paused = False
+        self.startCrackBtn.setText("开始破解")
+        self.startCrackBtn.setEnabled(True)
+        self.pauseResumeBtn.setText("暂停破解")
+        self.pauseResumeBtn.setEnabled(False)
+        msg = (f"批量破解{'已停止' if summary.get('stopped') else '完成'}: 共 {summary.get('total', 0)} 个加密文件，"
+               f"提取成功 {summary.get('extracted', 0)} 个，破解成功 {summary.get('cracked', 0)} 个，"
+               f"用时 {format_duration(summary.get('elapsed', 0))}")
+        self.log_message(msg, "success" if summary.get("cracked") else "warning")
+        for path in summary.get("failed", []):
+            self.log_message(f"[批量] 未能提取哈希: {path}", "warning")
+        self.set_status(msg, "success" if summary.get("cracked") else "warning")
     
     def stop_crack(self):
         """停止破解"""
         if self.is_cracking or self.is_paused:
             self.task_manager.stop_all_tasks()
+        if self.batch_thread is not None:
+            self.batch_thread.stop()
+        if self.prestage_thread is not None:
+            self.prestage_thread.kill()
         self.is_cracking = False
         self.is_paused = False
         self.startCrackBtn.setText("开始破解")
@@ -3027,10 +3360,12 @@ QRadioButton::indicator:unchecked {
     def on_status_label_clicked(self):
         if self.statusLabel.text() == "检测":
             # 自动递归查找当前目录及子目录的john.exe和hashcat.exe
-            import glob, os
+            import os
             base_dir = os.getcwd()
-            john_candidates = glob.glob(os.path.join(base_dir, '**', 'john.exe'), recursive=True)
-            hashcat_candidates = glob.glob(os.path.join(base_dir, '**', 'hashcat.exe'), recursive=True)
+            # 用户主动检测时丢弃旧索引，重新扫描
+            get_tool_index().invalidate(base_dir)
+            john_candidates = get_tool_index().find_all('john.exe', base_dir)
+            hashcat_candidates = get_tool_index().find_all('hashcat.exe', base_dir)
             updated = False
             if john_candidates:
                 # 取第一个找到的john.exe的上级目录（如run的上一级）
@@ -3062,12 +3397,14 @@ QRadioButton::indicator:unchecked {
     def on_fix_engine(self):
         """修复引擎按钮点击事件，自动修复所有工具路径并检测依赖"""
         # 自动修复所有工具路径
-        import glob, os, webbrowser, shutil, subprocess
+        import os, webbrowser, shutil, subprocess
         from PyQt5 import QtWidgets
         from zipcracker_config import config
         base_dir = os.getcwd()
+        # 用户主动修复时丢弃旧索引，重新扫描
+        get_tool_index().invalidate(base_dir)
         # 1. 查找 john.exe
-        john_candidates = glob.glob(os.path.join(base_dir, '**', 'john.exe'), recursive=True)
+        john_candidates = get_tool_index().find_all('john.exe', base_dir)
         if john_candidates:
             john_dir = os.path.dirname(john_candidates[0])
             if os.path.basename(john_dir).lower() == 'run':
@@ -3076,21 +3413,21 @@ QRadioButton::indicator:unchecked {
             config.set("john_path", john_dir)
             self.log_message(f"自动修复: 检测到John路径: {john_dir}", "success")
         # 2. 查找 hashcat.exe
-        hashcat_candidates = glob.glob(os.path.join(base_dir, '**', 'hashcat.exe'), recursive=True)
+        hashcat_candidates = get_tool_index().find_all('hashcat.exe', base_dir)
         if hashcat_candidates:
             hashcat_path = hashcat_candidates[0]
             self.hashcat_path = hashcat_path
             config.set("hashcat_path", hashcat_path)
             self.log_message(f"自动修复: 检测到Hashcat路径: {hashcat_path}", "success")
         # 3. 查找 OpenCL
-        opencl_candidates = glob.glob(os.path.join(base_dir, '**', 'OpenCL*'), recursive=True)
+        opencl_candidates = get_tool_index().find_all('OpenCL*', base_dir)
         if opencl_candidates:
             opencl_dir = os.path.dirname(opencl_candidates[0])
             self.opencl_path = opencl_dir
             config.set("opencl_path", opencl_dir)
             self.log_message(f"自动修复: 检测到OpenCL路径: {opencl_dir}", "success")
         # 4. 查找 perl.exe
-        perl_candidates = glob.glob(os.path.join(base_dir, '**', 'perl.exe'), recursive=True)
+        perl_candidates = get_tool_index().find_all('perl.exe', base_dir)
         if perl_candidates:
             perl_path = perl_candidates[0]
             self.perl_path = perl_path
@@ -3153,6 +3490,13 @@ QRadioButton::indicator:unchecked {
         except Exception:
             return '未知显卡'
 
+    def update_gpu_label_async(self):
+        """在后台线程获取显卡信息并更新状态栏标签"""
+        def worker():
+            gpu_info = self.get_gpu_info()
+            safe_ui_update(lambda: self.gpuLabel.setText(f"显卡: {gpu_info}"))
+        threading.Thread(target=worker, daemon=True).start()
+
     def kill_hashcat_processes(self):
         """结束所有hashcat.exe进程（跨平台）"""
         import subprocess
@@ -3235,10 +3579,11 @@ QRadioButton::indicator:unchecked {
 
     def auto_find_and_detect_tools(self):
         """自动查找工具路径并检测"""
-        import glob, os
+        import os
         base_dir = os.getcwd()
-        john_candidates = glob.glob(os.path.join(base_dir, '**', 'john.exe'), recursive=True)
-        hashcat_candidates = glob.glob(os.path.join(base_dir, '**', 'hashcat.exe'), recursive=True)
+        get_tool_index().invalidate(base_dir)
+        john_candidates = get_tool_index().find_all('john.exe', base_dir)
+        hashcat_candidates = get_tool_index().find_all('hashcat.exe', base_dir)
         updated = False
         if john_candidates:
             john_dir = os.path.dirname(john_candidates[0])
@@ -3260,38 +3605,34 @@ QRadioButton::indicator:unchecked {
             self.set_status("未在当前目录及子目录找到工具", "warning")
 
     def detect_gpus(self):
+        """在后台线程检测GPU设备，完成后填充设备列表"""
+        self.device_combo.clear()
+        self.device_combo.addItem("检测中...")
+        from zipcracker_config import config
+        hashcat_path = config.get("hashcat_path", "")
+        def worker():
+            devices = None
+            try:
+                if hashcat_path and os.path.exists(hashcat_path):
+                    # 设备列表按hashcat可执行文件指纹缓存，只有首次或升级后才真正运行探测
+                    devices = get_tool_probes().get_hashcat_devices(hashcat_path) or []
+            except Exception as e:
+                log_error(e)
+            safe_ui_update(lambda: self._fill_gpu_devices(devices))
+        threading.Thread(target=worker, daemon=True).start()
+
+    def _fill_gpu_devices(self, devices):
+        """用检测结果填充GPU设备列表，devices为None表示检测失败"""
         self.device_combo.clear()
         self.device_combo.addItem("CPU (不使用GPU)")
-        try:
-            import subprocess, re
-            from zipcracker_config import config
-            hashcat_path = config.get("hashcat_path", "")
-            if hashcat_path and os.path.exists(hashcat_path):
-                process = subprocess.Popen(
-                    [hashcat_path, "--benchmark", "--machine-readable"],
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    universal_newlines=True,
-                    creationflags=subprocess.CREATE_NO_WINDOW
-                )
-                stdout, stderr = process.communicate(timeout=10)
-                devices = []
-                for line in stdout.split("\n"):
-                    if "DEVICE_NAME" in line:
-                        match = re.search(r'DEVICE_NAME:(.*?)(?:,|$)', line)
-                        if match:
-                            device_name = match.group(1).strip()
-                            devices.append(device_name)
-                for device in devices:
-                    self.device_combo.addItem(device)
-                if devices:
-                    self.device_combo.setCurrentIndex(1)
-            else:
-                self.device_combo.addItem("NVIDIA GPU")
-                self.device_combo.addItem("AMD GPU")
-        except:
+        if devices is None:
             self.device_combo.addItem("NVIDIA GPU")
             self.device_combo.addItem("AMD GPU")
+            return
+        for device in devices:
+            self.device_combo.addItem(device)
+        if devices:
+            self.device_combo.setCurrentIndex(1)
 
     def show_mask_gen(self):
         """显示掩码生成器，并标记是从哪个按钮调用的"""
@@ -3355,6 +3696,25 @@ QRadioButton::indicator:unchecked {
         """强制检测工具路径并刷新UI状态"""
         self.detect_tools_async()
 
+    def on_crack_ready(self):
+        """破解线程启动前检查通过的回调"""
+        self.log_message("启动前检查通过，正在启动Hashcat", "info")
+    
+    def on_crack_preflight_failed(self, title, message):
+        """破解线程启动前检查失败的回调，恢复界面状态并提示原因"""
+        if self.sender() is not None and self.sender() is not self.hashcat_thread:
+            return
+        self.timer.stop()
+        self.is_cracking = False
+        self.is_paused = False
+        self.startCrackBtn.setText("开始破解")
+        self.startCrackBtn.setEnabled(True)
+        self.pauseResumeBtn.setText("暂停破解")
+        self.pauseResumeBtn.setEnabled(False)
+        self.set_status(title, "error")
+        self.log_message(f"{title}: {message}", "error")
+        QtWidgets.QMessageBox.critical(self, title, message)
+    
     def on_crack_finished(self, result_dict):
         """
         破解线程完成时的回调
@@ -3372,6 +3732,10 @@ QRadioButton::indicator:unchecked {
         file_path = getattr(self, 'selected_file', None) or getattr(self, 'current_file', None) or ''
         if result_dict.get('success', False):
             password = result_dict.get('password', '')
+            if not result_dict.get('from_store'):
+                get_result_store().add(self.hash_value, password,
+                                       hash_mode=HASHCAT_MODE_MAP.get(self.file_ext),
+                                       file_path=file_path or None)
             self.passwordEdit.setText(password)
             self.passwordEdit.setStyleSheet("color: #00FF00; background-color: #1E1E1E;")
             self.copyPasswordBtn.setEnabled(bool(password))
@@ -3386,8 +3750,6 @@ QRadioButton::indicator:unchecked {
             self.log_message(msg, "error")
             logger.error(msg)
             QtWidgets.QMessageBox.warning(self, "破解失败", msg)
-        if hasattr(self, 'john_status_stop'):
-            self.john_status_stop.set()
 
     def show_rule_editor(self):
         from PyQt5 import QtWidgets, QtGui, QtCore
@@ -3569,7 +3931,7 @@ QRadioButton::indicator:unchecked {
             def open_recent(self, item):
                 # 预留：可实现最近文件管理
                 pass
-        dialog = RuleEditorPro(self)
+        dialog = self.get_cached_dialog("rule_editor", lambda: RuleEditorPro(self))
         dialog.exec_()
 
     def show_dict_merge(self):
@@ -3578,8 +3940,7 @@ QRadioButton::indicator:unchecked {
         dialog.exec_()
 
     def show_dict_manager_for(self, target_field):
-        from zipcracker_dialogs import DictManagerDialog
-        dialog = DictManagerDialog(self)
+        dialog = self.get_dict_manager_dialog()
         if dialog.exec_() == QtWidgets.QDialog.Accepted:
             selected_path = dialog.get_selected_dict_path()
             if selected_path and hasattr(self, target_field):
@@ -3637,15 +3998,36 @@ def run_app():
         app_icon.addFile(icon_path)
         app.setWindowIcon(app_icon)
     
+    mark_startup("创建QApplication")
+    
     # 创建并显示主窗口
     window = MainWindow()
+    mark_startup("构建主窗口")
     window.show()
+    mark_startup("显示主窗口")
+    
+    if PROFILE_STARTUP:
+        # 事件循环处理完第一批事件（包括延后的工具检测调度）后输出耗时
+        def report():
+            mark_startup("首次事件循环")
+            print_startup_profile()
+        QtCore.QTimer.singleShot(0, report)
     
     # 启动应用程序
     sys.exit(app.exec_())
 
+def print_startup_profile():
+    """输出各启动阶段的耗时"""
+    start = _startup_marks[0][1]
+    prev = start
+    print("启动耗时统计:")
+    for stage, t in _startup_marks[1:]:
+        print(f"  {stage:<16} {(t - prev) * 1000:8.1f} ms  (累计 {(t - start) * 1000:8.1f} ms)")
+        prev = t
+
 if __name__ == "__main__":
     init_logging()  # 初始化日志系统
+    mark_startup("初始化日志")
     try:
         print("Starting application...")
         run_app()
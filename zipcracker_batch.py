@@ -0,0 +1,337 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+ZIP Cracker - 批量破解模块
+负责按魔数扫描加密文件、并行提取哈希、按哈希模式分组并依次破解
+"""
+
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from PyQt5 import QtCore
+from PyQt5.QtCore import pyqtSignal
+
+from zipcracker_models import HashcatThread, guess_hash_mode, SLOW_HASH_MODES
+from zipcracker_scanner import scan_encrypted_files
+from zipcracker_store import get_result_store, create_known_wordlist
+from zipcracker_store import PRESTAGE_MAX_CANDIDATES, PRESTAGE_MAX_CANDIDATES_SLOW
+from zipcracker_verify import precheck_password
+from zipcracker_utils import extract_hash_cached, normalize_extracted_hash, log_error
+
+# 同时运行的哈希提取任务数（每个任务会启动zip2john/rar2john/perl等子进程）
+BATCH_EXTRACT_WORKERS = min(4, os.cpu_count() or 1)
+
+# 批量模式下每个文件进程内预检的时间上限（秒）
+BATCH_PRECHECK_TIME_BUDGET = 0.5
+
+
+class BatchCrackThread(QtCore.QThread):
+    """批量破解线程
+
+    先按魔数并行扫描出真正加密的文件，再用有界线程池并行提取哈希，按hashcat模式号分组，
+    对每一组使用同一套攻击参数、一次hashcat运行破解。每破解出一个密码就发出result_signal，
+    便于界面立即写入历史记录。
+    """
+    log_signal = pyqtSignal(str)  # 日志信号
+    status_signal = pyqtSignal(str, str)  # 状态信号
+    progress_signal = pyqtSignal(int, int)  # 进度信号(已处理, 总数)
+    result_signal = pyqtSignal(dict)  # 单个文件破解成功信号
+    finished_signal = pyqtSignal(dict)  # 完成信号(汇总)
+
+    def __init__(self, paths, john_path, hashcat_path, crack_params, performance=None,
+                 max_workers=BATCH_EXTRACT_WORKERS, known_prestage=True, precheck=True):
+        """初始化批量破解线程
+
+        Args:
+            paths (list): 待破解的文件或文件夹列表（文件夹递归扫描）
+            john_path (str): John the Ripper路径（用于提取哈希）
+            hashcat_path (str): hashcat可执行文件路径
+            crack_params (dict): 攻击参数（attack_mode、dict_path、mask等），所有分组共用
+            performance (dict, optional): 性能参数（workload、threads、device、memory_limit、use_gpu）
+            max_workers (int): 并行提取哈希的最大任务数
+            known_prestage (bool): 每组正式攻击前是否先用已知密码及其变形预检
+            precheck (bool): 提取哈希后是否立即用原生校验器预检已知密码和常用密码
+        """
+        super().__init__()
+        self.paths = list(paths)
+        self.files = []
+        self.file_exts = {}  # 文件路径 -> 按魔数识别出的扩展名
+        self.john_path = john_path
+        self.hashcat_path = hashcat_path
+        self.crack_params = dict(crack_params or {})
+        self.performance = dict(performance or {})
+        self.max_workers = max(1, int(max_workers or 1))
+        self.known_prestage = known_prestage
+        self.precheck = precheck
+        self.entries = []
+        self._stop_event = threading.Event()
+        self._current = None
+
+    def stop(self):
+        """停止批量任务，终止正在运行的hashcat"""
+        self._stop_event.set()
+        current = self._current
+        if current is not None:
+            current.kill()
+
+    def is_stopped(self):
+        return self._stop_event.is_set()
+
+    def scan_files(self):
+        """按魔数并行扫描加密文件，未加密或无法识别的文件直接跳过
+
+        Returns:
+            list: 加密文件路径列表（按路径排序）
+        """
+        files = []
+        for result in scan_encrypted_files(self.paths, stop_event=self._stop_event):
+            files.append(result["file_path"])
+            self.file_exts[result["file_path"]] = result["ext"]
+            if len(files) % 100 == 0:
+                self.status_signal.emit(f"正在扫描加密文件，已找到 {len(files)} 个...", "normal")
+        files.sort()
+        return files
+
+    def extract_one(self, file_path):
+        """提取单个文件的哈希
+
+        提取成功后立即用原生校验器预检，命中的密码记录在password字段；
+        已知密码全部在进程内校验过时known_checked为True，分组预检时跳过该条目。
+
+        Returns:
+            dict: {file_path, file_ext, hash_value, hash_mode, password, known_checked}，失败时hash_value为None
+        """
+        file_ext = self.file_exts.get(file_path) or os.path.splitext(file_path)[1].lower().lstrip('.')
+        entry = {"file_path": file_path, "file_ext": file_ext, "hash_value": None, "hash_mode": None}
+        if self.is_stopped():
+            return entry
+        hash_value, _ = extract_hash_cached(self.john_path, file_path, file_ext)
+        hash_value = normalize_extracted_hash(hash_value, file_ext)
+        if hash_value:
+            entry["hash_value"] = hash_value
+            entry["hash_mode"] = guess_hash_mode(hash_value, file_ext)
+            if self.precheck and not get_result_store().lookup(hash_value):
+                entry["password"], entry["known_checked"] = precheck_password(
+                    hash_value, time_budget=BATCH_PRECHECK_TIME_BUDGET,
+                    stop_event=self._stop_event, known=self.known_prestage)
+        return entry
+
+    def extract_all(self):
+        """用有界线程池并行提取全部哈希"""
+        total = len(self.files)
+        done = 0
+        entries = []
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            futures = {executor.submit(self.extract_one, path): path for path in self.files}
+            for future in as_completed(futures):
+                path = futures[future]
+                done += 1
+                try:
+                    entry = future.result()
+                except Exception as e:
+                    log_error(e)
+                    entry = {"file_path": path, "hash_value": None, "hash_mode": None}
+                if entry.get("hash_value") and entry.get("hash_mode"):
+                    self.log_signal.emit(f"[批量] 提取成功 ({done}/{total}): {os.path.basename(path)} -m {entry['hash_mode']}")
+                else:
+                    self.log_signal.emit(f"[批量] 提取失败 ({done}/{total}): {os.path.basename(path)}")
+                entries.append(entry)
+                self.progress_signal.emit(done, total)
+                if self.is_stopped():
+                    for other in futures:
+                        other.cancel()
+                    break
+        finally:
+            executor.shutdown(wait=False)
+        # 保持与输入顺序一致，日志和结果更易对照
+        order = {path: i for i, path in enumerate(self.files)}
+        entries.sort(key=lambda e: order.get(e["file_path"], 0))
+        return entries
+
+    def resolve_known(self, entries):
+        """用原生预检结果和结果库直接解决已知密码的哈希，命中的条目立即发出result_signal且不再参与破解
+
+        Returns:
+            tuple: (命中的结果列表, 仍需破解的条目列表)
+        """
+        store = get_result_store()
+        found_list = []
+        remaining = []
+        for entry in entries:
+            password = entry.get("password")
+            if not password and entry.get("hash_value"):
+                password = store.lookup(entry["hash_value"])
+            if not password:
+                remaining.append(entry)
+                continue
+            found = {
+                "file_path": entry["file_path"],
+                "hash_value": entry["hash_value"],
+                "hash_mode": entry.get("hash_mode"),
+                "password": password,
+                "crack_time": 0,
+            }
+            found_list.append(found)
+            self.result_signal.emit(found)
+        return found_list, remaining
+
+    @staticmethod
+    def group_by_mode(entries):
+        """按hashcat模式号分组
+
+        Returns:
+            dict: 模式号 -> 条目列表（保持原有顺序）
+        """
+        groups = {}
+        for entry in entries:
+            if entry.get("hash_value") and entry.get("hash_mode"):
+                groups.setdefault(entry["hash_mode"], []).append(entry)
+        return groups
+
+    def crack_group(self, mode, items, params=None):
+        """把同一模式的全部哈希交给一次hashcat运行，字典/掩码只需遍历一遍
+
+        hashcat使用--remove和outfile记录破解进度，每破解一个哈希就把密码映射回
+        对应的文件（相同哈希的多个文件共享同一结果）并立即发出result_signal。
+
+        Args:
+            mode (str): hashcat模式号
+            items (list): 该模式下的条目列表
+            params (dict, optional): 攻击参数，默认使用界面的攻击设置
+
+        Returns:
+            list: 破解成功的结果列表
+        """
+        params = params or self.crack_params
+        perf = self.performance
+        by_hash = {}
+        for entry in items:
+            by_hash.setdefault(entry["hash_value"].strip(), []).append(entry)
+        found_list = []
+        group_start = time.time()
+
+        def on_hash_cracked(hash_line, password):
+            for entry in by_hash.get(hash_line.strip(), []):
+                found = {
+                    "file_path": entry["file_path"],
+                    "hash_value": entry["hash_value"],
+                    "hash_mode": mode,
+                    "password": password,
+                    "crack_time": time.time() - group_start,
+                }
+                found_list.append(found)
+                self.result_signal.emit(found)
+
+        thread = HashcatThread(
+            hashcat_path=self.hashcat_path,
+            hash_values=list(by_hash),
+            hash_mode=mode,
+            attack_mode=params.get("attack_mode", 0),
+            dict_path=params.get("dict_path", ""),
+            rule_path=params.get("rule_path", ""),
+            mask=params.get("mask", ""),
+            dict1_path=params.get("dict1_path", ""),
+            dict2_path=params.get("dict2_path", ""),
+            use_gpu=perf.get("use_gpu", True),
+            workload=perf.get("workload", 2),
+            threads=perf.get("threads"),
+            device=perf.get("device"),
+            memory_limit=perf.get("memory_limit"),
+            cwd=os.path.dirname(self.hashcat_path),
+        )
+        thread.log_signal.connect(self.log_signal.emit)
+        thread.preflight_failed_signal.connect(
+            lambda title, message: self.log_signal.emit(f"[批量] {title}: {message}"))
+        thread.hash_cracked_signal.connect(on_hash_cracked)
+        self._current = thread
+        try:
+            # 在批量线程内直接执行，复用HashcatThread的启动和输出解析逻辑
+            thread.run()
+        finally:
+            self._current = None
+            if thread.outfile:
+                try:
+                    os.remove(thread.outfile)
+                except OSError:
+                    pass
+        return found_list
+
+    def prestage_group(self, mode, items):
+        """用已知密码及其变形对一组哈希做一次小规模字典攻击
+
+        Returns:
+            list: 破解成功的结果列表
+        """
+        # 已知密码已在提取后全部由原生校验器校验过的条目无需再交给hashcat
+        items = [entry for entry in items if not entry.get("known_checked")]
+        if not items:
+            return []
+        max_candidates = PRESTAGE_MAX_CANDIDATES_SLOW if mode in SLOW_HASH_MODES else PRESTAGE_MAX_CANDIDATES
+        wordlist, count = create_known_wordlist(max_candidates)
+        if not wordlist:
+            return []
+        try:
+            self.log_signal.emit(f"[批量] 已知密码预检 -m {mode}: {count} 个候选")
+            return self.crack_group(mode, items, params={"attack_mode": 0, "dict_path": wordlist})
+        finally:
+            try:
+                os.remove(wordlist)
+            except OSError:
+                pass
+
+    def run(self):
+        summary = {"total": 0, "extracted": 0, "cracked": 0, "results": [], "failed": []}
+        start_time = time.time()
+        try:
+            self.status_signal.emit("正在扫描加密文件...", "normal")
+            self.files = self.scan_files()
+            summary["total"] = len(self.files)
+            self.log_signal.emit(f"[批量] 扫描完成: 找到 {len(self.files)} 个加密文件，用时 {time.time() - start_time:.1f} 秒")
+            if not self.files or self.is_stopped():
+                summary["stopped"] = self.is_stopped()
+                summary["elapsed"] = time.time() - start_time
+                self.finished_signal.emit(summary)
+                return
+            self.status_signal.emit(f"正在批量提取哈希 (共{len(self.files)}个文件)...", "normal")
+            self.entries = self.extract_all()
+            summary["failed"] = [e["file_path"] for e in self.entries if not e.get("hash_value")]
+            summary["extracted"] = sum(1 for e in self.entries if e.get("hash_value") and e.get("hash_mode"))
+            known_list, pending = self.resolve_known(self.entries)
+            summary["cracked"] += len(known_list)
+            summary["results"].extend(known_list)
+            if known_list:
+                self.log_signal.emit(f"[批量] 结果库命中 {len(known_list)} 个文件，无需再次破解")
+            groups = self.group_by_mode(pending)
+            for mode, items in groups.items():
+                self.log_signal.emit(f"[批量] 模式 -m {mode}: {len(items)} 个哈希")
+
+            for mode, items in groups.items():
+                if self.is_stopped():
+                    break
+                if self.known_prestage:
+                    found_list = self.prestage_group(mode, items)
+                    if found_list:
+                        summary["cracked"] += len(found_list)
+                        summary["results"].extend(found_list)
+                        cracked_paths = {found["file_path"] for found in found_list}
+                        items = [entry for entry in items if entry["file_path"] not in cracked_paths]
+                        self.log_signal.emit(f"[批量] 已知密码预检命中 {len(found_list)} 个文件")
+                    if not items or self.is_stopped():
+                        continue
+                self.status_signal.emit(f"正在批量破解 -m {mode} ({len(items)}个文件)...", "normal")
+                self.log_signal.emit(f"[批量] 单次运行破解 -m {mode} 的 {len(items)} 个哈希")
+                found_list = self.crack_group(mode, items)
+                summary["cracked"] += len(found_list)
+                summary["results"].extend(found_list)
+                self.log_signal.emit(f"[批量] -m {mode} 完成: 破解 {len(found_list)}/{len(items)}")
+        except Exception as e:
+            log_error(e)
+            self.log_signal.emit(f"[!] 批量破解出错: {str(e)}")
+            summary["error"] = str(e)
+        summary["stopped"] = self.is_stopped()
+        summary["elapsed"] = time.time() - start_time
+        self.finished_signal.emit(summary)
@@ -0,0 +1,320 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+ZIP Cracker - 哈希缓存模块
+负责按文件内容缓存已提取的哈希并在后台预提取，重复打开同一文件或其副本时无需再次调用zip2john等工具
+"""
+
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+import logging
+
+HASH_CACHE_FILE = "zipcracker_cache.db"
+
+# 参与内容摘要的文件头/尾字节数：ZIP的中央目录、7z的尾部头信息都位于文件末尾，
+# RAR的加密头位于文件开头，头尾各取一段即可区分不同的加密文件
+HASH_CACHE_SAMPLE_BYTES = 64 * 1024
+
+# 缓存的最大条目数，超出后按最近使用时间淘汰
+HASH_CACHE_MAX_ENTRIES = 5000
+
+
+def connect_sqlite(db_path, timeout=10):
+    """打开SQLite数据库连接，启用WAL以便读写并发
+
+    Args:
+        db_path (str): 数据库文件路径
+        timeout (int): 等待写锁的秒数
+
+    Returns:
+        sqlite3.Connection: 数据库连接（允许跨线程使用，调用方需自行加锁）
+    """
+    db_dir = os.path.dirname(os.path.abspath(db_path))
+    if db_dir and not os.path.exists(db_dir):
+        os.makedirs(db_dir, exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=timeout, check_same_thread=False)
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+    except sqlite3.DatabaseError:
+        # 部分网络文件系统不支持WAL，退回默认日志模式
+        pass
+    return conn
+
+
+def file_content_key(file_path, sample_bytes=HASH_CACHE_SAMPLE_BYTES):
+    """计算文件内容键：文件大小 + 文件头尾字节的摘要
+
+    Args:
+        file_path (str): 文件路径
+        sample_bytes (int): 头尾各读取的字节数
+
+    Returns:
+        str: 内容键，读取失败时返回None
+    """
+    try:
+        size = os.path.getsize(file_path)
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            if size <= sample_bytes * 2:
+                digest.update(f.read())
+            else:
+                digest.update(f.read(sample_bytes))
+                f.seek(size - sample_bytes)
+                digest.update(f.read(sample_bytes))
+        return f"{size}:{digest.hexdigest()}"
+    except OSError:
+        return None
+
+
+class HashCache:
+    """哈希提取结果缓存
+
+    hashes表以内容键保存哈希，paths表记录 路径+大小+修改时间 到内容键的映射：
+    同一路径未修改时无需读取文件即可命中；文件被复制或移动后通过内容键命中。
+    """
+
+    def __init__(self, db_path=HASH_CACHE_FILE, max_entries=HASH_CACHE_MAX_ENTRIES):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self):
+        if self._conn is None:
+            self._conn = connect_sqlite(self.db_path)
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS hashes (
+                    content_key TEXT NOT NULL,
+                    file_ext TEXT NOT NULL,
+                    hash_value TEXT NOT NULL,
+                    created REAL NOT NULL,
+                    last_used REAL NOT NULL,
+                    PRIMARY KEY (content_key, file_ext)
+                );
+                CREATE TABLE IF NOT EXISTS paths (
+                    path TEXT PRIMARY KEY,
+                    size INTEGER NOT NULL,
+                    mtime REAL NOT NULL,
+                    content_key TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_hashes_last_used ON hashes(last_used);
+            """)
+            self._conn.commit()
+        return self._conn
+
+    @staticmethod
+    def _path_key(file_path):
+        return os.path.normcase(os.path.abspath(file_path))
+
+    def get(self, file_path, file_ext):
+        """查询文件的缓存哈希
+
+        Args:
+            file_path (str): 文件路径
+            file_ext (str): 文件扩展名（不含点）
+
+        Returns:
+            str: 缓存的哈希值，未命中时返回None
+        """
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            return None
+        path_key = self._path_key(file_path)
+        try:
+            with self._lock:
+                conn = self._connect()
+                row = conn.execute(
+                    "SELECT size, mtime, content_key FROM paths WHERE path = ?", (path_key,)
+                ).fetchone()
+                if row and row[0] == st.st_size and row[1] == st.st_mtime:
+                    content_key = row[2]
+                else:
+                    content_key = None
+            if content_key is None:
+                # 路径未命中或文件已变化，按内容重新计算键（锁外读取文件）
+                content_key = file_content_key(file_path)
+                if content_key is None:
+                    return None
+            with self._lock:
+                conn = self._connect()
+                row = conn.execute(
+                    "SELECT hash_value FROM hashes WHERE content_key = ? AND file_ext = ?",
+                    (content_key, file_ext)
+                ).fetchone()
+                if not row:
+                    return None
+                now = time.time()
+                conn.execute(
+                    "INSERT OR REPLACE INTO paths (path, size, mtime, content_key) VALUES (?, ?, ?, ?)",
+                    (path_key, st.st_size, st.st_mtime, content_key)
+                )
+                conn.execute(
+                    "UPDATE hashes SET last_used = ? WHERE content_key = ? AND file_ext = ?",
+                    (now, content_key, file_ext)
+                )
+                conn.commit()
+                return row[0]
+        except sqlite3.Error as e:
+            logging.getLogger("zipcracker").warning(f"读取哈希缓存失败: {e}")
+            return None
+
+    def put(self, file_path, file_ext, hash_value):
+        """保存文件的提取结果
+
+        Args:
+            file_path (str): 文件路径
+            file_ext (str): 文件扩展名（不含点）
+            hash_value (str): 提取出的哈希值
+        """
+        if not hash_value:
+            return
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            return
+        content_key = file_content_key(file_path)
+        if content_key is None:
+            return
+        try:
+            with self._lock:
+                conn = self._connect()
+                now = time.time()
+                conn.execute(
+                    "INSERT OR REPLACE INTO hashes (content_key, file_ext, hash_value, created, last_used) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (content_key, file_ext, hash_value, now, now)
+                )
+                conn.execute(
+                    "INSERT OR REPLACE INTO paths (path, size, mtime, content_key) VALUES (?, ?, ?, ?)",
+                    (self._path_key(file_path), st.st_size, st.st_mtime, content_key)
+                )
+                self._prune(conn)
+                conn.commit()
+        except sqlite3.Error as e:
+            logging.getLogger("zipcracker").warning(f"写入哈希缓存失败: {e}")
+
+    def _prune(self, conn):
+        """超出容量时淘汰最久未使用的条目及其路径映射"""
+        count = conn.execute("SELECT COUNT(*) FROM hashes").fetchone()[0]
+        if count <= self.max_entries:
+            return
+        conn.execute(
+            "DELETE FROM hashes WHERE rowid IN "
+            "(SELECT rowid FROM hashes ORDER BY last_used LIMIT ?)",
+            (count - self.max_entries,)
+        )
+        conn.execute("DELETE FROM paths WHERE content_key NOT IN (SELECT content_key FROM hashes)")
+
+    def clear(self):
+        """清空缓存"""
+        try:
+            with self._lock:
+                conn = self._connect()
+                conn.execute("DELETE FROM hashes")
+                conn.execute("DELETE FROM paths")
+                conn.commit()
+        except sqlite3.Error as e:
+            logging.getLogger("zipcracker").warning(f"清空哈希缓存失败: {e}")
+
+
+
+class HashPrefetcher:
+    """后台预提取哈希
+
+    单个工作线程按“后提交先处理”的顺序执行提取任务，结果写入哈希缓存；
+    同一文件在排队或正在提取时不会重复提交，前台提取可等待正在进行的任务完成后直接命中缓存。
+    """
+
+    def __init__(self, extract_func, max_pending=8):
+        """初始化预提取器
+
+        Args:
+            extract_func (callable): 提取函数，签名为 extract_func(john_path, file_path, file_ext)
+            max_pending (int): 最多排队的任务数，超出时丢弃最早提交的任务
+        """
+        self.extract_func = extract_func
+        self.max_pending = max(1, int(max_pending))
+        self._lock = threading.Lock()
+        self._pending = []  # [(path_key, john_path, file_path, file_ext)]，末尾优先
+        self._inflight = {}  # path_key -> threading.Event
+        self._worker = None
+
+    @staticmethod
+    def _path_key(file_path):
+        return os.path.normcase(os.path.abspath(file_path))
+
+    def submit(self, john_path, file_path, file_ext):
+        """提交预提取任务
+
+        Returns:
+            bool: 是否加入了队列（已在排队或正在提取时返回False）
+        """
+        key = self._path_key(file_path)
+        with self._lock:
+            if key in self._inflight:
+                return False
+            # 重复提交时只提升优先级
+            self._pending = [item for item in self._pending if item[0] != key]
+            self._pending.append((key, john_path, file_path, file_ext))
+            if len(self._pending) > self.max_pending:
+                del self._pending[:len(self._pending) - self.max_pending]
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="hash-prefetch", daemon=True)
+                self._worker.start()
+        return True
+
+    def wait(self, file_path, timeout=None):
+        """等待某个文件正在进行的预提取完成，排队中的任务直接撤销交由调用方提取
+
+        Returns:
+            bool: 该文件是否有正在进行的预提取且已完成
+        """
+        key = self._path_key(file_path)
+        with self._lock:
+            self._pending = [item for item in self._pending if item[0] != key]
+            event = self._inflight.get(key)
+        if event is None:
+            return False
+        return event.wait(timeout)
+
+    def cancel_pending(self):
+        """撤销所有排队中的任务（正在提取的任务会自然结束）"""
+        with self._lock:
+            self._pending = []
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if not self._pending:
+                    self._worker = None
+                    return
+                key, john_path, file_path, file_ext = self._pending.pop()
+                event = threading.Event()
+                self._inflight[key] = event
+            try:
+                self.extract_func(john_path, file_path, file_ext)
+            except Exception as e:
+                logging.getLogger("zipcracker").warning(f"预提取哈希失败: {file_path}: {e}")
+            finally:
+                with self._lock:
+                    self._inflight.pop(key, None)
+                event.set()
+
+
+_hash_cache = None
+_hash_cache_lock = threading.Lock()
+
+
+def get_hash_cache():
+    """获取全局哈希缓存"""
+    global _hash_cache
+    with _hash_cache_lock:
+        if _hash_cache is None:
+            _hash_cache = HashCache()
+        return _hash_cache
@@ -7,7 +7,9 @@ ZIP Cracker - 配置管理模块
 """
 
 import os
+import copy
 import json
+import threading
 
 CONFIG_FILE = "zipcracker_config.json"
 
@@ -31,7 +33,26 @@ DEFAULT_CONFIG = {
     "log_max_bytes": 5 * 1024 * 1024,  # 5MB
     "log_backup_count": 10,
     "log_level": "INFO",
-    "log_console": True
+    "log_console": True,
+    # 主界面日志视图
+    "view_log_file": "zipcracker_view.log",
+    "log_view_max_blocks": 5000,
+    "log_flush_interval_ms": 100,
+    # 是否将hashcat完整输出压缩转储到日志目录
+    "keep_hashcat_transcript": False,
+    # 工具位置索引和能力探测缓存
+    "tool_index": {},
+    "tool_probes": {},
+    # 上次成功检测到的工具，启动时先显示该状态再后台校验
+    "tool_status": {},
+    # 上次批量破解选择的文件夹
+    "last_batch_dir": "",
+    # 选择文件或显示最近文件时在后台预提取哈希
+    "speculative_extract": True,
+    # 正式攻击前先用已破解过的密码及其变形做一次快速预检
+    "known_password_prestage": True,
+    # 提取哈希后立即在进程内校验常用密码表
+    "common_password_precheck": True
 }
 
 class Config:
@@ -41,12 +62,35 @@ class Config:
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(Config, cls).__new__(cls)
-            cls._instance._config = DEFAULT_CONFIG.copy()
-            cls._instance.load()
+            cls._instance._config = copy.deepcopy(DEFAULT_CONFIG)
+            # 首次读写配置时才加载文件，导入模块时不做磁盘IO
+            cls._instance._loaded = False
+            cls._instance._loading = False
+            cls._instance._load_lock = threading.RLock()
+            # set/save可能来自多个检测线程，修改和写盘都在此锁内进行
+            cls._instance._write_lock = threading.RLock()
         return cls._instance
     
+    def _ensure_loaded(self):
+        """确保配置文件已加载（其他线程正在加载时等待其完成）"""
+        if not self._loaded:
+            with self._load_lock:
+                # 加载过程中同一线程再次读取配置（如记录错误日志）时直接使用默认值，避免递归加载
+                if not self._loaded and not self._loading:
+                    self.load()
+    
     def load(self):
         """加载配置"""
+        with self._load_lock:
+            self._loading = True
+            try:
+                self._load_file()
+            finally:
+                self._loading = False
+                # 加载结束后才置位，其他线程在此之前会在_load_lock上等待，不会读到默认值
+                self._loaded = True
+    
+    def _load_file(self):
         try:
             # 自动创建配置文件（如不存在）
             if not os.path.exists(CONFIG_FILE):
@@ -73,9 +117,15 @@ class Config:
     
     def save(self):
         """保存配置"""
+        self._ensure_loaded()
         try:
-            with open(CONFIG_FILE, 'w', encoding='utf-8') as f:
-                json.dump(self._config, f, ensure_ascii=False, indent=2)
+            with self._write_lock:
+                data = json.dumps(self._config, ensure_ascii=False, indent=2)
+                # 先写临时文件再替换，写入中途出错不会留下截断的配置文件
+                temp_file = CONFIG_FILE + ".tmp"
+                with open(temp_file, 'w', encoding='utf-8') as f:
+                    f.write(data)
+                os.replace(temp_file, CONFIG_FILE)
         except Exception as e:
             try:
                 from zipcracker_utils import log_error
@@ -86,6 +136,7 @@ class Config:
     
     def get(self, key, default=None):
         """获取配置项"""
+        self._ensure_loaded()
         # 支持使用点号分隔的嵌套键
         if "." in key:
             parts = key.split(".")
@@ -101,29 +152,33 @@ class Config:
     
     def set(self, key, value):
         """设置配置项"""
-        # 支持使用点号分隔的嵌套键
-        if "." in key:
-            parts = key.split(".")
-            config = self._config
-            for part in parts[:-1]:
-                if part not in config:
-                    config[part] = {}
-                elif not isinstance(config[part], dict):
-                    config[part] = {}
-                config = config[part]
-            config[parts[-1]] = value
-        else:
-            self._config[key] = value
-        
-        # 自动保存配置
-        self.save()
+        self._ensure_loaded()
+        # 保存副本，调用方之后在其他线程修改原对象不会影响写盘
+        value = copy.deepcopy(value)
+        with self._write_lock:
+            # 支持使用点号分隔的嵌套键
+            if "." in key:
+                parts = key.split(".")
+                config = self._config
+                for part in parts[:-1]:
+                    if part not in config:
+                        config[part] = {}
+                    elif not isinstance(config[part], dict):
+                        config[part] = {}
+                    config = config[part]
+                config[parts[-1]] = value
+            else:
+                self._config[key] = value
+            
+            # 自动保存配置
+            self.save()
     
     def add_recent_file(self, file_path):
         """添加最近使用的文件"""
         if not file_path:
             return
             
-        recent_files = self.get("recent_files", [])
+        recent_files = list(self.get("recent_files", []))
         
         # 如果已存在，移到列表首位
         if file_path in recent_files:
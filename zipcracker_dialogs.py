@@ -14,8 +14,6 @@ import threading
 import tempfile
 import subprocess
 import webbrowser
-import requests
-import glob
 import logging
 import urllib.request
 
@@ -24,8 +22,9 @@ from PyQt5.QtCore import Qt
 
 from zipcracker_ui import BaseDialog
 from zipcracker_models import DownloadThread, DownloadThreadWithRetry
-from zipcracker_utils import log_error, run_cmd_with_output, format_duration, show_error_dialog, show_info_dialog
+from zipcracker_utils import log_error, run_cmd_with_output, format_duration, show_error_dialog, show_info_dialog, safe_ui_update
 from zipcracker_config import config
+from zipcracker_tools import get_tool_index, get_tool_probes
 
 class ToolPathsDialog(BaseDialog):
     """工具路径设置对话框"""
@@ -73,7 +72,7 @@ class ToolPathsDialog(BaseDialog):
     
     def _auto_find_opencl_path(self):
         """优先检测系统常见OpenCL默认安装路径，未找到再递归查找当前目录"""
-        import os, glob
+        import os
         # 常见OpenCL安装路径
         candidates = [
             r"C:/Windows/System32",
@@ -90,7 +89,7 @@ class ToolPathsDialog(BaseDialog):
                     return path
         # 递归查找当前目录
         base_dir = os.getcwd()
-        dlls = glob.glob(os.path.join(base_dir, '**', 'OpenCL*.dll'), recursive=True)
+        dlls = [p for p in get_tool_index().find_all('OpenCL*', base_dir) if p.lower().endswith('.dll')]
         if dlls:
             return os.path.dirname(dlls[0])
         return ""
@@ -98,7 +97,7 @@ class ToolPathsDialog(BaseDialog):
     def _auto_find_perl_path(self):
         """递归查找perl.exe完整路径"""
         base_dir = os.getcwd()
-        perls = glob.glob(os.path.join(base_dir, '**', 'perl.exe'), recursive=True)
+        perls = get_tool_index().find_all('perl.exe', base_dir)
         if perls:
             return perls[0]
         return ""
@@ -261,25 +260,27 @@ class ToolPathsDialog(BaseDialog):
 
     def refresh_tool_paths(self):
         """自动查找并填充工具路径"""
-        import glob, os
+        import os
         base_dir = os.getcwd()
+        # 用户主动刷新时丢弃旧索引，重新扫描
+        get_tool_index().invalidate(base_dir)
         # 查找 john.exe
-        johns = glob.glob(os.path.join(base_dir, '**', 'john.exe'), recursive=True)
+        johns = get_tool_index().find_all('john.exe', base_dir)
         if johns:
             john_dir = os.path.dirname(johns[0])
             if os.path.basename(john_dir).lower() == 'run':
                 john_dir = os.path.dirname(john_dir)
             self.john_path_edit.setText(john_dir)
         # 查找 hashcat.exe
-        hashcats = glob.glob(os.path.join(base_dir, '**', 'hashcat.exe'), recursive=True)
+        hashcats = get_tool_index().find_all('hashcat.exe', base_dir)
         if hashcats:
             self.hashcat_path_edit.setText(hashcats[0])
         # 查找 OpenCL
-        opencls = glob.glob(os.path.join(base_dir, '**', 'OpenCL*'), recursive=True)
+        opencls = get_tool_index().find_all('OpenCL*', base_dir)
         if opencls:
             self.opencl_path_edit.setText(os.path.dirname(opencls[0]))
         # 查找 perl.exe
-        perls = glob.glob(os.path.join(base_dir, '**', 'perl.exe'), recursive=True)
+        perls = get_tool_index().find_all('perl.exe', base_dir)
         if perls:
             self.perl_path_edit.setText(perls[0])
 
@@ -843,6 +844,9 @@ class MaskGeneratorDialog(BaseDialog):
 class HistoryDialog(BaseDialog):
     """历史记录对话框"""
     
+    # 每页加载的记录数
+    PAGE_SIZE = 200
+    
     def __init__(self, parent=None, history_manager=None):
         """初始化对话框
         
@@ -855,6 +859,7 @@ class HistoryDialog(BaseDialog):
         self.resize(800, 500)
         
         self.history_manager = history_manager
+        self._loaded_count = 0
         
         # 创建内容布局
         content_layout = QtWidgets.QVBoxLayout()
@@ -867,7 +872,7 @@ class HistoryDialog(BaseDialog):
         
         # 搜索框
         self.search_edit = QtWidgets.QLineEdit()
-        self.search_edit.setPlaceholderText("搜索文件名、哈希值或密码...")
+        self.search_edit.setPlaceholderText("搜索文件路径或完整哈希值...")
         self.search_edit.textChanged.connect(self.filter_records)
         filter_layout.addWidget(self.search_edit)
         
@@ -902,6 +907,10 @@ class HistoryDialog(BaseDialog):
         # 操作按钮
         btn_layout = QtWidgets.QHBoxLayout()
         
+        self.more_btn = QtWidgets.QPushButton("加载更多")
+        self.more_btn.clicked.connect(self.load_more_records)
+        btn_layout.addWidget(self.more_btn)
+        
         export_btn = QtWidgets.QPushButton("导出历史")
         export_btn.clicked.connect(self.export_history)
         btn_layout.addWidget(export_btn)
@@ -925,19 +934,23 @@ class HistoryDialog(BaseDialog):
         self.load_records()
     
     def load_records(self):
-        """加载历史记录"""
+        """按当前搜索条件重新加载第一页记录"""
+        self.history_table.setRowCount(0)
+        self._loaded_count = 0
+        self.load_more_records()
+    
+    def load_more_records(self):
+        """从历史数据库分页加载记录（只读取哈希前缀，完整哈希在复制时再读取）"""
         if not self.history_manager:
+            self.more_btn.setEnabled(False)
             return
-        
-        # 清空表格
-        self.history_table.setRowCount(0)
-        
-        # 获取所有记录
-        records = self.history_manager.get_all_records()
-        
-        # 添加到表格
+        records = self.history_manager.search(
+            self.search_edit.text(), limit=self.PAGE_SIZE, offset=self._loaded_count
+        )
         for record in records:
             self.add_record_to_table(record)
+        self._loaded_count += len(records)
+        self.more_btn.setEnabled(len(records) == self.PAGE_SIZE)
     
     def add_record_to_table(self, record):
         """添加记录到表格
@@ -954,16 +967,17 @@ class HistoryDialog(BaseDialog):
             crack_time = format_duration(record["crack_time"])
         self.history_table.setItem(row, 0, QtWidgets.QTableWidgetItem(crack_time))
         
-        # 文件名
-        file_name = os.path.basename(record.get("file_path", "未知文件"))
-        self.history_table.setItem(row, 1, QtWidgets.QTableWidgetItem(file_name))
+        # 文件名（记录ID保存在该单元格中，删除和复制哈希时使用）
+        file_path = record.get("file_path") or "未知文件"
+        name_item = QtWidgets.QTableWidgetItem(os.path.basename(file_path))
+        name_item.setToolTip(file_path)
+        name_item.setData(Qt.UserRole, record.get("id"))
+        self.history_table.setItem(row, 1, name_item)
         
-        # 哈希值
-        hash_value = record.get("hash_value", "")
-        display_hash = hash_value[:37] + "..." if len(hash_value) > 40 else hash_value
-        hash_item = QtWidgets.QTableWidgetItem(display_hash)
-        hash_item.setToolTip(hash_value)  # 存储完整哈希
-        self.history_table.setItem(row, 2, hash_item)
+        # 哈希值（列表只含哈希前缀）
+        hash_preview = record.get("hash_preview", "")
+        display_hash = hash_preview[:37] + "..." if len(hash_preview) > 40 else hash_preview
+        self.history_table.setItem(row, 2, QtWidgets.QTableWidgetItem(display_hash))
         
         # 密码
         self.history_table.setItem(row, 3, QtWidgets.QTableWidgetItem(record.get("password", "")))
@@ -975,23 +989,16 @@ class HistoryDialog(BaseDialog):
             self.history_table.setItem(row, 4, QtWidgets.QTableWidgetItem("未知"))
     
     def filter_records(self):
-        """过滤记录"""
-        search_text = self.search_edit.text().lower()
-        
-        for row in range(self.history_table.rowCount()):
-            match = False
-            
-            for col in range(self.history_table.columnCount()):
-                item = self.history_table.item(row, col)
-                if item and search_text in item.text().lower():
-                    match = True
-                    break
-            
-            self.history_table.setRowHidden(row, not match)
+        """过滤记录（由历史数据库的索引和全文检索完成）"""
+        self.load_records()
+    
+    def _record_id(self, row):
+        item = self.history_table.item(row, 1)
+        return item.data(Qt.UserRole) if item else None
     
     def export_history(self):
         """导出历史记录"""
-        if not self.history_manager or len(self.history_manager.get_all_records()) == 0:
+        if not self.history_manager or self.history_manager.get_count() == 0:
             show_info_dialog(self, "没有历史记录可导出", title="提示")
             return
         
@@ -1079,7 +1086,7 @@ class HistoryDialog(BaseDialog):
     
     def clear_history(self):
         """清空历史记录"""
-        if not self.history_manager or len(self.history_manager.get_all_records()) == 0:
+        if not self.history_manager or self.history_manager.get_count() == 0:
             show_info_dialog(self, "没有历史记录可清空", title="提示")
             return
         
@@ -1092,7 +1099,7 @@ class HistoryDialog(BaseDialog):
         
         if reply == QtWidgets.QMessageBox.Yes:
             self.history_manager.clear_history()
-            self.history_table.setRowCount(0)
+            self.load_records()
             show_info_dialog(self, "历史记录已清空", title="成功")
     
     def show_context_menu(self, position):
@@ -1167,14 +1174,11 @@ class HistoryDialog(BaseDialog):
         if not indexes:
             return
         
-        # 获取哈希值列
-        row = indexes[0].row()
-        hash_item = self.history_table.item(row, 2)
+        # 按记录ID读取完整哈希值
+        record_id = self._record_id(indexes[0].row())
+        hash_value = self.history_manager.get_hash(record_id) if self.history_manager and record_id is not None else None
         
-        if hash_item:
-            # 获取完整哈希值（从工具提示）
-            hash_value = hash_item.toolTip()
-            
+        if hash_value:
             # 复制到剪贴板
             clipboard = QtWidgets.QApplication.clipboard()
             clipboard.setText(hash_value)
@@ -1202,15 +1206,14 @@ class HistoryDialog(BaseDialog):
             rows = sorted(list(rows), reverse=True)
             
             for row in rows:
-                # 获取哈希值
-                hash_value = self.history_table.item(row, 2).toolTip()
-                
-                # 从历史记录中删除
-                if self.history_manager:
-                    self.history_manager.delete_record(hash_value)
+                # 按记录ID从历史记录中删除
+                record_id = self._record_id(row)
+                if self.history_manager and record_id is not None:
+                    self.history_manager.delete_record(record_id)
                 
                 # 从表格中删除
                 self.history_table.removeRow(row)
+                self._loaded_count -= 1
 
 class DictManagerDialog(BaseDialog):
     """字典管理对话框"""
@@ -2369,68 +2372,42 @@ class PerformanceSettingsDialog(BaseDialog):
         self.main_layout.addLayout(content_layout)
     
     def detect_gpus(self):
-        """检测可用的GPU设备，兼容hashcat路径为文件夹或exe文件，支持多种输出格式，优先显示显卡型号，并输出调试日志"""
-        self.device_combo.clear()
-        self.device_combo.addItem("CPU (不使用GPU)")
+        """检测可用的GPU设备，兼容hashcat路径为文件夹或exe文件，支持多种输出格式，优先显示显卡型号
+        
+        探测在后台线程执行，结果按可执行文件指纹缓存，完成后再填充设备列表，对话框打开时不再等待hashcat。
+        """
+        import os
+        from zipcracker_config import config
+        hashcat_path = config.get("hashcat_path", "")
+        # 兼容：如果是文件夹，自动查找hashcat.exe
+        if hashcat_path and os.path.isdir(hashcat_path):
+            exe_path = os.path.join(hashcat_path, "hashcat.exe")
+            if os.path.exists(exe_path):
+                hashcat_path = exe_path
+        def worker():
+            devices = []
+            try:
+                if hashcat_path and os.path.isfile(hashcat_path):
+                    # 先解析hashcat -I，失败时降级用--benchmark --machine-readable
+                    devices = get_tool_probes().get_hashcat_devices(hashcat_path) or []
+            except Exception as e:
+                log_error(e)
+            safe_ui_update(lambda: self._fill_gpu_devices(devices))
+        threading.Thread(target=worker, daemon=True).start()
+    
+    def _fill_gpu_devices(self, devices):
+        """用检测结果填充GPU设备列表"""
         try:
-            import subprocess, re, os
-            from zipcracker_config import config
-            hashcat_path = config.get("hashcat_path", "")
-            # 兼容：如果是文件夹，自动查找hashcat.exe
-            if hashcat_path and os.path.isdir(hashcat_path):
-                exe_path = os.path.join(hashcat_path, "hashcat.exe")
-                if os.path.exists(exe_path):
-                    hashcat_path = exe_path
-            if hashcat_path and os.path.isfile(hashcat_path):
-                try:
-                    process = subprocess.run([hashcat_path, "-I"], capture_output=True, text=True, encoding="utf-8", errors="ignore")
-                    output = process.stdout
-                    # 调试输出
-                    try:
-                        with open("gpu_detect_debug.txt", "w", encoding="utf-8") as f:
-                            f.write(output)
-                    except Exception:
-                        pass
-                    devices = []
-                    # 更宽松的正则，兼容所有NVIDIA/AMD显卡行
-                    for line in output.splitlines():
-                        m = re.search(r'Name.*?:\s*(NVIDIA.*|AMD.*)', line)
-                        if m:
-                            device_name = m.group(1).strip()
-                            if device_name and device_name not in devices:
-                                devices.append(device_name)
-                    # 如果还没找到，兜底用包含NVIDIA/AMD的行
-                    if not devices:
-                        for line in output.splitlines():
-                            if "NVIDIA" in line or "AMD" in line:
-                                devices.append(line.strip())
-                    for device in devices:
-                        self.device_combo.addItem(device)
-                    if devices:
-                        self.device_combo.setCurrentIndex(1)
-                        return
-                except Exception:
-                    pass
-                # 降级用--benchmark --machine-readable
-                try:
-                    process = subprocess.run([hashcat_path, "--benchmark", "--machine-readable"], capture_output=True, text=True, encoding="utf-8", errors="ignore")
-                    output = process.stdout
-                    devices = []
-                    for line in output.split("\n"):
-                        if "DEVICE_NAME" in line:
-                            match = re.search(r'DEVICE_NAME:(.*?)(?:,|$)', line)
-                            if match:
-                                device_name = match.group(1).strip()
-                                devices.append(device_name)
-                    for device in devices:
-                        self.device_combo.addItem(device)
-                    if devices:
-                        self.device_combo.setCurrentIndex(1)
-                        return
-                except Exception:
-                    pass
-        except Exception as e:
-            pass
+            self.device_combo.clear()
+        except RuntimeError:
+            # 对话框已关闭
+            return
+        self.device_combo.addItem("CPU (不使用GPU)")
+        for device in devices:
+            self.device_combo.addItem(device)
+        if devices:
+            self.device_combo.setCurrentIndex(1)
+            return
         # 兜底
         self.device_combo.addItem("NVIDIA GPU")
         self.device_combo.addItem("AMD GPU")
@@ -2976,7 +2953,7 @@ class RuleEditorDialog(BaseDialog):
         
         # 添加标签页
         self.tab_widget.addTab(editor_tab, "规则编辑器")
-        self.tab_widget.addTab(common_rules_tab, "常用规则")
+        self.common_rules_tab_index = self.tab_widget.addTab(common_rules_tab, "常用规则")
         
         # 添加标签页到主布局
         content_layout.addWidget(self.tab_widget)
@@ -2994,7 +2971,15 @@ class RuleEditorDialog(BaseDialog):
         # 添加内容到主布局
         self.main_layout.addLayout(content_layout)
         
-        # 初始化常用规则
+        # 常用规则列表较大，首次切换到该标签页时才初始化
+        self.common_rules_loaded = False
+        self.tab_widget.currentChanged.connect(self.ensure_common_rules)
+    
+    def ensure_common_rules(self, index=None):
+        """首次切换到常用规则标签页时初始化列表"""
+        if self.common_rules_loaded or self.tab_widget.currentIndex() != self.common_rules_tab_index:
+            return
+        self.common_rules_loaded = True
         self.init_common_rules()
     
     def init_common_rules(self):
@@ -0,0 +1,1836 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+ZIP Cracker - 原生哈希提取模块
+负责不依赖zip2john等外部工具，直接解析加密文件结构生成hashcat可用的哈希
+"""
+
+import io
+import os
+import mmap
+import zlib
+import struct
+import hashlib
+import logging
+import binascii
+
+# ---------------------------------------------------------------- ZIP
+
+ZIP_LOCAL_SIG = b"PK\x03\x04"
+ZIP_CENTRAL_SIG = b"PK\x01\x02"
+ZIP_EOCD_SIG = b"PK\x05\x06"
+ZIP64_EOCD_SIG = b"PK\x06\x06"
+ZIP64_LOCATOR_SIG = b"PK\x06\x07"
+
+# EOCD最大偏移：22字节记录 + 最长65535字节注释
+ZIP_EOCD_SEARCH = 22 + 0xFFFF
+
+ZIP_METHOD_STORED = 0
+ZIP_METHOD_DEFLATE = 8
+ZIP_METHOD_AES = 99
+
+ZIP_EXTRA_ZIP64 = 0x0001
+ZIP_EXTRA_AES = 0x9901
+
+# AES强度 -> 盐长度
+ZIP_AES_SALT_LEN = {1: 8, 2: 12, 3: 16}
+
+# hashcat内核可接受的内联数据上限（PKZIP的MAX_DATA为320KB）
+PKZIP_MAX_DATA = 320 * 1024
+ZIP2_MAX_DATA = 320 * 1024
+
+# 多文件 $pkzip2$ 哈希最多包含的条目数（hashcat的MAX_HASHES）
+PKZIP_MAX_ENTRIES = 8
+
+# 部分数据(DT=1)条目保留的字节数：12字节加密头 + 24字节数据供解压校验
+PKZIP_PARTIAL_BYTES = 36
+
+# 没有可完整内联的条目时，至少需要这么多个部分条目（每个只有约8位校验，条目太少时
+# hashcat会停在误报上，错误密码还会被写入结果库）
+PKZIP_MIN_PARTIAL_ENTRIES = 5
+
+
+def _u16(buf, pos):
+    return struct.unpack_from("<H", buf, pos)[0]
+
+
+def _u32(buf, pos):
+    return struct.unpack_from("<I", buf, pos)[0]
+
+
+def _u64(buf, pos):
+    return struct.unpack_from("<Q", buf, pos)[0]
+
+
+def _hex(data):
+    return binascii.hexlify(data).decode("ascii")
+
+
+def _find_zip_eocd(mm):
+    """从文件尾部查找EOCD记录
+
+    Returns:
+        int: EOCD偏移，未找到时返回-1
+    """
+    size = len(mm)
+    start = max(0, size - ZIP_EOCD_SEARCH)
+    end = size
+    while True:
+        pos = mm.rfind(ZIP_EOCD_SIG, start, end)
+        if pos < 0:
+            return -1
+        # 注释长度必须与剩余字节吻合，否则是注释或数据中恰好出现的签名
+        if pos + 22 <= size and pos + 22 + _u16(mm, pos + 20) <= size:
+            return pos
+        end = pos
+
+
+def _zip_central_directory(mm):
+    """定位中央目录
+
+    Returns:
+        tuple: (中央目录偏移, 条目数)，不是有效ZIP时返回None
+    """
+    eocd = _find_zip_eocd(mm)
+    if eocd < 0:
+        return None
+    total = _u16(mm, eocd + 10)
+    cd_offset = _u32(mm, eocd + 16)
+    if total == 0xFFFF or cd_offset == 0xFFFFFFFF:
+        # ZIP64：EOCD前紧挨着ZIP64定位记录
+        locator = eocd - 20
+        if locator < 0 or mm[locator:locator + 4] != ZIP64_LOCATOR_SIG:
+            return None
+        eocd64 = _u64(mm, locator + 8)
+        if eocd64 + 56 > len(mm) or mm[eocd64:eocd64 + 4] != ZIP64_EOCD_SIG:
+            return None
+        total = _u64(mm, eocd64 + 32)
+        cd_offset = _u64(mm, eocd64 + 48)
+    if cd_offset >= len(mm):
+        return None
+    return cd_offset, total
+
+
+def _parse_zip_extra(extra, entry):
+    """解析中央目录扩展字段：ZIP64大小/偏移和WinZip AES信息"""
+    pos = 0
+    while pos + 4 <= len(extra):
+        tag = _u16(extra, pos)
+        size = _u16(extra, pos + 2)
+        body = extra[pos + 4:pos + 4 + size]
+        if tag == ZIP_EXTRA_ZIP64:
+            # 只包含原字段为0xFFFFFFFF的值，顺序固定
+            field = 0
+            for key in ("file_size", "compress_size", "header_offset"):
+                if entry[key] == 0xFFFFFFFF and field + 8 <= len(body):
+                    entry[key] = _u64(body, field)
+                    field += 8
+        elif tag == ZIP_EXTRA_AES and size >= 7:
+            entry["aes_strength"] = body[4]
+            entry["aes_method"] = _u16(body, 5)
+        pos += 4 + size
+
+
+def read_zip_entries(mm):
+    """遍历中央目录，返回全部条目信息
+
+    Args:
+        mm (mmap.mmap): 映射的ZIP文件
+
+    Returns:
+        list: 条目字典列表，不是有效ZIP时返回空列表
+    """
+    located = _zip_central_directory(mm)
+    if not located:
+        return []
+    pos, total = located
+    size = len(mm)
+    entries = []
+    for _ in range(total):
+        if pos + 46 > size or mm[pos:pos + 4] != ZIP_CENTRAL_SIG:
+            break
+        name_len = _u16(mm, pos + 28)
+        extra_len = _u16(mm, pos + 30)
+        comment_len = _u16(mm, pos + 32)
+        entry = {
+            "flags": _u16(mm, pos + 8),
+            "method": _u16(mm, pos + 10),
+            "mod_time": _u16(mm, pos + 12),
+            "crc": _u32(mm, pos + 16),
+            "compress_size": _u32(mm, pos + 20),
+            "file_size": _u32(mm, pos + 24),
+            "header_offset": _u32(mm, pos + 42),
+            "name": mm[pos + 46:pos + 46 + name_len].decode("utf-8", errors="replace"),
+        }
+        _parse_zip_extra(mm[pos + 46 + name_len:pos + 46 + name_len + extra_len], entry)
+        entries.append(entry)
+        pos += 46 + name_len + extra_len + comment_len
+    return entries
+
+
+def _zip_data_offset(mm, entry):
+    """读取本地文件头，返回条目数据的起始偏移，数据越界时返回None"""
+    offset = entry["header_offset"]
+    if offset + 30 > len(mm) or mm[offset:offset + 4] != ZIP_LOCAL_SIG:
+        return None
+    start = offset + 30 + _u16(mm, offset + 26) + _u16(mm, offset + 28)
+    if start + entry["compress_size"] > len(mm):
+        return None
+    return start
+
+
+def _is_zip_crypto_entry(entry):
+    """传统PKZIP加密（ZipCrypto）的非目录条目"""
+    return (entry["flags"] & 0x1 and not entry["flags"] & 0x40
+            and entry["method"] != ZIP_METHOD_AES
+            and entry["compress_size"] >= 12 and not entry["name"].endswith("/"))
+
+
+def _is_zip_aes_entry(entry):
+    """WinZip AES加密的非目录条目"""
+    return (entry["flags"] & 0x1 and entry["method"] == ZIP_METHOD_AES
+            and entry.get("aes_strength") in ZIP_AES_SALT_LEN
+            and entry["compress_size"] >= ZIP_AES_SALT_LEN[entry["aes_strength"]] + 2 + 10
+            and not entry["name"].endswith("/"))
+
+
+def _pkzip2_full_fields(mm, entry, data_offset):
+    """生成完整数据(DT=2)条目的 $pkzip2$ 字段"""
+    csize = entry["compress_size"]
+    data = mm[data_offset:data_offset + csize]
+    return "2*0*%x*%x*%08x*%x*%x*%x*%x*%04x*%04x*%s" % (
+        csize, entry["file_size"], entry["crc"],
+        entry["header_offset"], data_offset - entry["header_offset"],
+        entry["method"], csize, entry["crc"] >> 16, entry["mod_time"], _hex(data))
+
+
+def _pkzip2_partial_fields(mm, entry, data_offset):
+    """生成部分数据(DT=1)条目的 $pkzip2$ 字段，只包含加密头和开头少量数据"""
+    length = min(entry["compress_size"], PKZIP_PARTIAL_BYTES)
+    data = mm[data_offset:data_offset + length]
+    return "1*0*%x*%x*%04x*%04x*%s" % (
+        entry["method"], length, entry["crc"] >> 16, entry["mod_time"], _hex(data))
+
+
+def _zip_verify_cost(entry):
+    """完整校验一个条目的代价排序键：数据越小越好，同样大小时存储方式无需解压优先"""
+    return (entry["compress_size"], entry["method"] != ZIP_METHOD_STORED)
+
+
+def _zip_partial_rank(entry):
+    """部分数据条目的排序键：压缩条目可做解压校验、数据足够长的条目能排除更多误报"""
+    return (entry["method"] != ZIP_METHOD_DEFLATE,
+            entry["compress_size"] < PKZIP_PARTIAL_BYTES,
+            entry["compress_size"])
+
+
+def select_zip_entries(entries):
+    """按校验代价选择用于构造 $pkzip2$ 哈希的条目
+
+    选一个完整校验代价最低的条目内联全部数据(DT=2)，再加入最多7个只含
+    加密头的部分条目(DT=1)用于减少误报；没有能完整内联的条目时，
+    全部使用部分条目（仅压缩条目，对应hashcat -m 17230），不足
+    PKZIP_MIN_PARTIAL_ENTRIES 个时放弃，交给其他提取方式。
+
+    Args:
+        entries (list): read_zip_entries 返回的条目列表
+
+    Returns:
+        tuple: (完整条目或None, 部分条目列表)
+    """
+    candidates = [e for e in entries if _is_zip_crypto_entry(e)]
+    full_candidates = sorted((e for e in candidates if e["compress_size"] <= PKZIP_MAX_DATA),
+                             key=_zip_verify_cost)
+    full = full_candidates[0] if full_candidates else None
+    rest = [e for e in candidates if e is not full]
+    if full is None:
+        rest = [e for e in rest if e["method"] == ZIP_METHOD_DEFLATE]
+        if len(rest) < PKZIP_MIN_PARTIAL_ENTRIES:
+            return None, []
+    partials = sorted(rest, key=_zip_partial_rank)[:PKZIP_MAX_ENTRIES - (1 if full else 0)]
+    return full, partials
+
+
+def _pkzip2_hash(fields):
+    """把若干条目字段组合成 $pkzip2$ 哈希（校验字节数B=1，兼容置位数据描述符标志的条目）"""
+    return "$pkzip2$%d*1*%s*$/pkzip2$" % (len(fields), "*".join(fields))
+
+
+def _zip2_hash(mm, entry, data_offset):
+    """生成WinZip AES条目的 $zip2$ 哈希"""
+    salt_len = ZIP_AES_SALT_LEN[entry["aes_strength"]]
+    data = mm[data_offset:data_offset + entry["compress_size"]]
+    salt = data[:salt_len]
+    verifier = data[salt_len:salt_len + 2]
+    payload = data[salt_len + 2:-10]
+    auth = data[-10:]
+    return "$zip2$*0*%d*0*%s*%s*%x*%s*%s*$/zip2$" % (
+        entry["aes_strength"], _hex(salt), _hex(verifier), len(payload), _hex(payload), _hex(auth))
+
+
+def extract_zip_hash(file_path):
+    """直接解析ZIP文件生成hashcat哈希
+
+    通过mmap定位EOCD并遍历中央目录，只读取选中条目的本地文件头和数据，
+    不需要zip2john，也不会读取整个压缩包。ZipCrypto优先于AES（破解速度快得多），
+    条目选择见 select_zip_entries；AES只取数据最小的一个条目。
+
+    Args:
+        file_path (str): ZIP文件路径
+
+    Returns:
+        str: $pkzip2$ 或 $zip2$ 哈希，没有可用的加密条目时返回None
+    """
+    with open(file_path, "rb") as f:
+        if os.fstat(f.fileno()).st_size < 22:
+            return None
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            entries = read_zip_entries(mm)
+            # 本地文件头损坏的条目直接排除
+            offsets = {}
+            for entry in entries:
+                if entry["flags"] & 0x1:
+                    offsets[id(entry)] = _zip_data_offset(mm, entry)
+            entries = [e for e in entries if offsets.get(id(e)) is not None]
+            
+            full, partials = select_zip_entries(entries)
+            fields = []
+            if full is not None:
+                fields.append(_pkzip2_full_fields(mm, full, offsets[id(full)]))
+            for entry in partials:
+                fields.append(_pkzip2_partial_fields(mm, entry, offsets[id(entry)]))
+            if fields:
+                return _pkzip2_hash(fields)
+            
+            aes = sorted((e for e in entries if _is_zip_aes_entry(e) and e["compress_size"] <= ZIP2_MAX_DATA),
+                         key=_zip_verify_cost)
+            if aes:
+                return _zip2_hash(mm, aes[0], offsets[id(aes[0])])
+    return None
+
+
+# ---------------------------------------------------------------- RAR
+
+RAR_SIG_PREFIX = b"Rar!\x1a\x07"
+RAR3_SIG = b"Rar!\x1a\x07\x00"
+RAR5_SIG = b"Rar!\x1a\x07\x01\x00"
+
+# 自解压(SFX)文件中查找RAR签名的范围
+RAR_SFX_SEARCH = 1024 * 1024
+
+# 单个RAR5头的最大长度（格式规定为2MB）
+RAR5_MAX_HEADER = 2 * 1024 * 1024
+
+RAR5_HEAD_FILE = 2
+RAR5_HEAD_SERVICE = 3
+RAR5_HEAD_CRYPT = 4
+RAR5_HEAD_END = 5
+RAR5_EXTRA_CRYPT = 0x01
+
+RAR3_HEAD_MAIN = 0x73
+RAR3_HEAD_FILE = 0x74
+RAR3_HEAD_END = 0x7B
+
+# 文件头标志：固实（依赖前面文件的解压状态）；压缩方法：存储
+RAR3_FILE_SOLID = 0x10
+RAR3_METHOD_STORE = 0x30
+
+# RAR3-p哈希内联的文件数据上限
+RAR3_MAX_DATA = 320 * 1024
+
+
+def read_vint(f):
+    """读取RAR5中的可变长整数（每字节低7位为数据，最高位为继续标志）
+
+    Args:
+        f: 文件对象
+
+    Returns:
+        int: 可变长整数值
+    """
+    value = 0
+    for shift in range(0, 70, 7):
+        b = f.read(1)
+        if not b:
+            raise ValueError("RAR5可变长整数越界")
+        value |= (b[0] & 0x7F) << shift
+        if not b[0] & 0x80:
+            return value
+    raise ValueError("RAR5可变长整数过长")
+
+
+def _find_rar_signature(f):
+    """查找RAR签名（兼容自解压文件）
+
+    Returns:
+        tuple: (签名偏移, 版本3或5)，不是RAR文件时返回None
+    """
+    f.seek(0)
+    head = f.read(RAR_SFX_SEARCH)
+    pos = head.find(RAR_SIG_PREFIX)
+    while pos >= 0:
+        if head[pos:pos + 8] == RAR5_SIG:
+            return pos, 5
+        if head[pos:pos + 7] == RAR3_SIG:
+            return pos, 3
+        pos = head.find(RAR_SIG_PREFIX, pos + 1)
+    return None
+
+
+def _rar5_hash(salt, lg2_count, iv, check):
+    """生成hashcat -m 13000 的 $rar5$ 哈希，口令校验值的校验和不匹配时返回None"""
+    pswcheck, checksum = check[:8], check[8:12]
+    if len(checksum) == 4 and hashlib.sha256(pswcheck).digest()[:4] != checksum:
+        return None
+    return "$rar5$16$%s$%d$%s$8$%s" % (_hex(salt), lg2_count, _hex(iv), _hex(pswcheck))
+
+
+def _rar5_crypt_record(extra):
+    """在RAR5文件头扩展区中查找加密记录
+
+    Returns:
+        io.BytesIO: 定位到加密记录内容的缓冲区，没有加密记录时返回None
+    """
+    buf = io.BytesIO(extra)
+    while buf.tell() < len(extra):
+        record_size = read_vint(buf)
+        record_end = buf.tell() + record_size
+        if record_size <= 0 or record_end > len(extra):
+            return None
+        if read_vint(buf) == RAR5_EXTRA_CRYPT:
+            return buf
+        buf.seek(record_end)
+    return None
+
+
+def _rar5_file_crypt(extra):
+    """在RAR5文件头扩展区中查找加密记录并生成哈希"""
+    buf = _rar5_crypt_record(extra)
+    if buf is None:
+        return None
+    read_vint(buf)  # 加密算法版本，0为AES-256
+    flags = read_vint(buf)
+    lg2_count = buf.read(1)[0]
+    salt = buf.read(16)
+    iv = buf.read(16)
+    if flags & 0x01:
+        return _rar5_hash(salt, lg2_count, iv, buf.read(12))
+    return None
+
+
+def _iter_rar5_headers(f, offset, max_headers=None):
+    """逐个遍历RAR5头块，只读取头部字节，跳过所有数据区
+
+    产出后文件位置停在头块之后、数据区之前（头部加密时紧跟IV）。
+
+    Yields:
+        tuple: (头类型, 头部字节, 头部剩余部分的缓冲区, 扩展区长度)
+    """
+    f.seek(offset + len(RAR5_SIG))
+    count = 0
+    while max_headers is None or count < max_headers:
+        count += 1
+        if len(f.read(4)) < 4:  # 头部CRC32
+            return
+        size = read_vint(f)
+        if size <= 0 or size > RAR5_MAX_HEADER:
+            return
+        header = f.read(size)
+        if len(header) < size:
+            return
+        buf = io.BytesIO(header)
+        head_type = read_vint(buf)
+        head_flags = read_vint(buf)
+        extra_size = read_vint(buf) if head_flags & 0x01 else 0
+        data_size = read_vint(buf) if head_flags & 0x02 else 0
+        yield head_type, header, buf, extra_size
+        if head_type == RAR5_HEAD_END:
+            return
+        f.seek(data_size, os.SEEK_CUR)
+
+
+def _extract_rar5(f, offset):
+    """遍历RAR5头块：头部加密(-hp)时取加密头，否则取第一个带口令校验值的文件加密记录"""
+    for head_type, header, buf, extra_size in _iter_rar5_headers(f, offset):
+        if head_type == RAR5_HEAD_CRYPT:
+            # 头部加密(-hp)：之后每个头块前都有16字节IV，取紧跟的第一个IV
+            read_vint(buf)  # 加密算法版本
+            flags = read_vint(buf)
+            lg2_count = buf.read(1)[0]
+            salt = buf.read(16)
+            if not flags & 0x01:
+                return None
+            check = buf.read(12)
+            iv = f.read(16)
+            if len(iv) < 16:
+                return None
+            return _rar5_hash(salt, lg2_count, iv, check)
+        if head_type in (RAR5_HEAD_FILE, RAR5_HEAD_SERVICE) and extra_size:
+            found = _rar5_file_crypt(header[len(header) - extra_size:])
+            if found:
+                return found
+    return None
+
+
+def _extract_rar3(f, offset):
+    """遍历RAR3块：头部加密(-hp)时取盐和首个加密块，否则取数据最小的加密文件
+
+    固实压缩包中带固实标志的压缩文件依赖前面文件的解压状态，单独解压后CRC永远不符，
+    不能用来生成哈希（存储方式的文件不受影响）。
+    """
+    f.seek(0, os.SEEK_END)
+    file_size = f.tell()
+    pos = offset + len(RAR3_SIG)
+    best = None
+    while pos + 7 <= file_size:
+        f.seek(pos)
+        header = f.read(7)
+        if len(header) < 7:
+            return None
+        _, head_type, flags, head_size = struct.unpack("<HBHH", header)
+        if head_size < 7:
+            return None
+        header += f.read(head_size - 7)
+        if len(header) < head_size:
+            return None
+        add_size = _u32(header, 7) if flags & 0x8000 and head_size >= 11 else 0
+        if head_type == RAR3_HEAD_MAIN and flags & 0x0080:
+            f.seek(pos + head_size)
+            salt = f.read(8)
+            data = f.read(16)
+            if len(salt) < 8 or len(data) < 16:
+                return None
+            return "$RAR3$*0*%s*%s" % (_hex(salt), _hex(data))
+        if head_type == RAR3_HEAD_FILE and head_size >= 32:
+            pack_size, unp_size = _u32(header, 7), _u32(header, 11)
+            crc = _u32(header, 16)
+            method = header[25]
+            name_size = _u16(header, 26)
+            name_pos = 32
+            if flags & 0x0100:
+                pack_size |= _u32(header, 32) << 32
+                unp_size |= _u32(header, 36) << 32
+                name_pos += 8
+            add_size = pack_size
+            # 加密、带盐、未跨卷的文件才能生成完整数据哈希
+            solid = flags & RAR3_FILE_SOLID and method != RAR3_METHOD_STORE
+            if flags & 0x04 and flags & 0x0400 and not flags & 0x03 and not solid and 0 < pack_size <= RAR3_MAX_DATA:
+                salt = header[name_pos + name_size:name_pos + name_size + 8]
+                if len(salt) == 8 and (best is None or pack_size < best[0]):
+                    best = (pack_size, unp_size, crc, method, salt, pos + head_size)
+        if head_type == RAR3_HEAD_END:
+            break
+        pos += head_size + add_size
+    if best is None:
+        return None
+    pack_size, unp_size, crc, method, salt, data_offset = best
+    f.seek(data_offset)
+    data = f.read(pack_size)
+    if len(data) < pack_size:
+        return None
+    return "$RAR3$*1*%s*%08x*%d*%d*1*%s*%x" % (_hex(salt), crc, pack_size, unp_size, _hex(data), method)
+
+
+def extract_rar_hash(file_path):
+    """直接解析RAR文件头生成hashcat哈希
+
+    RAR5: 头部加密(-hp)取加密头中的盐/迭代次数/口令校验值，否则取文件头扩展区的加密记录，
+    生成 $rar5$；RAR3: 头部加密生成 $RAR3$*0*，文件加密取数据最小的文件生成 $RAR3$*1*。
+
+    Args:
+        file_path (str): RAR文件路径
+
+    Returns:
+        str: 哈希值，未加密或无法生成时返回None
+    """
+    with open(file_path, "rb") as f:
+        found = _find_rar_signature(f)
+        if not found:
+            return None
+        offset, version = found
+        if version == 5:
+            return _extract_rar5(f, offset)
+        return _extract_rar3(f, offset)
+
+
+# ---------------------------------------------------------------- 7z
+
+SEVENZIP_SIG = b"7z\xbc\xaf\x27\x1c"
+
+# 头部属性ID
+SEVENZIP_END = 0x00
+SEVENZIP_HEADER = 0x01
+SEVENZIP_ARCHIVE_PROPERTIES = 0x02
+SEVENZIP_ADDITIONAL_STREAMS = 0x03
+SEVENZIP_MAIN_STREAMS = 0x04
+SEVENZIP_PACK_INFO = 0x06
+SEVENZIP_UNPACK_INFO = 0x07
+SEVENZIP_SUBSTREAMS_INFO = 0x08
+SEVENZIP_SIZE = 0x09
+SEVENZIP_CRC = 0x0A
+SEVENZIP_FOLDER = 0x0B
+SEVENZIP_CODERS_UNPACK_SIZE = 0x0C
+SEVENZIP_NUM_UNPACK_STREAM = 0x0D
+SEVENZIP_ENCODED_HEADER = 0x17
+
+SEVENZIP_CODER_AES = b"\x06\xf1\x07\x01"
+SEVENZIP_CODER_COPY = b"\x00"
+SEVENZIP_CODER_LZMA = b"\x03\x01\x01"
+SEVENZIP_CODER_LZMA2 = b"\x21"
+
+# $7z$ 数据类型：0不压缩，1 LZMA，2 LZMA2，128 截断数据（只做AES填充校验）
+SEVENZIP_DATA_TYPES = {SEVENZIP_CODER_COPY: 0, SEVENZIP_CODER_LZMA: 1, SEVENZIP_CODER_LZMA2: 2}
+SEVENZIP_TRUNCATED = 128
+
+# 内联完整数据的上限，超过时改用截断数据，避免读取整个数据流
+SEVENZIP_MAX_DATA = 64 * 1024
+
+# 头部最大长度，防止损坏文件导致读取大量数据
+SEVENZIP_MAX_HEADER = 64 * 1024 * 1024
+
+
+class _SevenZipReader:
+    """7z头部字节流读取器"""
+
+    def __init__(self, data):
+        self.data = data
+        self.pos = 0
+
+    def byte(self):
+        if self.pos >= len(self.data):
+            raise ValueError("7z头部数据越界")
+        value = self.data[self.pos]
+        self.pos += 1
+        return value
+
+    def read(self, size):
+        if self.pos + size > len(self.data):
+            raise ValueError("7z头部数据越界")
+        value = self.data[self.pos:self.pos + size]
+        self.pos += size
+        return value
+
+    def number(self):
+        """读取7z的NUMBER：首字节高位连续1的个数为后续字节数"""
+        first = self.byte()
+        mask = 0x80
+        value = 0
+        for i in range(8):
+            if not first & mask:
+                return value | ((first & (mask - 1)) << (8 * i))
+            value |= self.byte() << (8 * i)
+            mask >>= 1
+        return value
+
+    def bits(self, count):
+        """读取位图（高位在前）"""
+        result = []
+        mask = 0
+        value = 0
+        for _ in range(count):
+            if mask == 0:
+                value = self.byte()
+                mask = 0x80
+            result.append(bool(value & mask))
+            mask >>= 1
+        return result
+
+    def digests(self, count):
+        """读取CRC列表，未定义的项为None"""
+        defined = [True] * count if self.byte() else self.bits(count)
+        return [struct.unpack("<I", self.read(4))[0] if d else None for d in defined]
+
+    def skip_property(self):
+        self.read(self.number())
+
+
+def _read_7z_folder(reader):
+    """读取一个folder的编码器列表和绑定关系"""
+    coders = []
+    total_in = total_out = 0
+    for _ in range(reader.number()):
+        flag = reader.byte()
+        coder = {"id": reader.read(flag & 0x0F), "num_in": 1, "num_out": 1, "props": b""}
+        if flag & 0x10:
+            coder["num_in"] = reader.number()
+            coder["num_out"] = reader.number()
+        if flag & 0x20:
+            coder["props"] = reader.read(reader.number())
+        if flag & 0x80:
+            raise ValueError("不支持7z备用编码器")
+        coders.append(coder)
+        total_in += coder["num_in"]
+        total_out += coder["num_out"]
+    bind_pairs = [(reader.number(), reader.number()) for _ in range(total_out - 1)]
+    num_packed = total_in - len(bind_pairs)
+    if num_packed == 1:
+        bound_in = {pair[0] for pair in bind_pairs}
+        packed = [i for i in range(total_in) if i not in bound_in]
+    else:
+        packed = [reader.number() for _ in range(num_packed)]
+    return {"coders": coders, "bind_pairs": bind_pairs, "packed": packed,
+            "num_out": total_out, "unpack_sizes": [], "crc": None}
+
+
+def _read_7z_streams_info(reader):
+    """读取StreamsInfo：打包流、folder和子流信息"""
+    info = {"pack_pos": 0, "pack_sizes": [], "folders": [], "substreams": None}
+    while True:
+        prop = reader.byte()
+        if prop == SEVENZIP_END:
+            return info
+        if prop == SEVENZIP_PACK_INFO:
+            info["pack_pos"] = reader.number()
+            count = reader.number()
+            while True:
+                sub = reader.byte()
+                if sub == SEVENZIP_END:
+                    break
+                if sub == SEVENZIP_SIZE:
+                    info["pack_sizes"] = [reader.number() for _ in range(count)]
+                elif sub == SEVENZIP_CRC:
+                    reader.digests(count)
+                else:
+                    reader.skip_property()
+        elif prop == SEVENZIP_UNPACK_INFO:
+            if reader.byte() != SEVENZIP_FOLDER:
+                raise ValueError("7z UnpackInfo格式错误")
+            count = reader.number()
+            if reader.byte():
+                raise ValueError("不支持外部引用的7z folder")
+            folders = [_read_7z_folder(reader) for _ in range(count)]
+            if reader.byte() != SEVENZIP_CODERS_UNPACK_SIZE:
+                raise ValueError("7z UnpackInfo缺少解包大小")
+            for folder in folders:
+                folder["unpack_sizes"] = [reader.number() for _ in range(folder["num_out"])]
+            while True:
+                sub = reader.byte()
+                if sub == SEVENZIP_END:
+                    break
+                if sub == SEVENZIP_CRC:
+                    for folder, crc in zip(folders, reader.digests(count)):
+                        folder["crc"] = crc
+                else:
+                    reader.skip_property()
+            info["folders"] = folders
+        elif prop == SEVENZIP_SUBSTREAMS_INFO:
+            info["substreams"] = _read_7z_substreams(reader, info["folders"])
+        else:
+            raise ValueError(f"未知的7z属性: {prop:#x}")
+
+
+def _read_7z_substreams(reader, folders):
+    """读取每个folder内各文件的大小和CRC
+
+    Returns:
+        list: 每个folder的 [(大小, CRC或None), ...]
+    """
+    counts = [1] * len(folders)
+    sizes = [[] for _ in folders]
+    prop = reader.byte()
+    if prop == SEVENZIP_NUM_UNPACK_STREAM:
+        counts = [reader.number() for _ in folders]
+        prop = reader.byte()
+    if prop == SEVENZIP_SIZE:
+        for i, folder in enumerate(folders):
+            if counts[i]:
+                sizes[i] = [reader.number() for _ in range(counts[i] - 1)]
+        prop = reader.byte()
+    for i, folder in enumerate(folders):
+        if counts[i]:
+            total = _7z_folder_unpack_size(folder)
+            sizes[i].append(total - sum(sizes[i]))
+    crcs = [[None] * c for c in counts]
+    # folder只有一个文件且folder已有CRC时，文件CRC即folder的CRC
+    pending = []
+    for i, folder in enumerate(folders):
+        if counts[i] == 1 and folder["crc"] is not None:
+            crcs[i][0] = folder["crc"]
+        else:
+            pending.extend((i, j) for j in range(counts[i]))
+    while prop != SEVENZIP_END:
+        if prop == SEVENZIP_CRC:
+            for (i, j), crc in zip(pending, reader.digests(len(pending))):
+                crcs[i][j] = crc
+        else:
+            reader.skip_property()
+        prop = reader.byte()
+    return [list(zip(sizes[i], crcs[i])) for i in range(len(folders))]
+
+
+def _7z_folder_unpack_size(folder):
+    """folder最终输出流（未被绑定的输出流）的大小"""
+    bound_out = {pair[1] for pair in folder["bind_pairs"]}
+    for index, size in enumerate(folder["unpack_sizes"]):
+        if index not in bound_out:
+            return size
+    return 0
+
+
+def _7z_aes_coder(folder):
+    """查找folder中的AES编码器
+
+    Returns:
+        tuple: (编码器序号, 该编码器输出流序号)，没有AES时返回None
+    """
+    out_index = 0
+    for index, coder in enumerate(folder["coders"]):
+        if coder["id"] == SEVENZIP_CODER_AES:
+            return index, out_index
+        out_index += coder["num_out"]
+    return None
+
+
+def _7z_aes_props(props):
+    """解析AES编码器属性：迭代次数指数、盐、IV"""
+    if not props:
+        raise ValueError("7z AES属性为空")
+    cycles = props[0] & 0x3F
+    if not props[0] & 0xC0:
+        return cycles, b"", b""
+    salt_size = ((props[0] >> 7) & 1) + (props[1] >> 4)
+    iv_size = ((props[0] >> 6) & 1) + (props[1] & 0x0F)
+    salt = props[2:2 + salt_size]
+    iv = props[2 + salt_size:2 + salt_size + iv_size]
+    return cycles, salt, iv
+
+
+def _7z_folder_hash(f, info, folder_index, files):
+    """为一个AES加密的folder生成 $7z$ 哈希
+
+    Args:
+        f: 文件对象
+        info (dict): StreamsInfo
+        folder_index (int): folder序号
+        files (list): 该folder内的 [(大小, CRC)]，未知时为None
+
+    Returns:
+        str: 哈希值，无法生成时返回None
+    """
+    folder = info["folders"][folder_index]
+    aes = _7z_aes_coder(folder)
+    if aes is None or len(folder["packed"]) != 1:
+        return None
+    aes_index, aes_out = aes
+    cycles, salt, iv = _7z_aes_props(folder["coders"][aes_index]["props"])
+    aes_unpack = folder["unpack_sizes"][aes_out]
+    unpack_size = _7z_folder_unpack_size(folder)
+
+    pack_index = sum(len(info["folders"][i]["packed"]) for i in range(folder_index))
+    if pack_index >= len(info["pack_sizes"]):
+        return None
+    pack_size = info["pack_sizes"][pack_index]
+    pack_offset = 32 + info["pack_pos"] + sum(info["pack_sizes"][:pack_index])
+
+    # 确定CRC：优先用folder的CRC，否则用第一个文件的CRC
+    crc, crc_len = folder["crc"], unpack_size
+    if crc is None and files and files[0][1] is not None:
+        crc_len, crc = files[0]
+
+    others = [c for i, c in enumerate(folder["coders"]) if i != aes_index]
+    data_type = None
+    if len(others) == 0:
+        data_type = 0
+    elif len(others) == 1:
+        data_type = SEVENZIP_DATA_TYPES.get(others[0]["id"])
+    if data_type == 0 and crc_len != unpack_size:
+        data_type = None
+
+    prefix = "$7z$%%d$%d$%d$%s$%d$%s" % (cycles, len(salt), _hex(salt), len(iv), _hex(iv.ljust(16, b"\0")))
+    if data_type is not None and crc is not None and pack_size <= SEVENZIP_MAX_DATA:
+        f.seek(pack_offset)
+        data = f.read(pack_size)
+        if len(data) < pack_size:
+            return None
+        hash_line = (prefix % data_type) + "$%d$%d$%d$%s" % (crc, pack_size, unpack_size, _hex(data))
+        if data_type:
+            hash_line += "$%d$%s" % (crc_len, _hex(others[0]["props"]))
+        return hash_line
+    if aes_unpack % 16 and pack_size >= 32:
+        # 明文长度不是16的倍数时末块有零填充，只需最后两个密文块即可校验密码
+        f.seek(pack_offset + pack_size - 32)
+        data = f.read(32)
+        if len(data) < 32:
+            return None
+        return (prefix % SEVENZIP_TRUNCATED) + "$%d$%d$%d$%s" % (crc or 0, len(data), aes_unpack, _hex(data))
+    return None
+
+
+def _7z_decode_header(f, info):
+    """解压未加密的编码头（LZMA/LZMA2），返回原始头部字节"""
+    import lzma
+    folder = info["folders"][0]
+    if len(folder["coders"]) != 1 or len(info["pack_sizes"]) != 1:
+        return None
+    coder = folder["coders"][0]
+    props = coder["props"]
+    if coder["id"] == SEVENZIP_CODER_LZMA and len(props) >= 5:
+        lc_lp_pb = props[0]
+        filters = [{"id": lzma.FILTER_LZMA1, "dict_size": _u32(props, 1),
+                    "lc": lc_lp_pb % 9, "lp": (lc_lp_pb // 9) % 5, "pb": lc_lp_pb // 45}]
+    elif coder["id"] == SEVENZIP_CODER_LZMA2 and props:
+        bits = props[0] & 0x3F
+        dict_size = 0xFFFFFFFF if bits == 40 else (2 | (bits & 1)) << (bits // 2 + 11)
+        filters = [{"id": lzma.FILTER_LZMA2, "dict_size": dict_size}]
+    elif coder["id"] == SEVENZIP_CODER_COPY:
+        filters = None
+    else:
+        return None
+    pack_size = info["pack_sizes"][0]
+    if pack_size > SEVENZIP_MAX_HEADER:
+        return None
+    f.seek(32 + info["pack_pos"])
+    packed = f.read(pack_size)
+    unpack_size = _7z_folder_unpack_size(folder)
+    if filters is None:
+        return packed[:unpack_size]
+    decompressor = lzma.LZMADecompressor(format=lzma.FORMAT_RAW, filters=filters)
+    return decompressor.decompress(packed, max_length=unpack_size)
+
+
+def _7z_main_streams(header):
+    """从原始头部中读取MainStreamsInfo"""
+    reader = _SevenZipReader(header)
+    if reader.byte() != SEVENZIP_HEADER:
+        return None
+    prop = reader.byte()
+    if prop == SEVENZIP_ARCHIVE_PROPERTIES:
+        while reader.byte() != SEVENZIP_END:
+            reader.skip_property()
+        prop = reader.byte()
+    if prop == SEVENZIP_ADDITIONAL_STREAMS:
+        _read_7z_streams_info(reader)
+        prop = reader.byte()
+    if prop == SEVENZIP_MAIN_STREAMS:
+        return _read_7z_streams_info(reader)
+    return None
+
+
+def _7z_streams_hash(f, info):
+    """在StreamsInfo中选择数据最小的AES folder生成哈希"""
+    substreams = info["substreams"] or [None] * len(info["folders"])
+    candidates = []
+    pack_index = 0
+    for index, folder in enumerate(info["folders"]):
+        if _7z_aes_coder(folder) is not None and pack_index < len(info["pack_sizes"]):
+            candidates.append((info["pack_sizes"][pack_index], index))
+        pack_index += len(folder["packed"])
+    for _, index in sorted(candidates):
+        hash_line = _7z_folder_hash(f, info, index, substreams[index])
+        if hash_line:
+            return hash_line
+    return None
+
+
+def extract_7z_hash(file_path):
+    """直接解析7z文件头生成hashcat -m 11600 哈希
+
+    读取签名头后定位到尾部头信息；头部加密(-mhe)时用加密的头部数据流生成哈希，
+    否则解压编码头，取数据最小的加密folder。数据不超过 SEVENZIP_MAX_DATA 时内联完整数据，
+    否则只读取最后两个密文块生成截断哈希（依靠AES零填充校验）。
+
+    Args:
+        file_path (str): 7z文件路径
+
+    Returns:
+        str: $7z$ 哈希，未加密或无法生成时返回None
+    """
+    with open(file_path, "rb") as f:
+        start = f.read(32)
+        if len(start) < 32 or not start.startswith(SEVENZIP_SIG):
+            return None
+        next_offset, next_size = struct.unpack_from("<QQ", start, 12)
+        if next_size == 0 or next_size > SEVENZIP_MAX_HEADER:
+            return None
+        f.seek(32 + next_offset)
+        header = f.read(next_size)
+        if len(header) < next_size:
+            return None
+        if header[0] == SEVENZIP_ENCODED_HEADER:
+            reader = _SevenZipReader(header)
+            reader.byte()
+            info = _read_7z_streams_info(reader)
+            if not info["folders"]:
+                return None
+            if _7z_aes_coder(info["folders"][0]) is not None:
+                return _7z_folder_hash(f, info, 0, None)
+            header = _7z_decode_header(f, info)
+            if not header:
+                return None
+        info = _7z_main_streams(header)
+        if not info or not info["folders"]:
+            return None
+        return _7z_streams_hash(f, info)
+
+
+# ---------------------------------------------------------------- PDF
+
+# 在文件尾部查找startxref的范围
+PDF_TAIL_SEARCH = 64 * 1024
+
+# 增量更新链的最大长度，防止/Prev循环
+PDF_MAX_XREF_SECTIONS = 256
+
+PDF_WHITESPACE = b"\x00\t\n\x0c\r "
+PDF_DELIMITERS = b"()<>[]{}/%"
+PDF_ESCAPES = {ord("n"): b"\n", ord("r"): b"\r", ord("t"): b"\t", ord("b"): b"\b",
+               ord("f"): b"\x0c", ord("("): b"(", ord(")"): b")", ord("\\"): b"\\"}
+
+
+class _PdfRef:
+    """间接引用 N G R"""
+
+    def __init__(self, num, gen):
+        self.num = num
+        self.gen = gen
+
+
+class _PdfParser:
+    """PDF对象解析器，只支持解析字典、数组、字符串等基本对象"""
+
+    def __init__(self, data, pos=0):
+        self.data = data
+        self.pos = pos
+
+    def skip_ws(self):
+        data = self.data
+        while self.pos < len(data):
+            c = data[self.pos]
+            if c in PDF_WHITESPACE:
+                self.pos += 1
+            elif c == 0x25:  # % 注释到行尾
+                while self.pos < len(data) and data[self.pos] not in b"\r\n":
+                    self.pos += 1
+            else:
+                break
+
+    def token(self):
+        """读取一个普通记号（数字、关键字）"""
+        self.skip_ws()
+        start = self.pos
+        while (self.pos < len(self.data) and self.data[self.pos] not in PDF_WHITESPACE
+               and self.data[self.pos] not in PDF_DELIMITERS):
+            self.pos += 1
+        return bytes(self.data[start:self.pos])
+
+    def _literal_string(self):
+        data = self.data
+        self.pos += 1
+        out = bytearray()
+        depth = 1
+        while self.pos < len(data):
+            c = data[self.pos]
+            self.pos += 1
+            if c == 0x5C:  # 反斜杠转义
+                n = data[self.pos]
+                self.pos += 1
+                if n in PDF_ESCAPES:
+                    out += PDF_ESCAPES[n]
+                elif 0x30 <= n <= 0x37:
+                    octal = chr(n)
+                    while len(octal) < 3 and 0x30 <= data[self.pos] <= 0x37:
+                        octal += chr(data[self.pos])
+                        self.pos += 1
+                    out.append(int(octal, 8) & 0xFF)
+                elif n == 0x0D:  # 续行
+                    if data[self.pos] == 0x0A:
+                        self.pos += 1
+                elif n != 0x0A:
+                    out.append(n)
+            elif c == 0x28:
+                depth += 1
+                out.append(c)
+            elif c == 0x29:
+                depth -= 1
+                if depth == 0:
+                    return bytes(out)
+                out.append(c)
+            else:
+                out.append(c)
+        raise ValueError("PDF字符串未结束")
+
+    def _hex_string(self):
+        end = self.data.find(b">", self.pos)
+        if end < 0:
+            raise ValueError("PDF十六进制字符串未结束")
+        digits = bytes(c for c in self.data[self.pos + 1:end] if c not in PDF_WHITESPACE)
+        self.pos = end + 1
+        if len(digits) % 2:
+            digits += b"0"
+        return binascii.unhexlify(digits)
+
+    def parse(self):
+        """解析一个对象：字典返回dict（键不含/），名称返回以/开头的str，引用返回_PdfRef"""
+        self.skip_ws()
+        data = self.data
+        c = data[self.pos:self.pos + 2]
+        if c == b"<<":
+            self.pos += 2
+            result = {}
+            while True:
+                self.skip_ws()
+                if data[self.pos:self.pos + 2] == b">>":
+                    self.pos += 2
+                    return result
+                key = self.parse()
+                if not isinstance(key, str) or not key.startswith("/"):
+                    raise ValueError("PDF字典键不是名称")
+                result[key[1:]] = self.parse()
+        if c[:1] == b"[":
+            self.pos += 1
+            result = []
+            while True:
+                self.skip_ws()
+                if data[self.pos:self.pos + 1] == b"]":
+                    self.pos += 1
+                    return result
+                result.append(self.parse())
+        if c[:1] == b"(":
+            return self._literal_string()
+        if c[:1] == b"<":
+            return self._hex_string()
+        if c[:1] == b"/":
+            self.pos += 1
+            return "/" + self.token().decode("latin-1")
+        word = self.token()
+        if not word:
+            raise ValueError("PDF对象解析失败")
+        if word == b"true":
+            return True
+        if word == b"false":
+            return False
+        if word == b"null":
+            return None
+        try:
+            number = int(word)
+        except ValueError:
+            try:
+                return float(word)
+            except ValueError:
+                return word.decode("latin-1")
+        # 向后看是否为 "N G R" 形式的间接引用
+        saved = self.pos
+        gen = self.token()
+        if gen.isdigit() and self.token() == b"R":
+            return _PdfRef(number, int(gen))
+        self.pos = saved
+        return number
+
+
+def _pdf_indirect_object(mm, offset):
+    """解析 offset 处的 "N G obj" 对象
+
+    Returns:
+        tuple: (对象, 解析器)，解析器停在对象之后
+    """
+    parser = _PdfParser(mm, offset)
+    parser.token()
+    parser.token()
+    if parser.token() != b"obj":
+        raise ValueError("PDF对象头格式错误")
+    return parser.parse(), parser
+
+
+def _pdf_stream_data(mm, parser, stream_dict):
+    """读取紧跟在字典后的stream数据并按需解压（仅支持FlateDecode）"""
+    parser.skip_ws()
+    if mm[parser.pos:parser.pos + 6] != b"stream":
+        raise ValueError("PDF缺少stream")
+    start = parser.pos + 6
+    if mm[start:start + 2] == b"\r\n":
+        start += 2
+    elif mm[start:start + 1] in (b"\n", b"\r"):
+        start += 1
+    length = stream_dict.get("Length")
+    if not isinstance(length, int):
+        length = mm.find(b"endstream", start) - start
+    raw = mm[start:start + length]
+    filters = stream_dict.get("Filter")
+    filters = filters if isinstance(filters, list) else ([filters] if filters else [])
+    for name in filters:
+        if name != "/FlateDecode":
+            raise ValueError(f"不支持的PDF流过滤器: {name}")
+        raw = zlib.decompress(raw)
+    params = stream_dict.get("DecodeParms")
+    if isinstance(params, list):
+        params = params[0] if params else None
+    if isinstance(params, dict) and params.get("Predictor", 1) >= 10:
+        raw = _pdf_png_unpredict(raw, params.get("Columns", 1))
+    return raw
+
+
+def _pdf_png_unpredict(data, columns):
+    """还原PNG预测编码（每行首字节为过滤类型）"""
+    out = bytearray()
+    prev = bytearray(columns)
+    for row_start in range(0, len(data) - columns, columns + 1):
+        kind = data[row_start]
+        row = bytearray(data[row_start + 1:row_start + 1 + columns])
+        for i in range(len(row)):
+            left = row[i - 1] if i else 0
+            up = prev[i]
+            if kind == 1:
+                row[i] = (row[i] + left) & 0xFF
+            elif kind == 2:
+                row[i] = (row[i] + up) & 0xFF
+            elif kind == 3:
+                row[i] = (row[i] + ((left + up) >> 1)) & 0xFF
+            elif kind == 4:
+                upleft = prev[i - 1] if i else 0
+                pa, pb, pc = abs(up - upleft), abs(left - upleft), abs(left + up - 2 * upleft)
+                row[i] = (row[i] + (left if pa <= pb and pa <= pc else up if pb <= pc else upleft)) & 0xFF
+        out += row
+        prev = row
+    return bytes(out)
+
+
+def _pdf_read_xref_section(mm, offset):
+    """读取一个交叉引用段（xref表或xref流）
+
+    Returns:
+        tuple: (trailer字典, 查找函数 lookup(对象号) -> 偏移或None)
+    """
+    parser = _PdfParser(mm, offset)
+    parser.skip_ws()
+    if mm[parser.pos:parser.pos + 4] == b"xref":
+        parser.pos += 4
+        subsections = []
+        while True:
+            saved = parser.pos
+            word = parser.token()
+            if word == b"trailer" or not word.isdigit():
+                parser.pos = saved
+                break
+            start, count = int(word), int(parser.token())
+            parser.skip_ws()
+            # 每个条目固定20字节，直接跳过整个子段
+            subsections.append((start, count, parser.pos))
+            parser.pos += count * 20
+        if parser.token() != b"trailer":
+            raise ValueError("PDF缺少trailer")
+        trailer = parser.parse()
+
+        def lookup(num):
+            for start, count, entries_pos in subsections:
+                if start <= num < start + count:
+                    entry = mm[entries_pos + (num - start) * 20:entries_pos + (num - start) * 20 + 20]
+                    if entry[17:18] == b"n":
+                        return int(entry[:10])
+                    return None
+            return None
+        return trailer, lookup
+
+    stream_dict, obj_parser = _pdf_indirect_object(mm, offset)
+    if not isinstance(stream_dict, dict) or stream_dict.get("Type") != "/XRef":
+        raise ValueError("PDF交叉引用流格式错误")
+    data = _pdf_stream_data(mm, obj_parser, stream_dict)
+    widths = stream_dict.get("W", [1, 2, 1])
+    row_size = sum(widths)
+    index = stream_dict.get("Index", [0, stream_dict.get("Size", 0)])
+    ranges = [(index[i], index[i + 1]) for i in range(0, len(index) - 1, 2)]
+
+    def field(row, which):
+        start = sum(widths[:which])
+        value = 0
+        for b in data[row + start:row + start + widths[which]]:
+            value = (value << 8) | b
+        return value
+
+    def lookup(num):
+        row_index = 0
+        for start, count in ranges:
+            if start <= num < start + count:
+                row = (row_index + num - start) * row_size
+                if row + row_size > len(data):
+                    return None
+                entry_type = field(row, 0) if widths[0] else 1
+                return field(row, 1) if entry_type == 1 else None
+            row_index += count
+        return None
+    return stream_dict, lookup
+
+
+def _pdf_string(value):
+    return value if isinstance(value, bytes) else b""
+
+
+def extract_pdf_hash(file_path):
+    """直接解析PDF的加密字典生成hashcat哈希（-m 10400/10500/10600/10700）
+
+    从文件尾的startxref开始沿/Prev链读取各增量更新的trailer（支持xref流和混合xref），
+    只解析/Encrypt字典和/ID，通过mmap按需访问，不读取页面内容。
+
+    Args:
+        file_path (str): PDF文件路径
+
+    Returns:
+        str: $pdf$ 哈希，未加密或不是标准安全处理器时返回None
+    """
+    with open(file_path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size < 32:
+            return None
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if mm.find(b"%PDF", 0, 1024) < 0:
+                return None
+            marker = mm.rfind(b"startxref", max(0, size - PDF_TAIL_SEARCH))
+            if marker < 0:
+                return None
+            offset = int(_PdfParser(mm, marker + 9).token())
+
+            encrypt = doc_id = None
+            lookups = []
+            pending = [offset]
+            seen = set()
+            while pending and len(seen) < PDF_MAX_XREF_SECTIONS:
+                offset = pending.pop(0)
+                if offset in seen or not 0 <= offset < size:
+                    continue
+                seen.add(offset)
+                trailer, lookup = _pdf_read_xref_section(mm, offset)
+                lookups.append(lookup)
+                if encrypt is None:
+                    encrypt = trailer.get("Encrypt")
+                if doc_id is None:
+                    doc_id = trailer.get("ID")
+                # 混合引用文件的XRefStm优先于/Prev
+                for key in ("XRefStm", "Prev"):
+                    if isinstance(trailer.get(key), int):
+                        pending.append(trailer[key])
+            if encrypt is None:
+                return None
+
+            if isinstance(encrypt, _PdfRef):
+                # 越新的交叉引用段越先查找
+                obj_offset = None
+                for lookup in lookups:
+                    obj_offset = lookup(encrypt.num)
+                    if obj_offset is not None:
+                        break
+                if obj_offset is None:
+                    return None
+                encrypt, _ = _pdf_indirect_object(mm, obj_offset)
+            if not isinstance(encrypt, dict) or encrypt.get("Filter") != "/Standard":
+                return None
+
+    version = encrypt.get("V", 0)
+    revision = encrypt.get("R", 0)
+    length = encrypt.get("Length", {1: 40, 4: 128, 5: 256}.get(version, 40))
+    permissions = encrypt.get("P", 0)
+    if permissions > 0x7FFFFFFF:
+        permissions -= 1 << 32
+    encrypt_metadata = 0 if encrypt.get("EncryptMetadata") is False else 1
+    first_id = _pdf_string(doc_id[0]) if isinstance(doc_id, list) and doc_id else b""
+    key_len = 48 if revision >= 5 else 32
+    user = _pdf_string(encrypt.get("U"))[:key_len]
+    owner = _pdf_string(encrypt.get("O"))[:key_len]
+    if revision not in (2, 3, 4, 5, 6) or len(user) < key_len or len(owner) < key_len:
+        return None
+    if revision < 5 and not first_id:
+        return None
+    if not first_id:
+        # R5/R6的校验不使用文件ID，仅为满足格式
+        first_id = b"\0" * 16
+    return "$pdf$%d*%d*%d*%d*%d*%d*%s*%d*%s*%d*%s" % (
+        version, revision, length, permissions, encrypt_metadata,
+        len(first_id), _hex(first_id), len(user), _hex(user), len(owner), _hex(owner))
+
+
+# ---------------------------------------------------------------- Office
+
+CFB_SIG = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"
+CFB_END_OF_CHAIN = 0xFFFFFFFE
+CFB_MAX_SECTOR = 0xFFFFFFFA
+CFB_DIR_ENTRY_SIZE = 128
+
+# 读取加密头时每个流最多读取的字节数
+OFFICE_HEADER_BYTES = 64 * 1024
+
+# Word FIB 标志位
+WORD_FIB_IDENT = 0xA5EC
+WORD_FLAG_ENCRYPTED = 0x0100
+WORD_FLAG_WHICH_TABLE = 0x0200
+WORD_FLAG_OBFUSCATED = 0x8000
+
+# Excel BIFF8 记录类型
+EXCEL_RECORD_BOF = 0x0809
+EXCEL_RECORD_FILEPASS = 0x002F
+EXCEL_MAX_RECORDS = 64
+
+
+class _CompoundFile:
+    """OLE复合文档（CFB）读取器，通过mmap按需读取FAT、目录和流所在扇区"""
+
+    def __init__(self, mm):
+        if mm[:8] != CFB_SIG:
+            raise ValueError("不是OLE复合文档")
+        self.mm = mm
+        self.sector_size = 1 << _u16(mm, 0x1E)
+        self.mini_sector_size = 1 << _u16(mm, 0x20)
+        self.mini_cutoff = _u32(mm, 0x38)
+        self.first_mini_fat = _u32(mm, 0x3C)
+        self.entries_per_sector = self.sector_size // 4
+        # DIFAT：头部109项 + DIFAT扇区链
+        self.fat_sectors = [_u32(mm, 0x4C + i * 4) for i in range(109)]
+        self.max_sectors = len(mm) // self.sector_size
+        difat = _u32(mm, 0x44)
+        visited = set()
+        for _ in range(min(_u32(mm, 0x48), self.max_sectors)):
+            if difat > CFB_MAX_SECTOR:
+                break
+            if difat in visited:
+                raise ValueError("CFB DIFAT链存在循环")
+            visited.add(difat)
+            base = self._offset(difat)
+            self.fat_sectors.extend(_u32(mm, base + i * 4) for i in range(self.entries_per_sector - 1))
+            difat = _u32(mm, base + (self.entries_per_sector - 1) * 4)
+        self.entries = self._read_directory(_u32(mm, 0x30))
+        self._mini_fat = None
+
+    def _offset(self, sector):
+        offset = (sector + 1) * self.sector_size
+        if offset + self.sector_size > len(self.mm):
+            raise ValueError("CFB扇区越界")
+        return offset
+
+    def _next(self, sector):
+        """在FAT中查找下一扇区，只读取所需的FAT扇区"""
+        fat_sector = self.fat_sectors[sector // self.entries_per_sector]
+        return _u32(self.mm, self._offset(fat_sector) + (sector % self.entries_per_sector) * 4)
+
+    def _chain(self, start, limit=None):
+        """遍历扇区链；损坏或恶意构造的FAT可能成环，链长不会超过文件的扇区总数"""
+        sector = start
+        visited = set()
+        while sector <= CFB_MAX_SECTOR:
+            if sector in visited or len(visited) >= self.max_sectors:
+                raise ValueError("CFB扇区链存在循环")
+            visited.add(sector)
+            yield sector
+            if limit is not None and len(visited) >= limit:
+                return
+            sector = self._next(sector)
+
+    def _read_directory(self, start):
+        entries = []
+        for sector in self._chain(start, limit=4096):
+            base = self._offset(sector)
+            for i in range(self.sector_size // CFB_DIR_ENTRY_SIZE):
+                raw = self.mm[base + i * CFB_DIR_ENTRY_SIZE:base + (i + 1) * CFB_DIR_ENTRY_SIZE]
+                name_len = _u16(raw, 0x40)
+                entries.append({
+                    "name": raw[:max(0, name_len - 2)].decode("utf-16-le", errors="ignore"),
+                    "type": raw[0x42],
+                    "start": _u32(raw, 0x74),
+                    "size": _u64(raw, 0x78) if self.sector_size > 512 else _u32(raw, 0x78),
+                })
+        return entries
+
+    def find(self, *names):
+        """按名称查找流（不区分大小写），返回第一个匹配的目录项"""
+        wanted = [name.lower() for name in names]
+        for name in wanted:
+            for entry in self.entries:
+                if entry["type"] == 2 and entry["name"].lower() == name:
+                    return entry
+        return None
+
+    def read(self, entry, max_bytes=OFFICE_HEADER_BYTES):
+        """读取流开头的至多max_bytes字节"""
+        size = min(entry["size"], max_bytes)
+        out = bytearray()
+        if entry["size"] < self.mini_cutoff:
+            root = self.entries[0]
+            mini_stream = list(self._chain(root["start"]))
+            sector = entry["start"]
+            while len(out) < size and sector <= CFB_MAX_SECTOR:
+                position = sector * self.mini_sector_size
+                base = self._offset(mini_stream[position // self.sector_size])
+                start = base + position % self.sector_size
+                out += self.mm[start:start + self.mini_sector_size]
+                sector = self._mini_next(sector)
+        else:
+            for sector in self._chain(entry["start"]):
+                if len(out) >= size:
+                    break
+                base = self._offset(sector)
+                out += self.mm[base:base + self.sector_size]
+        return bytes(out[:size])
+
+    def _mini_next(self, sector):
+        if self._mini_fat is None:
+            self._mini_fat = list(self._chain(self.first_mini_fat))
+        index = sector // self.entries_per_sector
+        if index >= len(self._mini_fat):
+            return CFB_END_OF_CHAIN
+        return _u32(self.mm, self._offset(self._mini_fat[index]) + (sector % self.entries_per_sector) * 4)
+
+
+def _office_verifier(data, pos):
+    """读取加密校验器：盐、加密校验值和加密校验值哈希"""
+    salt_size = _u32(data, pos)
+    salt = data[pos + 4:pos + 4 + salt_size]
+    verifier = data[pos + 4 + salt_size:pos + 20 + salt_size]
+    hash_size = _u32(data, pos + 20 + salt_size)
+    verifier_hash = data[pos + 24 + salt_size:pos + 24 + salt_size + 32]
+    return salt, verifier, hash_size, verifier_hash
+
+
+def _office_standard_hash(data):
+    """标准加密（Office 2007，EncryptionInfo版本 3.2/4.2）"""
+    header_size = _u32(data, 8)
+    key_bits = _u32(data, 12 + 16)
+    salt, verifier, hash_size, verifier_hash = _office_verifier(data, 12 + header_size)
+    if len(salt) != 16 or len(verifier) != 16 or len(verifier_hash) < 20:
+        return None
+    return "$office$*2007*%d*%d*%d*%s*%s*%s" % (
+        hash_size, key_bits, len(salt), _hex(salt), _hex(verifier), _hex(verifier_hash[:20]))
+
+
+def _office_agile_hash(data):
+    """敏捷加密（Office 2010/2013，EncryptionInfo版本 4.4，XML描述）"""
+    import base64
+    from xml.etree import ElementTree
+    root = ElementTree.fromstring(data[8:].rstrip(b"\0"))
+    for element in root.iter():
+        if element.tag.endswith("encryptedKey") and element.get("encryptedVerifierHashInput"):
+            algorithm = element.get("hashAlgorithm", "").upper()
+            version = {"SHA1": 2010, "SHA512": 2013}.get(algorithm)
+            if version is None:
+                return None
+            salt = base64.b64decode(element.get("saltValue"))
+            verifier = base64.b64decode(element.get("encryptedVerifierHashInput"))
+            verifier_hash = base64.b64decode(element.get("encryptedVerifierHashValue"))
+            return "$office$*%d*%d*%d*%d*%s*%s*%s" % (
+                version, int(element.get("spinCount")), int(element.get("keyBits")), len(salt),
+                _hex(salt), _hex(verifier[:16]), _hex(verifier_hash[:32]))
+    return None
+
+
+def _office_legacy_hash(data, pos, rc4_type):
+    """旧版RC4加密头（Word表流开头 / Excel FILEPASS记录）生成 $oldoffice$ 哈希
+
+    RC4 CryptoAPI的类型号由EncryptionHeader中的KeySize决定（hashcat -m 9800 / John
+    按类型号选择密钥长度）：0或40位为3，其余（128位）为4，与应用程序无关。
+
+    Args:
+        data (bytes): 加密头所在的数据
+        pos (int): EncryptionVersionInfo 的偏移
+        rc4_type (int): RC4（40位MD5）时的类型号
+    """
+    major, minor = _u16(data, pos), _u16(data, pos + 2)
+    if major == 1 and minor == 1:
+        salt = data[pos + 4:pos + 20]
+        verifier = data[pos + 20:pos + 36]
+        verifier_hash = data[pos + 36:pos + 52]
+        if len(verifier_hash) < 16:
+            return None
+        return "$oldoffice$%d*%s*%s*%s" % (rc4_type, _hex(salt), _hex(verifier), _hex(verifier_hash))
+    if major in (2, 3, 4) and minor == 2:
+        header_size = _u32(data, pos + 8)
+        if header_size < 20 or pos + 12 + 20 > len(data):
+            return None
+        key_size = _u32(data, pos + 12 + 16)
+        cryptoapi_type = 3 if key_size in (0, 40) else 4
+        salt, verifier, _, verifier_hash = _office_verifier(data, pos + 12 + header_size)
+        if len(salt) != 16 or len(verifier_hash) < 20:
+            return None
+        return "$oldoffice$%d*%s*%s*%s" % (cryptoapi_type, _hex(salt), _hex(verifier), _hex(verifier_hash[:20]))
+    return None
+
+
+def _office_word_hash(cfb):
+    """Word 97-2003：FIB中标记加密后，加密头位于0Table/1Table流开头"""
+    entry = cfb.find("WordDocument")
+    if entry is None:
+        return None
+    fib = cfb.read(entry, 32)
+    if len(fib) < 0x12 or _u16(fib, 0) != WORD_FIB_IDENT:
+        return None
+    flags = _u16(fib, 0x0A)
+    if not flags & WORD_FLAG_ENCRYPTED or flags & WORD_FLAG_OBFUSCATED:
+        return None
+    table = cfb.find("1Table" if flags & WORD_FLAG_WHICH_TABLE else "0Table")
+    if table is None:
+        return None
+    return _office_legacy_hash(cfb.read(table, _u32(fib, 0x0E) or 1024), 0, 0)
+
+
+def _office_excel_hash(cfb):
+    """Excel 97-2003：在工作簿流开头的记录中查找FILEPASS"""
+    entry = cfb.find("Workbook", "Book")
+    if entry is None:
+        return None
+    data = cfb.read(entry)
+    pos = 0
+    for _ in range(EXCEL_MAX_RECORDS):
+        if pos + 4 > len(data):
+            return None
+        record_type, record_size = _u16(data, pos), _u16(data, pos + 2)
+        if record_type == EXCEL_RECORD_FILEPASS:
+            # wEncryptionType: 0为XOR混淆（无法生成哈希），1为RC4
+            if record_size < 6 or _u16(data, pos + 4) != 1:
+                return None
+            return _office_legacy_hash(data[pos + 6:pos + 4 + record_size], 0, 1)
+        pos += 4 + record_size
+    return None
+
+
+def extract_office_hash(file_path):
+    """直接解析Office加密文件生成hashcat哈希
+
+    OOXML加密文档（docx/xlsx/pptx）是含EncryptionInfo流的复合文档，生成 $office$
+    （2007标准加密 -m 9400，2010/2013敏捷加密 -m 9500/9600）；Word/Excel 97-2003
+    从WordDocument/Workbook流读取RC4加密头，生成 $oldoffice$（-m 9700/9800）。
+    PowerPoint 97-2003的加密头结构较复杂，仍交给office2john处理。
+
+    Args:
+        file_path (str): Office文件路径
+
+    Returns:
+        str: 哈希值，未加密或无法生成时返回None
+    """
+    with open(file_path, "rb") as f:
+        if os.fstat(f.fileno()).st_size < 512:
+            return None
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if mm[:8] != CFB_SIG:
+                # 未加密的OOXML是普通ZIP包
+                return None
+            cfb = _CompoundFile(mm)
+            info = cfb.find("EncryptionInfo")
+            if info is not None:
+                data = cfb.read(info)
+                major, minor = _u16(data, 0), _u16(data, 2)
+                if minor == 2 and major in (2, 3, 4):
+                    return _office_standard_hash(data)
+                if major == 4 and minor == 4:
+                    return _office_agile_hash(data)
+                return None
+            return _office_word_hash(cfb) or _office_excel_hash(cfb)
+
+
+# ---------------------------------------------------------------- 魔数识别
+
+# 识别时读取的文件头/尾字节数
+SNIFF_HEAD_BYTES = 4096
+SNIFF_TAIL_BYTES = 4096
+
+# ZIP中央目录最多扫描的字节数
+SNIFF_ZIP_CD_BYTES = 1024 * 1024
+
+# RAR最多遍历的头块数
+SNIFF_RAR_MAX_HEADERS = 64
+
+OFFICE_EXTS = ("doc", "docx", "xls", "xlsx", "ppt", "pptx")
+
+
+def _sniff_zip(f):
+    """ZIP：检查中央目录中各条目的加密标志，OOXML包视为未加密的Office文档"""
+    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        located = _zip_central_directory(mm)
+        if located is None:
+            return "zip", None
+        pos, total = located
+        end = min(len(mm), pos + SNIFF_ZIP_CD_BYTES)
+        fmt = "zip"
+        for _ in range(total):
+            if pos + 46 > end or mm[pos:pos + 4] != ZIP_CENTRAL_SIG:
+                # 中央目录过大时只扫描开头部分，无法确定
+                return fmt, None if pos + 46 > end else False
+            name_len = _u16(mm, pos + 28)
+            if _u16(mm, pos + 8) & 0x1:
+                return "zip", True
+            if mm[pos + 46:pos + 46 + name_len] == b"[Content_Types].xml":
+                fmt = "office"
+            pos += 46 + name_len + _u16(mm, pos + 30) + _u16(mm, pos + 32)
+        return fmt, False
+
+
+def _sniff_rar(f, offset, version):
+    """RAR：遍历头块查找加密头或任一文件的加密标志，不读取数据区
+
+    Returns:
+        bool: 是否加密；遍历SNIFF_RAR_MAX_HEADERS个头块仍无法确定时返回None
+    """
+    if version == 5:
+        for head_type, header, _, extra_size in _iter_rar5_headers(f, offset, SNIFF_RAR_MAX_HEADERS):
+            if head_type == RAR5_HEAD_CRYPT:
+                return True
+            if head_type in (RAR5_HEAD_FILE, RAR5_HEAD_SERVICE) and extra_size:
+                if _rar5_crypt_record(header[len(header) - extra_size:]) is not None:
+                    return True
+            if head_type == RAR5_HEAD_END:
+                return False
+        return None if f.tell() < os.fstat(f.fileno()).st_size else False
+    pos = offset + len(RAR3_SIG)
+    for _ in range(SNIFF_RAR_MAX_HEADERS):
+        f.seek(pos)
+        header = f.read(40)
+        if len(header) < 7:
+            return False
+        _, head_type, flags, head_size = struct.unpack_from("<HBHH", header)
+        if head_size < 7:
+            return False
+        if head_type == RAR3_HEAD_MAIN and flags & 0x0080:
+            return True
+        if head_type == RAR3_HEAD_FILE and flags & 0x04:
+            return True
+        if head_type == RAR3_HEAD_END:
+            return False
+        add_size = _u32(header, 7) if flags & 0x8000 and len(header) >= 11 else 0
+        if head_type == RAR3_HEAD_FILE and flags & 0x0100 and len(header) >= 36:
+            add_size |= _u32(header, 32) << 32
+        pos += head_size + add_size
+    return None
+
+
+def _sniff_7z(f):
+    """7z：检查编码头或主数据流的folder中是否有AES编码器"""
+    f.seek(0)
+    start = f.read(32)
+    next_offset, next_size = struct.unpack_from("<QQ", start, 12)
+    if next_size == 0 or next_size > SEVENZIP_MAX_HEADER:
+        return None
+    f.seek(32 + next_offset)
+    header = f.read(next_size)
+    if len(header) < next_size:
+        return None
+    if header[0] == SEVENZIP_ENCODED_HEADER:
+        reader = _SevenZipReader(header)
+        reader.byte()
+        info = _read_7z_streams_info(reader)
+        if any(_7z_aes_coder(folder) is not None for folder in info["folders"]):
+            return True
+        header = _7z_decode_header(f, info)
+        if not header:
+            return None
+    info = _7z_main_streams(header)
+    if not info:
+        return False
+    return any(_7z_aes_coder(folder) is not None for folder in info["folders"])
+
+
+def _sniff_pdf(f, size):
+    """PDF：最新的trailer（或xref流字典）中必须包含/Encrypt"""
+    tail_size = min(size, SNIFF_TAIL_BYTES)
+    f.seek(size - tail_size)
+    tail = f.read(tail_size)
+    if b"/Encrypt" in tail:
+        return True
+    marker = tail.rfind(b"startxref")
+    if marker < 0:
+        return None
+    try:
+        offset = int(_PdfParser(tail, marker + 9).token())
+    except ValueError:
+        return None
+    f.seek(offset)
+    return b"/Encrypt" in f.read(SNIFF_TAIL_BYTES)
+
+
+def _sniff_office(file_path):
+    """OLE复合文档：根据加密相关的流和标志判断
+
+    Returns:
+        tuple: (建议的扩展名, 是否加密)
+    """
+    with open(file_path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            cfb = _CompoundFile(mm)
+            if cfb.find("EncryptionInfo") is not None:
+                return "docx", True
+            if cfb.find("WordDocument") is not None:
+                return "doc", _office_word_hash(cfb) is not None or _office_flag_encrypted(cfb)
+            if cfb.find("Workbook", "Book") is not None:
+                return "xls", _office_excel_hash(cfb) is not None
+            if cfb.find("PowerPoint Document") is not None:
+                return "ppt", cfb.find("EncryptedSummary") is not None
+            return None, False
+
+
+def _office_flag_encrypted(cfb):
+    """Word FIB中的加密标志（含XOR混淆）"""
+    fib = cfb.read(cfb.find("WordDocument"), 32)
+    return len(fib) >= 0x0C and bool(_u16(fib, 0x0A) & WORD_FLAG_ENCRYPTED)
+
+
+def sniff_encryption(file_path):
+    """按魔数识别文件格式并判断是否加密，只读取文件头尾少量字节和必要的头部结构
+
+    Args:
+        file_path (str): 文件路径
+
+    Returns:
+        dict: {"format": 格式(zip/rar/7z/pdf/office，无法识别为None),
+               "ext": 用于提取哈希的扩展名, "encrypted": True/False/None(无法确定)}
+    """
+    result = {"format": None, "ext": None, "encrypted": False}
+    actual_ext = os.path.splitext(file_path)[1].lower().lstrip(".")
+    try:
+        with open(file_path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            head = f.read(SNIFF_HEAD_BYTES)
+            if head.startswith(b"PK\x03\x04") or head.startswith(b"PK\x05\x06") or head.startswith(b"PK\x07\x08"):
+                result["format"], result["encrypted"] = _sniff_zip(f)
+                result["ext"] = actual_ext if result["format"] == "office" else "zip"
+            elif head.startswith(SEVENZIP_SIG):
+                result["format"], result["ext"] = "7z", "7z"
+                result["encrypted"] = _sniff_7z(f)
+            elif head.startswith(CFB_SIG):
+                result["format"] = "office"
+            elif b"%PDF" in head[:1024]:
+                result["format"], result["ext"] = "pdf", "pdf"
+                result["encrypted"] = _sniff_pdf(f, size)
+            else:
+                found = _find_rar_signature(f) if RAR_SIG_PREFIX in head or actual_ext in ("rar", "exe") else None
+                if found:
+                    result["format"], result["ext"] = "rar", "rar"
+                    result["encrypted"] = _sniff_rar(f, *found)
+        if result["format"] == "office" and head.startswith(CFB_SIG):
+            ext, result["encrypted"] = _sniff_office(file_path)
+            result["ext"] = actual_ext if actual_ext in OFFICE_EXTS else ext
+    except Exception as e:
+        # 结构异常时无法确定，交由提取阶段处理
+        logging.getLogger("zipcracker").debug(f"识别文件格式失败: {file_path}: {e}")
+        if result["format"]:
+            result["encrypted"] = None
+    return result
+
+
+# ---------------------------------------------------------------- 分派
+
+# 文件扩展名 -> 原生提取函数
+NATIVE_EXTRACTORS = {
+    "zip": extract_zip_hash,
+    "rar": extract_rar_hash,
+    "7z": extract_7z_hash,
+    "pdf": extract_pdf_hash,
+    "doc": extract_office_hash,
+    "docx": extract_office_hash,
+    "xls": extract_office_hash,
+    "xlsx": extract_office_hash,
+    "ppt": extract_office_hash,
+    "pptx": extract_office_hash,
+}
+
+
+def extract_native_hash(file_path, file_ext):
+    """使用原生解析器提取哈希
+
+    Args:
+        file_path (str): 文件路径
+        file_ext (str): 文件扩展名（不含点）
+
+    Returns:
+        str: 哈希值，不支持该类型或解析失败时返回None（调用方应退回外部工具）
+    """
+    extractor = NATIVE_EXTRACTORS.get((file_ext or "").lower().lstrip("."))
+    if extractor is None:
+        return None
+    try:
+        return extractor(file_path)
+    except Exception as e:
+        logging.getLogger("zipcracker").info(f"原生哈希提取失败，改用外部工具: {file_path}: {e}")
+        return None
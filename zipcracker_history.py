@@ -0,0 +1,431 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+ZIP Cracker - 破解历史模块
+负责以SQLite保存破解历史：新增记录只追加一行，按文件类型、时间、哈希指纹建立索引，文件路径支持全文检索
+"""
+
+import os
+import csv
+import json
+import hashlib
+import sqlite3
+import datetime
+import threading
+import logging
+
+from zipcracker_cache import connect_sqlite
+from zipcracker_store import hash_fingerprint, get_result_store
+
+HISTORY_DB_FILE = "crack_history.db"
+
+# 旧版JSON历史文件，首次启动时迁移到数据库后改名为 *.migrated
+LEGACY_HISTORY_FILE = "crack_history.json"
+
+# 数据库结构版本，迁移完成后写入 PRAGMA user_version
+HISTORY_SCHEMA_VERSION = 1
+
+# 搜索默认返回的最大条数
+SEARCH_LIMIT = 200
+
+# trigram分词要求查询至少3个字符，更短的查询退回LIKE
+FTS_MIN_QUERY_LEN = 3
+
+# 列表中保存的哈希前缀长度（比历史表格显示的40个字符多1个，用于判断是否被截断）
+HASH_PREVIEW_LEN = 41
+
+_RECORD_COLUMNS = (
+    "r.id, r.file_path, r.file_type, h.hash_value, r.password, r.crack_time, r.timestamp"
+)
+
+# 列表和搜索只读取哈希前缀，不加载完整哈希
+_LIST_COLUMNS = (
+    "r.id, r.file_path, r.file_type, r.hash_preview, r.password, r.crack_time, r.timestamp"
+)
+
+
+def _blob_key(hash_value):
+    """哈希正文的存储键（规范化哈希的指纹，无法规范化时退回原文的SHA-256）"""
+    return hash_fingerprint(hash_value) or hashlib.sha256(hash_value.strip().encode("utf-8")).hexdigest()
+
+
+class CrackHistory:
+    """破解历史记录
+
+    records表每条记录只保存哈希指纹，完整哈希（7z等格式可能有数MB）单独存放在hash_blobs表，
+    同一哈希只存一份；records按文件类型、时间、指纹建立索引，文件路径另建FTS5全文索引。
+    """
+
+    def __init__(self, history_file=LEGACY_HISTORY_FILE, db_path=None):
+        """初始化历史记录
+
+        Args:
+            history_file (str): 旧版JSON历史文件路径，存在时会一次性迁移到数据库
+            db_path (str, optional): 数据库路径，默认与history_file同目录的crack_history.db
+        """
+        self.history_file = history_file
+        self.db_path = db_path or os.path.join(os.path.dirname(history_file), HISTORY_DB_FILE)
+        self._lock = threading.Lock()
+        self._fts = False
+        self._conn = None
+        try:
+            self._connect()
+        except sqlite3.Error as e:
+            logging.getLogger("zipcracker").warning(f"打开历史记录数据库失败: {self.db_path}: {e}")
+
+    def _connect(self):
+        if self._conn is not None:
+            return self._conn
+        conn = connect_sqlite(self.db_path)
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS records (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                file_path TEXT NOT NULL,
+                file_type TEXT,
+                fingerprint TEXT NOT NULL,
+                hash_preview TEXT NOT NULL,
+                password TEXT NOT NULL,
+                crack_time REAL,
+                timestamp TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS hash_blobs (
+                fingerprint TEXT PRIMARY KEY,
+                hash_value TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_records_file_type ON records (file_type);
+            CREATE INDEX IF NOT EXISTS idx_records_timestamp ON records (timestamp);
+            CREATE INDEX IF NOT EXISTS idx_records_fingerprint ON records (fingerprint);
+        """)
+        self._fts = self._create_fts(conn)
+        conn.commit()
+        self._conn = conn
+        if conn.execute("PRAGMA user_version").fetchone()[0] < HISTORY_SCHEMA_VERSION:
+            self._migrate_json()
+        return conn
+
+    def _create_fts(self, conn):
+        """创建文件路径的全文索引（SQLite未编译FTS5或不支持trigram时返回False，搜索退回LIKE）"""
+        existed = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'records_fts'"
+        ).fetchone() is not None
+        try:
+            conn.executescript("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS records_fts USING fts5(
+                    file_path, content='records', content_rowid='id', tokenize='trigram'
+                );
+                CREATE TRIGGER IF NOT EXISTS records_ai AFTER INSERT ON records BEGIN
+                    INSERT INTO records_fts (rowid, file_path) VALUES (new.id, new.file_path);
+                END;
+                CREATE TRIGGER IF NOT EXISTS records_ad AFTER DELETE ON records BEGIN
+                    INSERT INTO records_fts (records_fts, rowid, file_path)
+                    VALUES ('delete', old.id, old.file_path);
+                END;
+            """)
+            if not existed:
+                # 索引建立前已有的记录（如之前的SQLite不支持FTS5）补建索引
+                conn.execute("INSERT INTO records_fts (records_fts) VALUES ('rebuild')")
+            return True
+        except sqlite3.OperationalError as e:
+            logging.getLogger("zipcracker").info(f"SQLite不支持FTS5 trigram，文件路径搜索使用LIKE: {e}")
+            return False
+
+    def _migrate_json(self):
+        """把旧版JSON历史一次性导入数据库，完成后把JSON改名为 *.migrated"""
+        conn = self._conn
+        records = []
+        if os.path.exists(self.history_file):
+            try:
+                with open(self.history_file, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if isinstance(data, list):
+                    records = [r for r in data if isinstance(r, dict)]
+            except (OSError, ValueError) as e:
+                # 读取失败时保留原文件，下次启动再试
+                logging.getLogger("zipcracker").warning(f"读取旧版历史记录失败: {self.history_file}: {e}")
+                return
+
+        with conn:
+            for record in records:
+                hash_value = record.get("hash_value")
+                password = record.get("password")
+                if not hash_value or not password:
+                    continue
+                file_path = record.get("file_path") or ""
+                self._insert(
+                    conn, file_path, record.get("file_type") or _file_type(file_path),
+                    hash_value, password, record.get("crack_time"),
+                    record.get("timestamp") or _now_timestamp()
+                )
+            conn.execute(f"PRAGMA user_version = {HISTORY_SCHEMA_VERSION}")
+
+        if records:
+            get_result_store().import_records(records)
+            logging.getLogger("zipcracker").info(f"已迁移 {len(records)} 条历史记录到 {self.db_path}")
+        if os.path.exists(self.history_file):
+            try:
+                os.replace(self.history_file, self.history_file + ".migrated")
+            except OSError:
+                # user_version已记录迁移完成，改名失败不会导致重复导入
+                pass
+
+    @staticmethod
+    def _insert(conn, file_path, file_type, hash_value, password, crack_time, timestamp):
+        fingerprint = _blob_key(hash_value)
+        conn.execute(
+            "INSERT OR IGNORE INTO hash_blobs (fingerprint, hash_value) VALUES (?, ?)",
+            (fingerprint, hash_value.strip())
+        )
+        hash_value = hash_value.strip()
+        cursor = conn.execute(
+            "INSERT INTO records (file_path, file_type, fingerprint, hash_preview, password, crack_time, timestamp) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (file_path, file_type, fingerprint, hash_value[:HASH_PREVIEW_LEN], password, crack_time, timestamp)
+        )
+        return cursor.lastrowid
+
+    @property
+    def history_data(self):
+        """全部记录（兼容旧接口，按添加顺序）"""
+        return self.get_all_records()
+
+    def add_record(self, file_path, hash_value, password, crack_time=None):
+        """添加一条破解记录
+
+        Args:
+            file_path (str): 文件路径
+            hash_value (str): 哈希值
+            password (str): 破解出的密码
+            crack_time (float, optional): 破解用时（秒）
+
+        Returns:
+            bool: 是否添加成功
+        """
+        if not hash_value or not password:
+            return False
+
+        try:
+            with self._lock:
+                conn = self._connect()
+                with conn:
+                    self._insert(conn, file_path, _file_type(file_path), hash_value, password,
+                                 crack_time, _now_timestamp())
+        except sqlite3.Error as e:
+            logging.getLogger("zipcracker").warning(f"保存历史记录失败: {e}")
+            return False
+        get_result_store().add(hash_value, password, file_path=file_path, source="history")
+        return True
+
+    def delete_record(self, record_id):
+        """删除一条记录
+
+        Args:
+            record_id (int): 记录ID
+
+        Returns:
+            bool: 是否删除了记录
+        """
+        try:
+            record_id = int(record_id)
+        except (TypeError, ValueError):
+            return False
+        try:
+            with self._lock:
+                conn = self._connect()
+                with conn:
+                    row = conn.execute("SELECT fingerprint FROM records WHERE id = ?", (record_id,)).fetchone()
+                    if row is None:
+                        return False
+                    conn.execute("DELETE FROM records WHERE id = ?", (record_id,))
+                    # 没有记录再引用的哈希正文一并删除
+                    conn.execute(
+                        "DELETE FROM hash_blobs WHERE fingerprint = ? "
+                        "AND NOT EXISTS (SELECT 1 FROM records WHERE fingerprint = ?)",
+                        (row[0], row[0])
+                    )
+            return True
+        except sqlite3.Error as e:
+            logging.getLogger("zipcracker").warning(f"删除历史记录失败: {e}")
+            return False
+
+    def clear_history(self):
+        """清空历史记录"""
+        try:
+            with self._lock:
+                conn = self._connect()
+                with conn:
+                    conn.execute("DELETE FROM records")
+                    conn.execute("DELETE FROM hash_blobs")
+                    if self._fts:
+                        conn.execute("INSERT INTO records_fts (records_fts) VALUES ('delete-all')")
+            return True
+        except sqlite3.Error as e:
+            logging.getLogger("zipcracker").warning(f"清空历史记录失败: {e}")
+            return False
+
+    def _query(self, sql, params=()):
+        try:
+            with self._lock:
+                cursor = self._connect().execute(sql, params)
+                columns = [c[0] for c in cursor.description]
+                return [dict(zip(columns, row)) for row in cursor.fetchall()]
+        except sqlite3.Error as e:
+            logging.getLogger("zipcracker").warning(f"读取历史记录失败: {e}")
+            return []
+
+    def get_all_records(self):
+        """获取所有记录（按添加顺序）"""
+        return self._query(
+            f"SELECT {_RECORD_COLUMNS} FROM records r "
+            "JOIN hash_blobs h ON h.fingerprint = r.fingerprint ORDER BY r.id"
+        )
+
+    def get_count(self):
+        """获取记录数量"""
+        try:
+            with self._lock:
+                return self._connect().execute("SELECT COUNT(*) FROM records").fetchone()[0]
+        except sqlite3.Error:
+            return 0
+
+    def get_hash(self, record_id):
+        """读取一条记录的完整哈希
+
+        Returns:
+            str: 哈希值，记录不存在时返回None
+        """
+        rows = self._query(
+            "SELECT h.hash_value FROM records r JOIN hash_blobs h ON h.fingerprint = r.fingerprint "
+            "WHERE r.id = ?", (int(record_id),)
+        )
+        return rows[0]["hash_value"] if rows else None
+
+    def find_by_hash(self, hash_value):
+        """按哈希查找记录（John与hashcat格式的同一哈希视为相同）
+
+        Returns:
+            list: 记录字典列表，最近的在前
+        """
+        if not hash_value:
+            return []
+        return self._query(
+            f"SELECT {_RECORD_COLUMNS} FROM records r "
+            "JOIN hash_blobs h ON h.fingerprint = r.fingerprint "
+            "WHERE r.fingerprint = ? ORDER BY r.id DESC",
+            (_blob_key(hash_value),)
+        )
+
+    def search(self, text="", file_type=None, limit=SEARCH_LIMIT, offset=0):
+        """按文件路径、哈希和文件类型分页搜索记录
+
+        返回的记录只含哈希前缀hash_preview，完整哈希用get_hash按ID读取。
+
+        Args:
+            text (str): 文件路径中包含的文本，或完整哈希（含$时按哈希指纹精确匹配），为空时不过滤
+            file_type (str, optional): 文件类型（扩展名，不带点）
+            limit (int): 最多返回的条数
+            offset (int): 跳过的条数（分页）
+
+        Returns:
+            list: 记录字典列表，最近的在前
+        """
+        text = (text or "").strip()
+        source, order = "records r", "r.id"
+        where, params = [], []
+        if text and "$" in text:
+            where.append("r.fingerprint = ?")
+            params.append(_blob_key(text))
+        elif text:
+            if self._fts and len(text) >= FTS_MIN_QUERY_LEN:
+                # 从全文索引按rowid倒序读取，命中很多时取够limit条即可停止
+                source, order = "records_fts f CROSS JOIN records r ON r.id = f.rowid", "f.rowid"
+                where.append("records_fts MATCH ?")
+                params.append('"' + text.replace('"', '""') + '"')
+            else:
+                escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+                where.append("r.file_path LIKE ? ESCAPE '\\'")
+                params.append(f"%{escaped}%")
+        if file_type:
+            where.append("r.file_type = ?")
+            params.append(file_type.lower().strip("."))
+        sql = f"SELECT {_LIST_COLUMNS} FROM {source}"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += f" ORDER BY {order} DESC LIMIT ? OFFSET ?"
+        params.extend([int(limit), int(offset)])
+        return self._query(sql, params)
+
+    def _iter_records(self, batch_size=1000):
+        """按ID分批读取全部记录（导出时不把所有哈希一次性载入内存）"""
+        last_id = 0
+        while True:
+            with self._lock:
+                cursor = self._connect().execute(
+                    f"SELECT {_RECORD_COLUMNS} FROM records r "
+                    "JOIN hash_blobs h ON h.fingerprint = r.fingerprint "
+                    "WHERE r.id > ? ORDER BY r.id LIMIT ?",
+                    (last_id, batch_size)
+                )
+                columns = [c[0] for c in cursor.description]
+                rows = cursor.fetchall()
+            for row in rows:
+                yield dict(zip(columns, row))
+            if len(rows) < batch_size:
+                return
+            last_id = rows[-1][0]
+
+    def export_to_csv(self, export_file):
+        """导出历史记录为CSV格式"""
+        try:
+            with open(export_file, 'w', encoding='utf-8', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(["ID", "文件类型", "哈希值", "密码", "破解用时(秒)", "破解时间"])
+                for record in self._iter_records():
+                    writer.writerow([
+                        record.get('id', ''),
+                        record.get('file_type', ''),
+                        record.get('hash_value', ''),
+                        record.get('password', ''),
+                        record.get('crack_time', ''),
+                        record.get('timestamp', '')
+                    ])
+            return True
+        except (OSError, sqlite3.Error) as e:
+            print(f"导出CSV历史记录失败: {str(e)}")
+            return False
+
+    def export_to_json(self, export_file):
+        """导出历史记录为JSON格式"""
+        try:
+            with open(export_file, 'w', encoding='utf-8') as f:
+                json.dump(list(self._iter_records()), f, ensure_ascii=False, indent=2)
+            return True
+        except (OSError, sqlite3.Error) as e:
+            print(f"导出JSON历史记录失败: {str(e)}")
+            return False
+
+    def export_to_text(self, export_file):
+        """导出历史记录为文本格式"""
+        try:
+            with open(export_file, 'w', encoding='utf-8') as f:
+                f.write("=== ZIP Cracker 破解历史记录 ===\n\n")
+                for record in self._iter_records():
+                    f.write(f"ID: {record.get('id', '')}\n")
+                    f.write(f"文件类型: {record.get('file_type', '')}\n")
+                    f.write(f"哈希值: {record.get('hash_value', '')}\n")
+                    f.write(f"密码: {record.get('password', '')}\n")
+                    f.write(f"破解用时: {record.get('crack_time', '')} 秒\n")
+                    f.write(f"破解时间: {record.get('timestamp', '')}\n")
+                    f.write("-" * 50 + "\n\n")
+            return True
+        except (OSError, sqlite3.Error) as e:
+            print(f"导出文本历史记录失败: {str(e)}")
+            return False
+
+
+def _file_type(file_path):
+    return os.path.splitext(file_path or "")[1].lower().strip(".")
+
+
+def _now_timestamp():
+    return datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
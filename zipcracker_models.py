@@ -4,16 +4,14 @@ import queue
 import time
 import traceback
 from concurrent.futures import ThreadPoolExecutor
-import datetime
-import json
 from PyQt5 import QtCore
 from PyQt5.QtCore import pyqtSignal
-import requests
-import csv
-import sqlite3
 import re
 import codecs
 import tempfile
+from zipcracker_process import iter_line_batches, OutputRingBuffer, get_supervisor
+from zipcracker_tools import get_tool_probes
+from zipcracker_store import hash_fingerprint, parse_pot_line
 
 # 全局常量
 SUPPORTED_EXTS = ['.zip', '.rar', '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx', '.pdf', '.7z']
@@ -36,6 +34,85 @@ HASHCAT_MODE_MAP = {
     '7z': '11600',   # 7-Zip
 }
 
+# 慢哈希模式（密钥派生迭代次数高，每秒只能尝试少量密码），预检阶段需要减少候选数
+SLOW_HASH_MODES = {'13000', '12500', '23700', '23800', '11600', '13600', '9400', '9500', '9600', '10700'}
+
+def _pkzip2_entry_types(hash_value):
+    """解析 $pkzip2$ 哈希中每个条目的数据类型(DT)和压缩类型(CT)，解析失败返回None
+    
+    格式: $pkzip2$C*B*[DT*MT{CL*UL*CR*OF*OX}*CT*DL*CS*TC*DA]*$/pkzip2$，
+    其中 CL..OX 仅在 DT != 1 时出现。
+    """
+    try:
+        body = hash_value.split("$pkzip2$", 1)[1].split("$/pkzip2$", 1)[0]
+        fields = body.strip("*").split("*")
+        count = int(fields[0])
+        pos = 2
+        types = []
+        for _ in range(count):
+            data_type = int(fields[pos])
+            pos += 2  # DT, MT
+            if data_type != 1:
+                pos += 5  # CL, UL, CR, OF, OX
+            types.append((data_type, int(fields[pos])))
+            pos += 5  # CT, DL, CS, TC, DA
+        return types
+    except (IndexError, ValueError):
+        return None
+
+def guess_hash_mode(hash_value, file_ext=None):
+    """根据哈希前缀推断 hashcat -m 模式号
+    
+    同一扩展名可能对应不同的加密方式（如ZIP的ZipCrypto与AES、旧版与新版Office），
+    按哈希内容判断比按扩展名更准确；无法识别时退回 HASHCAT_MODE_MAP。
+    
+    Args:
+        hash_value (str): 哈希值
+        file_ext (str, optional): 文件扩展名（不含点）
+    
+    Returns:
+        str: 模式号，无法判断时返回None
+    """
+    h = (hash_value or "").strip()
+    if h.startswith("$zip2$"):
+        return '13600'
+    if h.startswith("$pkzip2$"):
+        types = _pkzip2_entry_types(h)
+        if not types:
+            return '17200'
+        if len(types) == 1:
+            return '17210' if types[0][1] == 0 else '17200'
+        if all(ct == 8 for _, ct in types):
+            # 没有完整数据条目时只能做校验和比对
+            return '17220' if any(dt != 1 for dt, _ in types) else '17230'
+        return '17225'
+    if h.startswith("$rar5$"):
+        return '13000'
+    if h.startswith("$RAR3$*0*"):
+        return '12500'
+    if h.startswith("$RAR3$*1*"):
+        # 最后一个字段为压缩方法，0x30表示仅存储
+        return '23700' if h.rstrip("*").split("*")[-1] == "30" else '23800'
+    if h.startswith("$7z$"):
+        return '11600'
+    if h.startswith("$pdf$"):
+        try:
+            revision = int(h[5:].split("*")[1])
+        except (IndexError, ValueError):
+            revision = 3
+        return {2: '10400', 5: '10600', 6: '10700'}.get(revision, '10500')
+    if h.startswith("$office$*2007*"):
+        return '9400'
+    if h.startswith("$office$*2010*"):
+        return '9500'
+    if h.startswith("$office$*2013*"):
+        return '9600'
+    if h.startswith(("$oldoffice$0*", "$oldoffice$1*")):
+        return '9700'
+    if h.startswith(("$oldoffice$3*", "$oldoffice$4*")):
+        return '9800'
+    return HASHCAT_MODE_MAP.get((file_ext or "").lower().lstrip('.'))
+
 # 文件扩展名与 john --format 映射
 JOHN_FORMAT_MAP = {
     'zip': 'zip',
@@ -191,11 +268,14 @@ class HashcatThread(QtCore.QThread):
     log_signal = pyqtSignal(str)  # 日志信号
     finished_signal = pyqtSignal(dict)  # 完成信号
     status_signal = pyqtSignal(str, str)  # 状态信号
+    ready_signal = pyqtSignal()  # 启动前检查通过信号
+    preflight_failed_signal = pyqtSignal(str, str)  # 启动前检查失败信号(标题, 内容)
+    hash_cracked_signal = pyqtSignal(str, str)  # 多哈希模式下单个哈希破解成功信号(哈希, 密码)
     
     def __init__(self, cmd=None, cwd=None, hashcat_path=None, hash_value=None, hash_mode=None,
                  attack_mode=None, dict_path=None, rule_path=None, mask=None, dict1_path=None,
                  dict2_path=None, use_gpu=True, workload=2, threads=None, device=None, memory_limit=None,
-                 session=None, restore=False):
+                 session=None, restore=False, transcript_path=None, hash_values=None, outfile=None):
         """增强版初始化方法，支持直接构建命令或提供各种参数自动构建
         
         Args:
@@ -217,6 +297,10 @@ class HashcatThread(QtCore.QThread):
             memory_limit: 内存限制，格式如"1024M"或"1G"
             session (str): hashcat session名
             restore (bool): 是否为恢复模式
+            transcript_path (str): 完整输出的压缩转储文件路径，为None时只保留最近输出
+            hash_values (list): 多哈希模式，同一模式的多个哈希一次性交给hashcat；
+                                已破解的哈希通过--remove从哈希文件移除
+            outfile (str): 多哈希模式下hashcat的--outfile路径，为None时使用临时文件
         """
         super().__init__()
         
@@ -226,6 +310,13 @@ class HashcatThread(QtCore.QThread):
         self.cwd = cwd
         self.hashcat_path = hashcat_path
         self.hash_value = hash_value
+        self.hash_values = [h for h in (hash_values or []) if h and h.strip()]
+        self.multi = bool(self.hash_values)
+        self.outfile = outfile
+        self.cracked = {}  # 多哈希模式下已破解的 哈希 -> 密码
+        self._outfile_pos = 0
+        self._input_fingerprints = None  # 哈希指纹 -> 输入哈希
+        self._unmatched = []  # outfile中暂时无法对应到输入哈希的 (哈希, 密码)
         self.hash_mode = hash_mode
         self.attack_mode = attack_mode
         self.dict_path = dict_path
@@ -241,8 +332,33 @@ class HashcatThread(QtCore.QThread):
         self.temp_file = None
         self.process = None
         self._stop_event = threading.Event()
-        self.cmd_output = []
+        # 有界输出缓冲，长时间运行或恢复会话时内存保持平稳
+        self.cmd_output = OutputRingBuffer(spill_path=transcript_path)
         self.last_progress_time = time.time()  # 上次进度更新时间
+    
+    def _preflight(self):
+        """启动前检查并生成命令，在工作线程中执行，避免阻塞界面
+        
+        依次校验哈希格式、hashcat版本和同目录进程冲突，写入临时哈希文件
+        并构建命令行。检查未通过时发出preflight_failed_signal。
+        
+        Returns:
+            bool: 检查通过并生成命令返回True，否则返回False
+        """
+        hashcat_path = self.hashcat_path
+        hash_value = self.hash_value
+        hash_mode = self.hash_mode
+        attack_mode = self.attack_mode
+        dict_path = self.dict_path
+        rule_path = self.rule_path
+        mask = self.mask
+        dict1_path = self.dict1_path
+        dict2_path = self.dict2_path
+        use_gpu = self.use_gpu
+        workload = self.workload
+        threads = self.threads
+        device = self.device
+        self.cmd = []
         
         if hashcat_path:
             self.cmd.append(hashcat_path)
@@ -254,69 +370,81 @@ class HashcatThread(QtCore.QThread):
             self.cmd.extend(['-m', str(hash_mode)])
         
         # 7z哈希格式二次校验
-        if str(hash_mode) == '11600' and not hash_value.strip().startswith('$7z$'):
-            from PyQt5 import QtWidgets
-            QtWidgets.QMessageBox.critical(None, "哈希格式错误", "7z破解仅支持以$7z$开头的哈希！请检查哈希提取流程。")
+        check_values = self.hash_values if self.multi else [hash_value]
+        if str(hash_mode) == '11600' and not all(h.strip().startswith('$7z$') for h in check_values):
+            self.preflight_failed_signal.emit("哈希格式错误", "7z破解仅支持以$7z$开头的哈希！请检查哈希提取流程。")
             self.cmd = []
-            self.temp_file = None
-            self.cwd = cwd
-            return
+            return False
         
-        # 检查hashcat版本
-        import subprocess
+        # 检查hashcat版本（按可执行文件指纹缓存）
         try:
-            version_out = subprocess.check_output([hashcat_path, '--version'], universal_newlines=True)
-            # 提取 v6.2.6 或 6.2.6 的主次版本号
-            match = re.search(r'v?(\d+)\.(\d+)', version_out)
-            if not match:
-                raise ValueError(f"无法解析Hashcat版本号: {version_out}")
-            major, minor = int(match.group(1)), int(match.group(2))
+            version = get_tool_probes().get_hashcat_version(hashcat_path)
+            if version is None:
+                raise ValueError(f"无法解析Hashcat版本号: {get_tool_probes().get_version_output(hashcat_path)}")
+            major, minor, version_out = version
             if major < 6 or (major == 6 and minor < 1):
-                from PyQt5 import QtWidgets
-                QtWidgets.QMessageBox.critical(None, "Hashcat版本过低", f"检测到Hashcat版本: {version_out.strip()}\n7z破解需要6.1.0及以上版本！")
+                self.preflight_failed_signal.emit("Hashcat版本过低", f"检测到Hashcat版本: {version_out.strip()}\n7z破解需要6.1.0及以上版本！")
                 self.cmd = []
-                self.temp_file = None
-                self.cwd = cwd
-                return
+                return False
         except Exception as e:
-            from PyQt5 import QtWidgets
-            QtWidgets.QMessageBox.critical(None, "Hashcat检测失败", f"无法检测Hashcat版本: {e}")
+            self.preflight_failed_signal.emit("Hashcat检测失败", f"无法检测Hashcat版本: {e}")
             self.cmd = []
-            self.temp_file = None
-            self.cwd = cwd
-            return
+            return False
+        
+        # 检查hashcat是否支持该哈希模式（模式列表同样按指纹缓存，无法获取时不拦截）
+        if hash_mode and not self.restore:
+            modes = get_tool_probes().get_hashcat_modes(hashcat_path)
+            if modes and str(hash_mode).isdigit() and int(hash_mode) not in modes:
+                self.preflight_failed_signal.emit("Hashcat不支持该格式", f"当前Hashcat不支持哈希模式 -m {hash_mode}，请升级Hashcat！")
+                self.cmd = []
+                return False
         
         # 检查同目录下是否有hashcat.exe进程
-        import psutil
+        try:
+            import psutil
+        except ImportError:
+            psutil = None
+            self.log_signal.emit("[!] 未安装psutil，跳过hashcat进程冲突检查")
         exe_dir = os.path.dirname(os.path.abspath(hashcat_path))
-        for proc in psutil.process_iter(['pid', 'name', 'exe']):
+        for proc in (psutil.process_iter(['pid', 'name', 'exe']) if psutil else ()):
+            if self._stop_event.is_set():
+                return False
             try:
                 if proc.info['name'] and 'hashcat' in proc.info['name'].lower():
                     if proc.info['exe'] and os.path.dirname(proc.info['exe']) == exe_dir:
-                        from PyQt5 import QtWidgets
-                        QtWidgets.QMessageBox.critical(None, "Hashcat进程冲突", f"检测到同目录下已有hashcat进程(PID: {proc.info['pid']})在运行，建议先关闭后再尝试！")
+                        self.preflight_failed_signal.emit("Hashcat进程冲突", f"检测到同目录下已有hashcat进程(PID: {proc.info['pid']})在运行，建议先关闭后再尝试！")
                         self.cmd = []
-                        self.temp_file = None
-                        self.cwd = cwd
-                        return
+                        return False
             except Exception:
                 continue
         
-        # 写入哈希值，去除BOM、空格、换行，只保留一行
+        # 写入哈希值，去除BOM、空格、换行，每个哈希只保留一行
         hash_file = None
         try:
-            clean_hash = hash_value.strip().split("\n")[0].strip()
-            # 去除BOM
-            if clean_hash.startswith(codecs.BOM_UTF8.decode()):
-                clean_hash = clean_hash.lstrip(codecs.BOM_UTF8.decode())
+            clean_hashes = []
+            for value in (self.hash_values if self.multi else [hash_value]):
+                clean_hash = value.strip().split("\n")[0].strip()
+                # 去除BOM
+                if clean_hash.startswith(codecs.BOM_UTF8.decode()):
+                    clean_hash = clean_hash.lstrip(codecs.BOM_UTF8.decode())
+                if clean_hash not in clean_hashes:
+                    clean_hashes.append(clean_hash)
+            if self.multi:
+                self.hash_values = clean_hashes
             hash_file = tempfile.NamedTemporaryFile(delete=False, suffix='.hash')
-            hash_file.write(clean_hash.encode('utf-8'))
+            hash_file.write("\n".join(clean_hashes).encode('utf-8'))
             hash_file.close()
-            self.log_signal.emit(f"哈希已写入临时文件: {hash_file.name}")
+            if self.multi:
+                self.log_signal.emit(f"{len(clean_hashes)} 个哈希已写入临时文件: {hash_file.name}")
+            else:
+                self.log_signal.emit(f"哈希已写入临时文件: {hash_file.name}")
         except Exception as e:
             self.log_signal.emit(f"写入哈希文件出错: {str(e)}")
             if hash_file:
                 hash_file.close()
+            self.preflight_failed_signal.emit("写入哈希文件失败", f"无法写入临时哈希文件: {e}")
+            self.cmd = []
+            return False
         
         # 基本命令
         self.cmd.append(hash_file.name)
@@ -329,6 +457,15 @@ class HashcatThread(QtCore.QThread):
         # 禁用potfile，避免hashcat报告"所有哈希已在potfile中"的问题
         self.cmd.append('--potfile-disable')
         
+        # 多哈希模式：一次遍历字典/掩码覆盖全部哈希，结果写入outfile，
+        # 已破解的哈希从哈希文件中移除，剩余数量即未破解数量
+        if self.multi:
+            if not self.outfile:
+                fd, self.outfile = tempfile.mkstemp(suffix='.out')
+                os.close(fd)
+            self.cmd.append('--remove')
+            self.cmd.extend([f'--outfile={self.outfile}', '--outfile-format=1,2'])
+        
         # 添加性能设置
         if not use_gpu:
             self.cmd.extend(['--opencl-device-types=1'])  # 使用CPU
@@ -390,6 +527,7 @@ class HashcatThread(QtCore.QThread):
         
         # 记录临时文件路径
         self.temp_file = hash_file.name
+        return True
     
     def __del__(self):
         """析构函数，清理临时文件"""
@@ -405,7 +543,6 @@ class HashcatThread(QtCore.QThread):
         import subprocess
         import re
         import os
-        import threading
         self.start_time = time.time()
         
         # 新增：超时参数（可配置）
@@ -415,10 +552,11 @@ class HashcatThread(QtCore.QThread):
         try:
             self.log_signal.emit("[*] 启动破解进程...")
             
-            # 如果cmd为空，说明前置检测未通过，直接返回
-            if not self.cmd:
+            # 启动前检查（版本、进程冲突、哈希文件）放在工作线程中，界面线程不再等待
+            if not self._preflight() or not self.cmd:
                 self.log_signal.emit("[!] 未生成破解命令，已中止运行。")
                 return
+            self.ready_signal.emit()
             
             # 记录完整命令
             cmd_str = " ".join(str(c) for c in self.cmd)
@@ -443,7 +581,6 @@ class HashcatThread(QtCore.QThread):
                     self.cmd,
                     stdout=subprocess.PIPE,
                     stderr=subprocess.STDOUT,
-                    universal_newlines=True,
                     cwd=self.cwd,  # 指定工作目录
                     creationflags=subprocess.CREATE_NO_WINDOW
                 )
@@ -456,31 +593,18 @@ class HashcatThread(QtCore.QThread):
                     self.log_signal.emit("[!] 访问被拒绝，可能需要管理员权限运行或文件被占用")
                 raise
             
-            # 新增：进程超时和无输出超时检测线程
-            def timeout_watcher():
-                while True:
-                    if self._stop_event.is_set():
-                        break
-                    now = time.time()
-                    if now - self.start_time > MAX_RUNTIME_SECONDS:
-                        self.log_signal.emit(f"[!] 进程运行超出最大时长({MAX_RUNTIME_SECONDS//3600}小时)，已自动终止！")
-                        try:
-                            self.process.terminate()
-                        except Exception:
-                            pass
-                        break
-                    if now - self.last_progress_time > NO_OUTPUT_TIMEOUT:
-                        self.log_signal.emit(f"[!] 进程{self.process.pid} {NO_OUTPUT_TIMEOUT//60}分钟无输出，已自动终止！")
-                        try:
-                            self.process.terminate()
-                        except Exception:
-                            pass
-                        break
-                    if self.process.poll() is not None:
-                        break
-                    time.sleep(5)
-            watcher_thread = threading.Thread(target=timeout_watcher, daemon=True)
-            watcher_thread.start()
+            # 交给全局监管器处理总时长和无输出超时，不再为每个任务单开轮询线程
+            def on_timeout(reason):
+                if reason == "runtime":
+                    self.log_signal.emit(f"[!] 进程运行超出最大时长({MAX_RUNTIME_SECONDS//3600}小时)，已自动终止！")
+                else:
+                    self.log_signal.emit(f"[!] 进程{self.process.pid} {NO_OUTPUT_TIMEOUT//60}分钟无输出，已自动终止！")
+            watch = get_supervisor().watch(
+                self.process,
+                max_runtime=MAX_RUNTIME_SECONDS,
+                idle_timeout=NO_OUTPUT_TIMEOUT,
+                on_timeout=on_timeout
+            )
             
             # 读取进程输出
             progress_re = re.compile(r'Progress\.+:\s+(\d+)%')
@@ -501,105 +625,115 @@ class HashcatThread(QtCore.QThread):
             last_output_time = start_time
             password_found = False  # 新增变量，确保只提取第一个有效密码
             
-            for line in self.process.stdout:
-                # 记录有输出
-                has_output = True
-                line_count += 1
-                
+            for batch in iter_line_batches(self.process.stdout):
                 # 检查线程是否被终止
                 if self._stop_event.is_set():
                     break
                 
-                # 保存输出行
-                line_text = line.strip()
-                self.cmd_output.append(line_text)
-                    
-                # 输出日志
-                self.log_signal.emit(line_text)
+                # 记录有输出
+                has_output = True
+                watch.touch()
+                
+                # 整批输出日志，避免逐行跨线程发信号
+                self.log_signal.emit("\n".join(batch))
                 
-                # 检测错误信息
-                if "error" in line_text.lower() or "Separator unmatched" in line_text or "No hashes loaded" in line_text:
-                    error_detected = True
-                    error_msg = line_text
+                # 多哈希模式从outfile读取新破解的结果
+                if self.multi:
+                    self.collect_outfile()
                 
-                # 检测特定的RAR5错误
-                if "$rar5$" in " ".join(str(c) for c in self.cmd) and "OpenCL" in line_text and "error" in line_text.lower():
-                    error_detected = True
-                    error_msg = line_text
-                    self.log_signal.emit("[!] 检测到OpenCL错误，RAR5破解需要OpenCL支持")
+                for line_text in batch:
+                    line_count += 1
+                    line = line_text
+                    
+                    # 保存输出行
+                    self.cmd_output.append(line_text)
+                    
+                    # 检测错误信息
+                    if "error" in line_text.lower() or "Separator unmatched" in line_text or "No hashes loaded" in line_text:
+                        error_detected = True
+                        error_msg = line_text
                 
-                # 当首次看到状态提示时，增加一条额外日志，表明破解正在进行中
-                if status_prompt_re.search(line) and not showed_running:
-                    self.log_signal.emit("[*] hashcat已初始化完成，正在破解中...")
-                    self.log_signal.emit("[*] 该过程可能需要较长时间，您可以随时点击\"停止破解\"按钮")
-                    showed_running = True
+                    # 检测特定的RAR5错误
+                    if "$rar5$" in " ".join(str(c) for c in self.cmd) and "OpenCL" in line_text and "error" in line_text.lower():
+                        error_detected = True
+                        error_msg = line_text
+                        self.log_signal.emit("[!] 检测到OpenCL错误，RAR5破解需要OpenCL支持")
                 
-                # 匹配进度
-                progress_match = progress_re.search(line)
-                if progress_match:
-                    progress = int(progress_match.group(1))
-                    # 限制进度更新频率，避免UI卡顿
-                    current_time = time.time()
-                    if current_time - self.last_progress_time > 0.5:  # 每0.5秒最多更新一次
-                        self.progress_signal.emit(progress)
-                        self.last_progress_time = current_time
+                    # 当首次看到状态提示时，增加一条额外日志，表明破解正在进行中
+                    if status_prompt_re.search(line) and not showed_running:
+                        self.log_signal.emit("[*] hashcat已初始化完成，正在破解中...")
+                        self.log_signal.emit("[*] 该过程可能需要较长时间，您可以随时点击\"停止破解\"按钮")
+                        showed_running = True
+                
+                    # 匹配进度
+                    progress_match = progress_re.search(line)
+                    if progress_match:
+                        progress = int(progress_match.group(1))
+                        # 限制进度更新频率，避免UI卡顿
+                        current_time = time.time()
+                        if current_time - self.last_progress_time > 0.5:  # 每0.5秒最多更新一次
+                            self.progress_signal.emit(progress)
+                            self.last_progress_time = current_time
                 
-                # 匹配速度
-                speed_match = speed_re.search(line)
-                if speed_match:
-                    result_dict['speed'] = speed_match.group(1)
+                    # 匹配速度
+                    speed_match = speed_re.search(line)
+                    if speed_match:
+                        result_dict['speed'] = speed_match.group(1)
                 
-                # 匹配估计时间
-                time_match = time_re.search(line)
-                if time_match:
-                    result_dict['estimated_time'] = time_match.group(1)
+                    # 匹配估计时间
+                    time_match = time_re.search(line)
+                    if time_match:
+                        result_dict['estimated_time'] = time_match.group(1)
                 
-                # 匹配恢复数量 - 如果大于0，表示找到了密码
-                recovered_match = recovered_re.search(line)
-                if recovered_match and int(recovered_match.group(1)) > 0:
-                    result_dict['status'] = 'found'
+                    # 匹配恢复数量 - 如果大于0，表示找到了密码
+                    recovered_match = recovered_re.search(line)
+                    if recovered_match and int(recovered_match.group(1)) > 0:
+                        result_dict['status'] = 'found'
                 
-                # 检查是否找到密码（只提取第一个有效密码，兼容所有hashcat格式）
-                if not password_found and ":" in line_text:
-                    hash_part, password = line_text.split(":", 1)
-                    password = password.strip()
-                    # 整合并增强：排除所有hashcat状态/特征行
-                    hashcat_status_keywords = [
-                        "pure kernel", "optimized kernel", "device", "speed", "progress", "candidates", "recovered",
-                        "session", "status", "hash.mode", "hash.target", "time.started", "time.estimated", "kernel.feature",
-                        "salt:", "amplifier:", "iteration:", "restore.point", "restore.sub", "rejected", "digests", "hashes"
-                    ]
-                    if any(kw in password.lower() for kw in hashcat_status_keywords):
-                        continue
-                    # 排除所有掩码格式如 ?d?d?d?d?d?d 或 ?d?d?d?d?d?d [6]
-                    if re.match(r"^(?:\?[a-z0-9])+(?:\s*\[\d+\])?$", password, re.IGNORECASE):
-                        continue
-                    # 排除已知非密码行和模式号描述
-                    if password and password.lower() not in [
-                        "device generator", "hashcat", "candidates", "progress", "recovered", "session", "status"
-                    ] and len(password) <= 128:
-                        # 只允许 hash_part 以 $7z$、$rar5$、$zip2$、$office$、$pdf$ 等哈希前缀开头
-                        if not hash_part.startswith(("$7z$", "$rar5$", "$zip2$", "$office$", "$pdf$")):
+                    # 检查是否找到密码（只提取第一个有效密码，兼容所有hashcat格式；多哈希模式以outfile为准）
+                    if not self.multi and not password_found and ":" in line_text:
+                        hash_part, password = line_text.split(":", 1)
+                        password = password.strip()
+                        # 整合并增强：排除所有hashcat状态/特征行
+                        hashcat_status_keywords = [
+                            "pure kernel", "optimized kernel", "device", "speed", "progress", "candidates", "recovered",
+                            "session", "status", "hash.mode", "hash.target", "time.started", "time.estimated", "kernel.feature",
+                            "salt:", "amplifier:", "iteration:", "restore.point", "restore.sub", "rejected", "digests", "hashes"
+                        ]
+                        if any(kw in password.lower() for kw in hashcat_status_keywords):
                             continue
-                        # 排除明显为时间、日期、状态等内容
-                        if any(x in password for x in [",", "(", ")", "AM", "PM", "Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]):
+                        # 排除所有掩码格式如 ?d?d?d?d?d?d 或 ?d?d?d?d?d?d [6]
+                        if re.match(r"^(?:\?[a-z0-9])+(?:\s*\[\d+\])?$", password, re.IGNORECASE):
                             continue
-                        if re.match(r"^\d{4,6} ?\([^)]+\)$", password):
-                            continue  # 跳过如"11600 (7-Zip)"
-                        if password.isdigit() and int(password) in [11600, 13000, 13600, 10500, 9800, 9400]:
-                            continue  # 跳过模式号
-                        # 再排除 hash_part 明显不是 hash（如包含空格、tab、特殊提示等）
-                        if len(hash_part) > 0 and " " not in hash_part and "\t" not in hash_part and not hash_part.lower().startswith(("session", "status", "device", "hashcat")):
-                            self.log_signal.emit(f"[*] 找到密码: {password}")
-                            result_dict = {'success': True, 'password': password}
-                            password_found = True
-                            break
-                        # 新增：排除所有 guess 相关状态行
-                        if "guess" in password.lower():
+                        # 排除已知非密码行和模式号描述
+                        if password and password.lower() not in [
+                            "device generator", "hashcat", "candidates", "progress", "recovered", "session", "status"
+                        ] and len(password) <= 128:
+                            # 只允许 hash_part 以 $7z$、$rar5$、$zip2$、$office$、$pdf$ 等哈希前缀开头
+                            if not hash_part.startswith(("$7z$", "$rar5$", "$zip2$", "$office$", "$pdf$")):
+                                continue
+                            # 排除明显为时间、日期、状态等内容
+                            if any(x in password for x in [",", "(", ")", "AM", "PM", "Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]):
+                                continue
+                            if re.match(r"^\d{4,6} ?\([^)]+\)$", password):
+                                continue  # 跳过如"11600 (7-Zip)"
+                            if password.isdigit() and int(password) in [11600, 13000, 13600, 10500, 9800, 9400]:
+                                continue  # 跳过模式号
+                            # 再排除 hash_part 明显不是 hash（如包含空格、tab、特殊提示等）
+                            if len(hash_part) > 0 and " " not in hash_part and "\t" not in hash_part and not hash_part.lower().startswith(("session", "status", "device", "hashcat")):
+                                self.log_signal.emit(f"[*] 找到密码: {password}")
+                                result_dict = {'success': True, 'password': password}
+                                password_found = True
+                                break
+                            # 新增：排除所有 guess 相关状态行
+                            if "guess" in password.lower():
+                                continue
+                        # 排除包含范围/列表符号的内容
+                        if "->" in password or "..." in password:
                             continue
-                    # 排除包含范围/列表符号的内容
-                    if "->" in password or "..." in password:
-                        continue
+                
+                if password_found:
+                    break
             
             # 如果没有任何输出，记录警告
             if not has_output:
@@ -618,6 +752,7 @@ class HashcatThread(QtCore.QThread):
             
             # 等待进程结束
             return_code = self.process.wait()
+            watch.cancel()
             elapsed_time = time.time() - start_time
             self.log_signal.emit(f"[*] 进程退出代码: {return_code}")
             self.log_signal.emit(f"[*] 进程运行时间: {elapsed_time:.2f} 秒")
@@ -645,7 +780,20 @@ class HashcatThread(QtCore.QThread):
                             self.log_signal.emit(f"[!] 无法读取hashcat.log: {str(e)}")
             
             # 检查是否找到密码
-            if result_dict.get('status') == 'found' and result_dict.get('password'):
+            if self.multi:
+                self.collect_outfile(final=True)
+                remaining = self.count_remaining_hashes()
+                result_dict['cracked'] = dict(self.cracked)
+                result_dict['remaining'] = remaining
+                result_dict['success'] = bool(self.cracked)
+                self.log_signal.emit(f"[*] 已破解 {len(self.cracked)}/{len(self.hash_values)} 个哈希，剩余 {remaining} 个")
+                if self.cracked:
+                    result_dict['message'] = "破解成功"
+                    self.status_signal.emit(f"破解成功 {len(self.cracked)}/{len(self.hash_values)}", "success")
+                else:
+                    result_dict['error'] = error_msg if error_detected else (self.cmd_output.first_error or "未找到破解结果")
+                    self.status_signal.emit("破解失败", "error")
+            elif result_dict.get('status') == 'found' and result_dict.get('password'):
                 # 破解成功
                 result_dict['success'] = True
                 result_dict['message'] = "破解成功"
@@ -655,19 +803,18 @@ class HashcatThread(QtCore.QThread):
                 # 尝试再次从输出中查找密码模式
                 # 特别是检查 RAR5 特有的密码输出格式
                 rar5_pattern = r'\$rar5\$.*?:([0-9a-zA-Z]+)(?:\s|$)'
-                for line in self.cmd_output:
-                    if '$rar5$' in line and ':' in line:
-                        match = re.search(rar5_pattern, line)
-                        if match:
-                            password = match.group(1)
-                            # 验证是否像有效的密码（不包含非预期文本）
-                            if not any(x in password for x in ["Device", "Candidate", "Progress", "Recovered"]):
-                                result_dict['success'] = True
-                                result_dict['password'] = password
-                                result_dict['message'] = "破解成功"
-                                self.status_signal.emit("破解成功", "success")
-                                self.log_signal.emit(f"[!] 找到密码（从输出重新提取）: {password}")
-                                break
+                for line in self.cmd_output.lines_with_prefix('$rar5$'):
+                    match = re.search(rar5_pattern, line)
+                    if match:
+                        password = match.group(1)
+                        # 验证是否像有效的密码（不包含非预期文本）
+                        if not any(x in password for x in ["Device", "Candidate", "Progress", "Recovered"]):
+                            result_dict['success'] = True
+                            result_dict['password'] = password
+                            result_dict['message'] = "破解成功"
+                            self.status_signal.emit("破解成功", "success")
+                            self.log_signal.emit(f"[!] 找到密码（从输出重新提取）: {password}")
+                            break
                 
                 # 如果仍未找到密码
                 if not result_dict.get('success', False):
@@ -678,11 +825,9 @@ class HashcatThread(QtCore.QThread):
                     if error_detected:
                         result_dict['error'] = error_msg
                     else:
-                        # 检查完整输出中是否有任何错误信息
-                        for line in self.cmd_output:
-                            if "error" in line.lower() or "failed" in line.lower():
-                                result_dict['error'] = line
-                                break
+                        # 直接取输出索引中的首个错误行
+                        if self.cmd_output.first_error:
+                            result_dict['error'] = self.cmd_output.first_error
                         
                         # 如果没有找到具体错误，使用通用消息
                         if 'error' not in result_dict:
@@ -713,12 +858,86 @@ class HashcatThread(QtCore.QThread):
         
         finally:
             # 清理资源
+            self.cmd_output.close()
             if hasattr(self, 'process') and self.process:
                 try:
                     self.process.terminate()
                 except:
                     pass
 
+    def collect_outfile(self, final=False):
+        """读取outfile中新增的 哈希:密码 行，映射回输入哈希并发出hash_cracked_signal
+
+        hashcat写入outfile的是它重新编码后的哈希（十六进制大小写、字段补零等可能与输入不同），
+        因此按规范化后的哈希指纹对应输入哈希；仍对应不上时，再根据--remove后哈希文件中
+        消失的行推断。
+
+        Args:
+            final (bool): hashcat已退出，仍无法对应的结果写入日志，避免密码丢失
+        """
+        data = b""
+        if self.outfile and os.path.exists(self.outfile):
+            try:
+                if os.path.getsize(self.outfile) > self._outfile_pos:
+                    with open(self.outfile, 'rb') as f:
+                        f.seek(self._outfile_pos)
+                        data = f.read()
+            except OSError:
+                data = b""
+        # 只处理完整的行，未写完的行留到下次
+        end = data.rfind(b"\n")
+        if end >= 0:
+            self._outfile_pos += end + 1
+            if self._input_fingerprints is None:
+                self._input_fingerprints = {}
+                for hash_line in self.hash_values:
+                    self._input_fingerprints.setdefault(hash_fingerprint(hash_line), hash_line)
+            for raw in data[:end].split(b"\n"):
+                # parse_pot_line会还原 $HEX[...] 形式的密码
+                hash_part, password = parse_pot_line(raw.decode('utf-8', errors='ignore'))
+                if hash_part is None:
+                    continue
+                hash_line = self._input_fingerprints.get(hash_fingerprint(hash_part))
+                if hash_line is None:
+                    self._unmatched.append((hash_part, password))
+                else:
+                    self._record_cracked(hash_line, password)
+        if self._unmatched:
+            self._match_removed_hashes()
+        if final:
+            for hash_part, password in self._unmatched:
+                self.log_signal.emit(f"[!] 找到密码但无法对应到输入哈希: {password}（hashcat输出哈希: {hash_part[:80]}）")
+            self._unmatched = []
+
+    def _record_cracked(self, hash_line, password):
+        if hash_line not in self.cracked:
+            self.cracked[hash_line] = password
+            self.log_signal.emit(f"[*] 找到密码: {password}")
+            self.hash_cracked_signal.emit(hash_line, password)
+
+    def _match_removed_hashes(self):
+        """根据--remove后哈希文件中消失的输入哈希推断无法按指纹对应的结果
+
+        只有消失的未破解哈希与无法对应的结果都恰好一个时才能确定对应关系。
+        """
+        try:
+            with open(self.temp_file, 'r', encoding='utf-8', errors='ignore') as f:
+                remaining = {hash_fingerprint(line) for line in f if line.strip()}
+        except (OSError, TypeError):
+            return
+        removed = [h for h in self.hash_values
+                   if h not in self.cracked and hash_fingerprint(h) not in remaining]
+        if len(removed) == 1 and len(self._unmatched) == 1:
+            self._record_cracked(removed[0], self._unmatched.pop()[1])
+    
+    def count_remaining_hashes(self):
+        """统计哈希文件中尚未破解的哈希数量（--remove会移除已破解的行）"""
+        try:
+            with open(self.temp_file, 'r', encoding='utf-8', errors='ignore') as f:
+                return sum(1 for line in f if line.strip())
+        except (OSError, TypeError):
+            return len(self.hash_values) - len(self.cracked)
+    
     def kill(self):
         """终止进程"""
         if self.process and self.process.poll() is None:
@@ -886,146 +1105,6 @@ class DownloadThread(QtCore.QThread):
             print(error_msg)
             self.finished_signal.emit(False, error_msg)
 
-# 历史记录类
-class CrackHistory:
-    def __init__(self, history_file="crack_history.json"):
-        self.history_file = history_file
-        self.history_data = []
-        # 自动创建历史文件（如不存在）
-        if not os.path.exists(self.history_file):
-            with open(self.history_file, 'w', encoding='utf-8') as f:
-                json.dump([], f, ensure_ascii=False, indent=2)
-        self.load_history()
-    
-    def load_history(self):
-        """加载历史记录"""
-        try:
-            if os.path.exists(self.history_file):
-                with open(self.history_file, 'r', encoding='utf-8') as f:
-                    self.history_data = json.load(f)
-        except Exception as e:
-            print(f"加载历史记录失败: {str(e)}")
-            self.history_data = []
-    
-    def save_history(self):
-        """保存历史记录"""
-        try:
-            with open(self.history_file, 'w', encoding='utf-8') as f:
-                json.dump(self.history_data, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            print(f"保存历史记录失败: {str(e)}")
-    
-    def add_record(self, file_path, hash_value, password, crack_time=None):
-        """添加一条破解记录
-        
-        Args:
-            file_path (str): 文件路径
-            hash_value (str): 哈希值
-            password (str): 破解出的密码
-            crack_time (float, optional): 破解用时（秒）
-        """
-        if not hash_value or not password:
-            return False
-            
-        # 获取当前时间，并确保年份正确（修复可能的系统日期问题）
-        now = datetime.datetime.now()
-        if now.year > 2024:  # 如果年份超过2024（可能系统日期有问题）
-            print(f"系统日期异常: {now}，使用固定日期")
-            # 使用当前时间但年份固定为2024
-            now = now.replace(year=2024)
-        timestamp = now.strftime("%Y-%m-%d %H:%M:%S")
-        
-        # 提取文件类型
-        file_ext = os.path.splitext(file_path)[1].lower().strip(".")
-        
-        # 创建记录
-        record = {
-            "id": len(self.history_data) + 1,
-            "file_path": file_path,
-            "file_type": file_ext,
-            "hash_value": hash_value,
-            "password": password,
-            "crack_time": crack_time,  # 破解用时（秒）
-            "timestamp": timestamp
-        }
-        
-        # 添加到历史记录
-        self.history_data.append(record)
-        self.save_history()
-        return True
-    
-    def delete_record(self, record_id):
-        """删除一条记录"""
-        for i, record in enumerate(self.history_data):
-            if record.get("id") == record_id:
-                del self.history_data[i]
-                self.save_history()
-                return True
-        return False
-    
-    def clear_history(self):
-        """清空历史记录"""
-        self.history_data = []
-        self.save_history()
-        return True
-    
-    def get_all_records(self):
-        """获取所有记录"""
-        return self.history_data
-    
-    def get_count(self):
-        """获取记录数量"""
-        return len(self.history_data)
-        
-    def export_to_csv(self, export_file):
-        """导出历史记录为CSV格式"""
-        try:
-            import csv
-            with open(export_file, 'w', encoding='utf-8', newline='') as f:
-                writer = csv.writer(f)
-                writer.writerow(["ID", "文件类型", "哈希值", "密码", "破解用时(秒)", "破解时间"])
-                for record in self.history_data:
-                    writer.writerow([
-                        record.get('id', ''),
-                        record.get('file_type', ''),
-                        record.get('hash_value', ''),
-                        record.get('password', ''),
-                        record.get('crack_time', ''),
-                        record.get('timestamp', '')
-                    ])
-            return True
-        except Exception as e:
-            print(f"导出CSV历史记录失败: {str(e)}")
-            return False
-    
-    def export_to_json(self, export_file):
-        """导出历史记录为JSON格式"""
-        try:
-            with open(export_file, 'w', encoding='utf-8') as f:
-                json.dump(self.history_data, f, ensure_ascii=False, indent=2)
-            return True
-        except Exception as e:
-            print(f"导出JSON历史记录失败: {str(e)}")
-            return False
-    
-    def export_to_text(self, export_file):
-        """导出历史记录为文本格式"""
-        try:
-            with open(export_file, 'w', encoding='utf-8') as f:
-                f.write("=== ZIP Cracker 破解历史记录 ===\n\n")
-                for record in self.history_data:
-                    f.write(f"ID: {record.get('id', '')}\n")
-                    f.write(f"文件类型: {record.get('file_type', '')}\n")
-                    f.write(f"哈希值: {record.get('hash_value', '')}\n")
-                    f.write(f"密码: {record.get('password', '')}\n")
-                    f.write(f"破解用时: {record.get('crack_time', '')} 秒\n")
-                    f.write(f"破解时间: {record.get('timestamp', '')}\n")
-                    f.write("-" * 50 + "\n\n")
-            return True
-        except Exception as e:
-            print(f"导出文本历史记录失败: {str(e)}")
-            return False
-
 class DownloadThreadWithRetry(QtCore.QThread):
     """支持多源和重试的下载线程类"""
     
@@ -1093,6 +1172,7 @@ class DownloadThreadWithRetry(QtCore.QThread):
         Raises:
             Exception: 下载失败时抛出异常
         """
+        import requests
         try:
             # 创建会话，添加重试适配器
             session = requests.Session()
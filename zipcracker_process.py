@@ -0,0 +1,627 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+ZIP Cracker - 子进程输出模块
+负责以二进制分块方式读取子进程输出，增量解码并按行批量交付，
+有界的输出缓冲与索引，以及统一的子进程监管
+"""
+
+import os
+import re
+import gzip
+import time
+import heapq
+import codecs
+import socket
+import logging
+import itertools
+import selectors
+import threading
+from collections import deque
+
+# 单次读取的最大字节数
+READ_CHUNK_SIZE = 64 * 1024
+
+# 行分隔符：兼容 \r\n、\n 以及hashcat状态刷新用的单独 \r
+_LINE_SPLIT_RE = re.compile(r'\r\n|\r|\n')
+
+# 输出缓冲默认保留的最近行数
+OUTPUT_BUFFER_LINES = 2000
+# 每种哈希前缀最多索引的结果行数
+HASH_INDEX_LINES = 100
+
+# 哈希结果行：以 $xxx$ 前缀开头且包含冒号，如 $rar5$...:password
+_HASH_LINE_RE = re.compile(r'^(\$[A-Za-z0-9_]+\$)[^:]*:')
+
+
+class LineDecoder:
+    """增量UTF-8解码器与行切分器
+
+    按任意边界喂入字节块，只交付完整的行；被截断的多字节字符和半行
+    会保留到下一次喂入。
+    """
+
+    def __init__(self, encoding='utf-8', errors='replace', strip=True, skip_empty=True):
+        """初始化解码器
+
+        Args:
+            encoding: 输出编码
+            errors: 解码错误处理方式
+            strip: 是否去除每行首尾空白
+            skip_empty: 是否丢弃空行
+        """
+        self._decoder = codecs.getincrementaldecoder(encoding)(errors=errors)
+        self._pending = ''
+        self.strip = strip
+        self.skip_empty = skip_empty
+
+    def _split(self, text, final=False):
+        """切分文本，返回完整行列表并保留末尾半行"""
+        text = self._pending + text
+        held = ''
+        # 结尾的 \r 可能与下一块开头的 \n 组成一个换行，先保留
+        if not final and text.endswith('\r'):
+            held = '\r'
+            text = text[:-1]
+        parts = _LINE_SPLIT_RE.split(text)
+        self._pending = ('' if final else parts.pop()) + held
+        lines = []
+        for part in parts:
+            if self.strip:
+                part = part.strip()
+            if self.skip_empty and not part:
+                continue
+            lines.append(part)
+        return lines
+
+    def feed(self, data):
+        """喂入一块字节数据
+
+        Args:
+            data: bytes 数据块
+
+        Returns:
+            list: 本次可交付的完整行
+        """
+        if not data:
+            return []
+        return self._split(self._decoder.decode(data))
+
+    def flush(self):
+        """结束输入，交付剩余的半行
+
+        Returns:
+            list: 剩余的行
+        """
+        return self._split(self._decoder.decode(b'', final=True), final=True)
+
+
+def iter_line_batches(stream, chunk_size=READ_CHUNK_SIZE, decoder=None):
+    """以二进制分块方式读取管道，按批交付完整的行
+
+    每次 os.read 返回管道中当前可用的全部数据（不超过 chunk_size），
+    因此突发输出会合并为一批处理，而不是逐行唤醒调用方。
+
+    Args:
+        stream: 子进程的 stdout/stderr 管道（需为二进制模式）
+        chunk_size: 单次读取的最大字节数
+        decoder: 可选的 LineDecoder 实例
+
+    Yields:
+        list: 一批完整的行
+    """
+    if decoder is None:
+        decoder = LineDecoder()
+    fd = stream.fileno()
+    while True:
+        try:
+            data = os.read(fd, chunk_size)
+        except InterruptedError:
+            continue
+        except OSError:
+            break
+        if not data:
+            break
+        lines = decoder.feed(data)
+        if lines:
+            yield lines
+    lines = decoder.flush()
+    if lines:
+        yield lines
+
+
+class OutputRingBuffer:
+    """有界的子进程输出缓冲
+
+    只在内存中保留最近的若干行，完整输出可选写入gzip压缩的转储文件。
+    追加时顺带建立索引（首个错误行、按哈希前缀分组的结果行），
+    运行结束后的分析直接查索引，不再线性扫描全部输出。
+    """
+
+    def __init__(self, maxlen=OUTPUT_BUFFER_LINES, spill_path=None):
+        """初始化缓冲
+
+        Args:
+            maxlen: 内存中保留的最近行数
+            spill_path: 完整输出的转储文件路径（.gz），为None时不转储
+        """
+        self._lines = deque(maxlen=maxlen)
+        self._hash_lines = {}
+        self.first_error = None
+        self.total_lines = 0
+        self.spill_path = spill_path
+        self._spill = None
+        if spill_path:
+            try:
+                spill_dir = os.path.dirname(spill_path)
+                if spill_dir:
+                    os.makedirs(spill_dir, exist_ok=True)
+                self._spill = gzip.open(spill_path, 'at', encoding='utf-8')
+            except Exception as e:
+                print(f"无法创建输出转储文件: {str(e)}")
+                self._spill = None
+
+    def append(self, line):
+        """追加一行输出并更新索引"""
+        self._lines.append(line)
+        self.total_lines += 1
+        if self._spill:
+            try:
+                self._spill.write(line + '\n')
+            except Exception:
+                self._spill = None
+        if self.first_error is None:
+            lower = line.lower()
+            if "error" in lower or "failed" in lower:
+                self.first_error = line
+        if line.startswith('$'):
+            match = _HASH_LINE_RE.match(line)
+            if match:
+                prefix = match.group(1).lower()
+                bucket = self._hash_lines.get(prefix)
+                if bucket is None:
+                    bucket = self._hash_lines[prefix] = deque(maxlen=HASH_INDEX_LINES)
+                bucket.append(line)
+
+    def extend(self, lines):
+        """批量追加多行输出"""
+        for line in lines:
+            self.append(line)
+
+    def lines_with_prefix(self, prefix):
+        """返回以指定哈希前缀开头的结果行
+
+        Args:
+            prefix: 哈希前缀，如 "$rar5$"
+
+        Returns:
+            list: 匹配的结果行（按出现顺序）
+        """
+        return list(self._hash_lines.get(prefix.lower(), ()))
+
+    def recent(self, count=None):
+        """返回最近的若干行"""
+        if count is None or count >= len(self._lines):
+            return list(self._lines)
+        return list(self._lines)[-count:]
+
+    def close(self):
+        """关闭转储文件"""
+        if self._spill:
+            try:
+                self._spill.close()
+            except Exception:
+                pass
+            self._spill = None
+
+    def __iter__(self):
+        return iter(list(self._lines))
+
+    def __len__(self):
+        return len(self._lines)
+
+
+# 没有pidfd可用时（如Windows），轮询子进程退出状态的间隔（秒）
+REAP_INTERVAL = 0.5
+# 超时后先terminate，超过该宽限时间仍未退出则kill（秒）
+KILL_GRACE_SECONDS = 5
+
+
+class SupervisorTimer:
+    """监管器中的定时器句柄"""
+
+    __slots__ = ('deadline', 'callback', 'interval', 'cancelled')
+
+    def __init__(self, deadline, callback, interval=None):
+        self.deadline = deadline
+        self.callback = callback
+        self.interval = interval
+        self.cancelled = False
+
+    def cancel(self):
+        """取消定时器"""
+        self.cancelled = True
+
+
+class ProcessWatch:
+    """被监管的子进程句柄
+
+    读取输出的一方每收到一批输出调用 touch()，监管器据此判断无输出超时。
+    """
+
+    def __init__(self, supervisor, proc, max_runtime, idle_timeout, on_timeout, on_exit):
+        self.supervisor = supervisor
+        self.proc = proc
+        self.max_runtime = max_runtime
+        self.idle_timeout = idle_timeout
+        self.on_timeout = on_timeout
+        self.on_exit = on_exit
+        self.started = time.monotonic()
+        self.last_activity = self.started
+        self.timers = []
+        self.pidfd = None
+        self.closed = False
+
+    def touch(self):
+        """记录一次输出活动"""
+        self.last_activity = time.monotonic()
+
+    def cancel(self):
+        """停止监管（不影响进程本身）"""
+        self.supervisor.unwatch(self)
+
+
+class ProcessSupervisor:
+    """统一的子进程监管器
+
+    单个后台线程基于 selectors 运行：用定时器堆处理总时长和无输出超时，
+    Linux下通过 pidfd 感知子进程退出，其他平台按固定间隔轮询退出状态。
+    无论同时运行多少任务，线程数都保持不变。回调在监管线程中执行，
+    必须短小，涉及界面的操作应通过 safe_ui_update 转交UI线程。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._heap = []
+        self._seq = itertools.count()
+        self._watches = set()
+        self._pending = []
+        self._selector = selectors.DefaultSelector()
+        self._rsock, self._wsock = socket.socketpair()
+        self._rsock.setblocking(False)
+        self._wsock.setblocking(False)
+        self._selector.register(self._rsock, selectors.EVENT_READ, None)
+        self._thread = None
+        self._logger = logging.getLogger("zipcracker")
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="ProcessSupervisor", daemon=True)
+                self._thread.start()
+
+    def _wakeup(self):
+        try:
+            self._wsock.send(b'\0')
+        except (BlockingIOError, OSError):
+            pass
+
+    def _schedule(self, timer):
+        with self._lock:
+            heapq.heappush(self._heap, (timer.deadline, next(self._seq), timer))
+        self._ensure_started()
+        self._wakeup()
+        return timer
+
+    def call_later(self, delay, callback):
+        """延迟执行一次回调
+
+        Args:
+            delay: 延迟秒数
+            callback: 无参回调
+
+        Returns:
+            SupervisorTimer: 可取消的定时器
+        """
+        return self._schedule(SupervisorTimer(time.monotonic() + delay, callback))
+
+    def call_every(self, interval, callback):
+        """按固定间隔重复执行回调
+
+        Args:
+            interval: 间隔秒数
+            callback: 无参回调
+
+        Returns:
+            SupervisorTimer: 可取消的定时器
+        """
+        return self._schedule(SupervisorTimer(time.monotonic() + interval, callback, interval))
+
+    def watch(self, proc, max_runtime=None, idle_timeout=None, on_timeout=None, on_exit=None):
+        """开始监管一个子进程
+
+        Args:
+            proc: subprocess.Popen 对象
+            max_runtime: 最大运行时长（秒），为None时不限制
+            idle_timeout: 无输出超时（秒），为None时不检测
+            on_timeout: 超时回调 on_timeout(reason)，reason 为 "runtime" 或 "idle"；
+                为None时直接终止进程
+            on_exit: 退出回调 on_exit(returncode)
+
+        Returns:
+            ProcessWatch: 监管句柄
+        """
+        watch = ProcessWatch(self, proc, max_runtime, idle_timeout, on_timeout, on_exit)
+        if max_runtime:
+            watch.timers.append(self.call_later(max_runtime, lambda: self._expire(watch, "runtime")))
+        if idle_timeout:
+            watch.timers.append(self.call_later(idle_timeout, lambda: self._check_idle(watch)))
+        with self._lock:
+            self._pending.append(watch)
+        self._ensure_started()
+        self._wakeup()
+        return watch
+
+    def unwatch(self, watch):
+        """停止监管一个子进程"""
+        with self._lock:
+            if watch.closed:
+                return
+            watch.closed = True
+        for timer in watch.timers:
+            timer.cancel()
+        self._wakeup()
+
+    def _check_idle(self, watch):
+        """无输出检测：有新输出则按最后活动时间重新排期"""
+        if watch.closed:
+            return
+        remaining = watch.last_activity + watch.idle_timeout - time.monotonic()
+        if remaining > 0:
+            watch.timers.append(self.call_later(remaining, lambda: self._check_idle(watch)))
+        else:
+            self._expire(watch, "idle")
+
+    def _expire(self, watch, reason):
+        """处理超时：通知任务并终止进程，宽限期后仍存活则强制结束"""
+        if watch.closed or watch.proc.poll() is not None:
+            return
+        if watch.on_timeout:
+            watch.on_timeout(reason)
+        try:
+            watch.proc.terminate()
+        except Exception:
+            pass
+
+        def force_kill():
+            if watch.proc.poll() is None:
+                try:
+                    watch.proc.kill()
+                except Exception:
+                    pass
+        watch.timers.append(self.call_later(KILL_GRACE_SECONDS, force_kill))
+
+    def _register(self, watch):
+        """在监管线程中登记子进程，能用pidfd时交给selector等待退出"""
+        self._watches.add(watch)
+        if hasattr(os, 'pidfd_open'):
+            try:
+                watch.pidfd = os.pidfd_open(watch.proc.pid)
+                self._selector.register(watch.pidfd, selectors.EVENT_READ, watch)
+            except OSError:
+                watch.pidfd = None
+
+    def _release(self, watch):
+        self._watches.discard(watch)
+        if watch.pidfd is not None:
+            try:
+                self._selector.unregister(watch.pidfd)
+            except Exception:
+                pass
+            try:
+                os.close(watch.pidfd)
+            except OSError:
+                pass
+            watch.pidfd = None
+
+    def _reap(self, watch):
+        """子进程已退出：释放资源并派发退出事件"""
+        returncode = watch.proc.poll()
+        if returncode is None:
+            return
+        self._release(watch)
+        if watch.closed:
+            return
+        watch.closed = True
+        for timer in watch.timers:
+            timer.cancel()
+        if watch.on_exit:
+            self._invoke(watch.on_exit, returncode)
+
+    def _invoke(self, callback, *args):
+        try:
+            callback(*args)
+        except Exception as e:
+            self._logger.error(f"监管回调出错: {str(e)}", exc_info=True)
+
+    def _run(self):
+        # 监管线程只有一个，任何一轮出错都只记录日志并继续，否则所有进程监管和定时器都会停止
+        while True:
+            try:
+                self._run_once()
+            except Exception as e:
+                self._logger.error(f"进程监管线程出错: {str(e)}", exc_info=True)
+                self._drop_bad_pidfds()
+                time.sleep(REAP_INTERVAL)
+
+    def _run_once(self):
+        with self._lock:
+            pending, self._pending = self._pending, []
+            next_deadline = self._heap[0][0] if self._heap else None
+        for watch in pending:
+            if not watch.closed:
+                self._register(watch)
+        # 已关闭的监管直接释放
+        for watch in [w for w in self._watches if w.closed]:
+            self._release(watch)
+
+        timeout = None
+        if next_deadline is not None:
+            timeout = max(0.0, next_deadline - time.monotonic())
+        if any(w.pidfd is None for w in self._watches):
+            timeout = REAP_INTERVAL if timeout is None else min(timeout, REAP_INTERVAL)
+
+        for key, _ in self._selector.select(timeout):
+            if key.data is None:
+                try:
+                    while self._rsock.recv(4096):
+                        pass
+                except (BlockingIOError, OSError):
+                    pass
+            else:
+                self._reap(key.data)
+
+        # 触发到期的定时器
+        now = time.monotonic()
+        due = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                due.append(heapq.heappop(self._heap)[2])
+        for timer in due:
+            if timer.cancelled:
+                continue
+            self._invoke(timer.callback)
+            if timer.interval and not timer.cancelled:
+                timer.deadline = time.monotonic() + timer.interval
+                with self._lock:
+                    heapq.heappush(self._heap, (timer.deadline, next(self._seq), timer))
+
+        # 没有pidfd的子进程轮询退出状态
+        for watch in [w for w in self._watches if w.pidfd is None]:
+            self._reap(watch)
+
+    def _drop_bad_pidfds(self):
+        """出错后移除已失效的pidfd，对应子进程改为轮询，避免select反复失败"""
+        for watch in list(self._watches):
+            if watch.pidfd is None:
+                continue
+            try:
+                os.fstat(watch.pidfd)
+            except OSError:
+                try:
+                    self._selector.unregister(watch.pidfd)
+                except Exception:
+                    pass
+                watch.pidfd = None
+
+
+def parse_john_rec(path):
+    """解析John会话的 .rec 恢复文件
+
+    Args:
+        path: .rec 文件路径
+
+    Returns:
+        dict: 包含 elapsed（已运行秒数）、guesses（已破解数）、
+              progress（百分比，未知时为None）的字典；解析失败返回None
+    """
+    try:
+        with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+            lines = f.read().splitlines()
+        if not lines or not lines[0].startswith('REC'):
+            return None
+        argc = int(lines[1])
+        fields = lines[2 + argc:]
+        info = {
+            'elapsed': int(fields[0]),
+            'guesses': int(fields[1]),
+            'progress': None,
+        }
+        # REC4：时间、破解数、combs(3)、crypts(2)、cands(2)、compat、pass、progress
+        if lines[0].startswith('REC4') and len(fields) > 11:
+            progress = int(fields[11])
+            if 0 <= progress <= 100:
+                info['progress'] = progress
+        return info
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class JohnSessionMonitor:
+    """增量跟踪John会话文件获取进度
+
+    只读取 .log 新增的部分，.rec 在修改时间或大小变化时才重新解析，
+    替代每隔几秒启动一次 john --status 子进程。poll() 只做几次 stat，
+    可以放在监管器的定时器里高频调用。
+    """
+
+    def __init__(self, session_path, on_progress=None, on_log_line=None):
+        """初始化监视器
+
+        Args:
+            session_path: 会话文件路径（不含扩展名），如 <john目录>/zipcracker_123
+            on_progress: 进度回调 on_progress(info)，info 为 parse_john_rec 的结果
+            on_log_line: 日志行回调 on_log_line(line)
+        """
+        self.rec_path = session_path + '.rec'
+        self.log_path = session_path + '.log'
+        self.on_progress = on_progress
+        self.on_log_line = on_log_line
+        self._log_offset = 0
+        self._log_decoder = LineDecoder(errors='ignore')
+        self._rec_signature = None
+
+    def poll(self):
+        """检查会话文件变化并派发新内容"""
+        if self.on_log_line:
+            self._poll_log()
+        if self.on_progress:
+            self._poll_rec()
+
+    def _poll_log(self):
+        try:
+            size = os.stat(self.log_path).st_size
+        except OSError:
+            return
+        if size < self._log_offset:
+            # 日志被截断或重建，从头读取
+            self._log_offset = 0
+            self._log_decoder = LineDecoder(errors='ignore')
+        if size == self._log_offset:
+            return
+        try:
+            with open(self.log_path, 'rb') as f:
+                f.seek(self._log_offset)
+                data = f.read(size - self._log_offset)
+        except OSError:
+            return
+        self._log_offset += len(data)
+        for line in self._log_decoder.feed(data):
+            self.on_log_line(line)
+
+    def _poll_rec(self):
+        try:
+            st = os.stat(self.rec_path)
+        except OSError:
+            return
+        signature = (st.st_mtime_ns, st.st_size)
+        if signature == self._rec_signature:
+            return
+        self._rec_signature = signature
+        info = parse_john_rec(self.rec_path)
+        if info:
+            self.on_progress(info)
+
+
+_supervisor = None
+_supervisor_lock = threading.Lock()
+
+
+def get_supervisor():
+    """获取全局子进程监管器"""
+    global _supervisor
+    with _supervisor_lock:
+        if _supervisor is None:
+            _supervisor = ProcessSupervisor()
+        return _supervisor
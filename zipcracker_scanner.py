@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+ZIP Cracker - 加密文件扫描模块
+负责在大型目录树中按魔数并行识别加密的压缩包/文档，未加密的文件不会进入哈希提取阶段
+"""
+
+import os
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from zipcracker_extractors import sniff_encryption
+
+# 并行识别的线程数（以磁盘IO为主，可以多于CPU核数）
+SCAN_WORKERS = min(16, (os.cpu_count() or 1) * 2)
+
+# 每个线程最多排队的任务数，避免为几十万个文件一次性创建任务
+SCAN_QUEUE_PER_WORKER = 8
+
+
+def iter_files(paths, stop_event=None):
+    """遍历文件和目录（目录递归展开，不跟随符号链接），按路径去重
+
+    Args:
+        paths (list): 文件或目录路径列表
+        stop_event (threading.Event, optional): 置位时停止遍历
+
+    Yields:
+        str: 文件路径
+    """
+    seen = set()
+    stack = list(reversed([p for p in paths if p]))
+    while stack:
+        if stop_event is not None and stop_event.is_set():
+            return
+        path = stack.pop()
+        key = os.path.normcase(os.path.abspath(path))
+        if key in seen:
+            continue
+        seen.add(key)
+        if os.path.isfile(path):
+            yield path
+            continue
+        try:
+            with os.scandir(path) as it:
+                children = sorted(it, key=lambda e: e.name)
+        except OSError as e:
+            logging.getLogger("zipcracker").warning(f"无法读取目录: {path}: {e}")
+            continue
+        dirs = []
+        for entry in children:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    dirs.append(entry.path)
+                elif entry.is_file():
+                    if stop_event is not None and stop_event.is_set():
+                        return
+                    key = os.path.normcase(os.path.abspath(entry.path))
+                    if key not in seen:
+                        seen.add(key)
+                        yield entry.path
+            except OSError:
+                continue
+        stack.extend(reversed(dirs))
+
+
+def scan_encrypted_files(paths, max_workers=SCAN_WORKERS, stop_event=None, include_unknown=True):
+    """并行识别文件格式，只返回加密的文件
+
+    Args:
+        paths (list): 文件或目录路径列表
+        max_workers (int): 并行识别的线程数
+        stop_event (threading.Event, optional): 置位时停止扫描
+        include_unknown (bool): 是否保留能识别格式但无法确定是否加密的文件
+
+    Yields:
+        dict: {"file_path", "format", "ext", "encrypted"}，按完成顺序产出
+    """
+    max_workers = max(1, int(max_workers or 1))
+    limit = max_workers * SCAN_QUEUE_PER_WORKER
+    pending = deque()
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    def finished(future):
+        result = future.result()
+        if result["format"] and (result["encrypted"] or (include_unknown and result["encrypted"] is None)):
+            return result
+        return None
+
+    try:
+        for file_path in iter_files(paths, stop_event):
+            pending.append(executor.submit(_sniff_one, file_path))
+            if len(pending) >= limit:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in [f for f in pending if f in done]:
+                    pending.remove(future)
+                    result = finished(future)
+                    if result:
+                        yield result
+        while pending:
+            if stop_event is not None and stop_event.is_set():
+                break
+            result = finished(pending.popleft())
+            if result:
+                yield result
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=False)
+
+
+def _sniff_one(file_path):
+    result = sniff_encryption(file_path)
+    result["file_path"] = file_path
+    return result
@@ -0,0 +1,394 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+ZIP Cracker - 破解结果库模块
+负责按哈希指纹保存所有已破解的密码，任何攻击启动前先查询结果库，已破解过的哈希直接给出密码
+"""
+
+import os
+import re
+import time
+import datetime
+import tempfile
+import sqlite3
+import hashlib
+import threading
+import logging
+
+from zipcracker_cache import connect_sqlite
+
+RESULT_STORE_FILE = "zipcracker_results.db"
+
+# 哈希正文的起始标记（John输出中哈希前面带有 "文件名:" 前缀）
+_HASH_START_RE = re.compile(r'\$(?:pkzip2?|zip2|rar5|RAR3|7z|pdf|office|oldoffice)\$', re.IGNORECASE)
+
+# 哈希内部可能包含冒号以外的任意字符，以下格式有明确的结束标记
+_HASH_TERMINATORS = ("$/pkzip2$", "$/pkzip$", "$/zip2$")
+
+# pkzip哈希中的短十六进制字段（长度、CRC、校验字节等），各工具补零方式不同（%x 与 %08x）
+_PKZIP_FIELD_RE = re.compile(r'(?<=[*$])0+(?=[0-9a-f]{1,7}(?:[*$]|$))')
+
+# 导入potfile时每批写入的行数
+IMPORT_BATCH_SIZE = 1000
+
+# 已知密码预检：参与变形的最近密码数，以及快/慢哈希的候选上限
+PRESTAGE_MAX_PASSWORDS = 2000
+PRESTAGE_MAX_CANDIDATES = 20000
+PRESTAGE_MAX_CANDIDATES_SLOW = 1000
+
+# 追加年份的范围（距今年数）
+PRESTAGE_YEAR_SPAN = 30
+
+
+def normalize_hash(hash_value):
+    """规范化哈希：去掉John输出的文件名前缀和尾部字段、空白，统一小写
+
+    Args:
+        hash_value (str): hashcat或John格式的哈希（可带 "文件名:" 前缀和 ":::" 尾部字段）
+
+    Returns:
+        str: 规范化后的哈希，无法识别时返回空字符串
+    """
+    if not hash_value:
+        return ""
+    text = ""
+    for line in hash_value.strip().splitlines():
+        if line.strip():
+            text = line.strip()
+            break
+    match = _HASH_START_RE.search(text)
+    if match:
+        text = text[match.start():]
+    end = _split_hash_end(text)
+    if end is not None:
+        text = text[:end]
+    text = "".join(text.split()).lower()
+    if text.startswith("$pkzip"):
+        # 去掉短字段的前导零，hashcat输出与John/原生提取的同一哈希得到相同指纹
+        text = _PKZIP_FIELD_RE.sub("", text)
+    return text
+
+
+def _split_hash_end(text):
+    """返回哈希正文的结束位置（其后为 ":密码" 或John的尾部字段），没有分隔时返回None"""
+    lowered = text.lower()
+    for terminator in _HASH_TERMINATORS:
+        pos = lowered.find(terminator)
+        if pos >= 0:
+            return pos + len(terminator)
+    pos = text.find(":")
+    return pos if pos >= 0 else None
+
+
+def hash_fingerprint(hash_value):
+    """计算哈希指纹（规范化哈希的SHA-256），作为结果库的主键
+
+    Returns:
+        str: 十六进制指纹，哈希为空时返回None
+    """
+    normalized = normalize_hash(hash_value)
+    if not normalized:
+        return None
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def parse_pot_line(line):
+    """解析potfile中的一行 "哈希:密码"
+
+    hashcat会把包含不可打印字符的密码写成 $HEX[...]，这里还原为原始密码。
+
+    Returns:
+        tuple: (哈希, 密码)，无法解析时返回(None, None)
+    """
+    line = line.rstrip("\r\n")
+    end = _split_hash_end(line)
+    if end is None or end >= len(line) or line[end] != ":":
+        return None, None
+    hash_part, password = line[:end], line[end + 1:]
+    if password.startswith("$HEX[") and password.endswith("]"):
+        try:
+            raw = bytes.fromhex(password[5:-1])
+        except ValueError:
+            return hash_part, password
+        try:
+            password = raw.decode("utf-8")
+        except UnicodeDecodeError:
+            password = raw.decode("latin-1")
+    if not hash_part or not password:
+        return None, None
+    return hash_part, password
+
+
+class ResultStore:
+    """破解结果库
+
+    results表以哈希指纹为主键保存密码，查询只需一次主键索引查找；
+    同一文件的副本、John格式和hashcat格式的同一哈希都映射到同一指纹。
+    """
+
+    def __init__(self, db_path=RESULT_STORE_FILE):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self):
+        if self._conn is None:
+            self._conn = connect_sqlite(self.db_path)
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS results (
+                    fingerprint TEXT PRIMARY KEY,
+                    hash_value TEXT NOT NULL,
+                    password TEXT NOT NULL,
+                    hash_mode TEXT,
+                    file_path TEXT,
+                    source TEXT,
+                    created REAL NOT NULL
+                );
+            """)
+            self._conn.commit()
+        return self._conn
+
+    def lookup(self, hash_value):
+        """查询哈希是否已破解
+
+        Args:
+            hash_value (str): 哈希值
+
+        Returns:
+            str: 已知的密码，未命中时返回None
+        """
+        fingerprint = hash_fingerprint(hash_value)
+        if fingerprint is None:
+            return None
+        try:
+            with self._lock:
+                row = self._connect().execute(
+                    "SELECT password FROM results WHERE fingerprint = ?", (fingerprint,)
+                ).fetchone()
+            return row[0] if row else None
+        except sqlite3.Error as e:
+            logging.getLogger("zipcracker").warning(f"查询结果库失败: {e}")
+            return None
+
+    def add(self, hash_value, password, hash_mode=None, file_path=None, source="crack"):
+        """保存一条破解结果（同一指纹已存在时覆盖）
+
+        Args:
+            hash_value (str): 哈希值
+            password (str): 破解出的密码
+            hash_mode (str, optional): hashcat模式号
+            file_path (str, optional): 对应的文件路径
+            source (str): 结果来源，如 crack、batch、john、history、potfile
+
+        Returns:
+            bool: 是否写入成功
+        """
+        fingerprint = hash_fingerprint(hash_value)
+        if fingerprint is None or not password:
+            return False
+        try:
+            with self._lock:
+                conn = self._connect()
+                conn.execute(
+                    "INSERT OR REPLACE INTO results "
+                    "(fingerprint, hash_value, password, hash_mode, file_path, source, created) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (fingerprint, hash_value.strip(), password, hash_mode, file_path, source, time.time())
+                )
+                conn.commit()
+            return True
+        except sqlite3.Error as e:
+            logging.getLogger("zipcracker").warning(f"写入结果库失败: {e}")
+            return False
+
+    def _insert_many(self, rows):
+        """批量写入，已存在的指纹保持不变
+
+        Args:
+            rows (list): [(hash_value, password, hash_mode, file_path, source)]
+
+        Returns:
+            int: 新增的条目数
+        """
+        now = time.time()
+        values = []
+        for hash_value, password, hash_mode, file_path, source in rows:
+            fingerprint = hash_fingerprint(hash_value)
+            if fingerprint and password:
+                values.append((fingerprint, hash_value.strip(), password, hash_mode, file_path, source, now))
+        if not values:
+            return 0
+        with self._lock:
+            conn = self._connect()
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO results "
+                "(fingerprint, hash_value, password, hash_mode, file_path, source, created) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                values
+            )
+            conn.commit()
+            return conn.total_changes - before
+
+    def import_potfile(self, potfile_path):
+        """导入hashcat/John的potfile
+
+        Args:
+            potfile_path (str): potfile路径
+
+        Returns:
+            int: 新增的条目数，读取失败时返回-1
+        """
+        added = 0
+        rows = []
+        try:
+            with open(potfile_path, "r", encoding="utf-8", errors="replace") as f:
+                for line in f:
+                    hash_part, password = parse_pot_line(line)
+                    # 非UTF-8的密码无法可靠还原，跳过（hashcat会把这类密码写成$HEX[...]）
+                    if hash_part is None or "\ufffd" in password:
+                        continue
+                    rows.append((hash_part, password, None, None, "potfile"))
+                    if len(rows) >= IMPORT_BATCH_SIZE:
+                        added += self._insert_many(rows)
+                        rows = []
+            added += self._insert_many(rows)
+            return added
+        except (OSError, sqlite3.Error) as e:
+            logging.getLogger("zipcracker").warning(f"导入potfile失败: {potfile_path}: {e}")
+            return -1
+
+    def import_records(self, records, source="history"):
+        """导入历史记录中的破解结果
+
+        Args:
+            records (list): 历史记录字典列表（含hash_value、password、file_path）
+            source (str): 结果来源
+
+        Returns:
+            int: 新增的条目数
+        """
+        rows = [
+            (record.get("hash_value"), record.get("password"), None, record.get("file_path"), source)
+            for record in records
+            if record.get("hash_value") and record.get("password")
+        ]
+        try:
+            return self._insert_many(rows)
+        except sqlite3.Error as e:
+            logging.getLogger("zipcracker").warning(f"导入历史记录到结果库失败: {e}")
+            return 0
+
+    def passwords(self, limit=PRESTAGE_MAX_PASSWORDS):
+        """返回已知的密码（去重，最近破解的在前）
+
+        Args:
+            limit (int): 最多返回的密码数
+
+        Returns:
+            list: 密码列表
+        """
+        try:
+            with self._lock:
+                rows = self._connect().execute(
+                    "SELECT password FROM results GROUP BY password ORDER BY MAX(created) DESC LIMIT ?",
+                    (int(limit),)
+                ).fetchall()
+            return [row[0] for row in rows]
+        except sqlite3.Error as e:
+            logging.getLogger("zipcracker").warning(f"读取结果库失败: {e}")
+            return []
+
+    def count(self):
+        """返回结果库中的条目数"""
+        try:
+            with self._lock:
+                return self._connect().execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        except sqlite3.Error:
+            return 0
+
+
+def mutate_passwords(passwords, max_candidates=PRESTAGE_MAX_CANDIDATES):
+    """由已知密码生成候选：原样、大小写变体、去掉末尾数字后的词干、追加数字和年份
+
+    按“变形程度”分层产出，先给出全部原密码，再给出更远的变形，候选数受max_candidates限制。
+
+    Args:
+        passwords (list): 已知密码（最近的在前）
+        max_candidates (int): 最多产出的候选数
+
+    Yields:
+        str: 候选密码（不重复）
+    """
+    seen = set()
+    this_year = datetime.date.today().year
+    years = [str(y) for y in range(this_year, this_year - PRESTAGE_YEAR_SPAN - 1, -1)]
+    short_years = [y[2:] for y in years]
+    digits = [str(d) for d in range(10)]
+
+    bases = []
+    base_set = set()
+    for password in passwords:
+        stem = password.rstrip("0123456789")
+        variants = [password, password.lower(), password.upper(), password.capitalize(), password.swapcase()]
+        if stem and stem != password:
+            variants += [stem, stem.lower(), stem.capitalize()]
+        for variant in variants:
+            if variant not in base_set:
+                base_set.add(variant)
+                bases.append(variant)
+
+    def layers():
+        yield passwords
+        yield bases
+        yield (base + d for base in bases for d in digits)
+        yield (base + y for base in bases for y in years)
+        yield (base + y for base in bases for y in short_years)
+        yield (base + suffix for base in bases for suffix in ("123", "1234", "!"))
+        yield (base + "%02d" % n for base in bases for n in range(100))
+
+    for layer in layers():
+        for candidate in layer:
+            if candidate and candidate not in seen:
+                seen.add(candidate)
+                yield candidate
+                if len(seen) >= max_candidates:
+                    return
+
+
+def create_known_wordlist(max_candidates=PRESTAGE_MAX_CANDIDATES, store=None):
+    """把已知密码及其变形写入临时字典，供预检阶段使用
+
+    Args:
+        max_candidates (int): 最多写入的候选数
+        store (ResultStore, optional): 结果库，默认使用全局结果库
+
+    Returns:
+        tuple: (字典路径, 候选数)，结果库为空时返回(None, 0)
+    """
+    passwords = (store or get_result_store()).passwords()
+    if not passwords:
+        return None, 0
+    count = 0
+    fd, path = tempfile.mkstemp(prefix="zipcracker_known_", suffix=".txt")
+    with os.fdopen(fd, "w", encoding="utf-8", newline="\n") as f:
+        for candidate in mutate_passwords(passwords, max_candidates):
+            if "\n" in candidate or "\r" in candidate:
+                continue
+            f.write(candidate + "\n")
+            count += 1
+    return path, count
+
+
+_result_store = None
+_result_store_lock = threading.Lock()
+
+
+def get_result_store():
+    """获取全局破解结果库"""
+    global _result_store
+    with _result_store_lock:
+        if _result_store is None:
+            _result_store = ResultStore()
+        return _result_store
@@ -0,0 +1,459 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+ZIP Cracker - 工具定位模块
+负责建立和维护john/hashcat等外部工具的位置索引与能力探测缓存
+"""
+
+import os
+import re
+import copy
+import sys
+import time
+import shutil
+import threading
+import logging
+import subprocess
+
+# 扫描的最大目录深度（相对于扫描根目录）
+TOOL_INDEX_MAX_DEPTH = 4
+
+# 扫描时跳过的目录（小写）
+TOOL_INDEX_PRUNE_DIRS = {
+    '.git', '.svn', '.hg', '__pycache__', 'node_modules', 'site-packages',
+    'venv', '.venv', 'env', 'build', 'dist', 'logs', 'windows',
+    '$recycle.bin', 'system volume information', 'appdata',
+    'kernels', 'charsets', 'masks', 'rules', 'docs', 'doc',
+}
+
+# 需要索引的工具文件名（小写）
+INDEXED_TOOL_NAMES = {
+    'john.exe', 'john', 'hashcat.exe', 'hashcat', 'perl.exe',
+    'zip2john.exe', 'zip2john.pl', 'rar2john.exe', 'rar2john.pl',
+    '7z2john.exe', '7z2john.pl', '7z2hashcat.pl', 'office2john.py', 'office2john.pl',
+    'pdf2john.exe', 'pdf2john.pl', 'pdf2john.py',
+}
+
+# 需要按前缀索引的名称（文件或目录），查询时写作 "OpenCL*"
+INDEXED_TOOL_PREFIXES = ('opencl',)
+
+# 查询未命中时，距上次扫描超过该秒数才重新扫描（工具可能在上次扫描后才安装）
+TOOL_INDEX_MISS_TTL = 60
+
+
+class ToolIndex:
+    """工具位置索引
+
+    每个扫描根目录只做一次带深度限制和目录剪枝的扫描，结果连同文件
+    修改时间保存在配置中。查询时只对命中的条目做一次 stat 校验，
+    校验失败时在后台重新扫描，不阻塞调用方；没有任何候选时视为校验
+    失败，距上次扫描超过 TOOL_INDEX_MISS_TTL 秒则同步重新扫描一次。
+    """
+
+    def __init__(self, store=None, key="tool_index", max_depth=TOOL_INDEX_MAX_DEPTH, names=None,
+                 miss_ttl=TOOL_INDEX_MISS_TTL):
+        """初始化索引
+
+        Args:
+            store: 持久化存储，需提供 get(key, default)/set(key, value)，
+                   如全局 config；为None时只保存在内存中
+            key: 存储中的键名
+            max_depth: 扫描的最大目录深度
+            names: 额外需要索引的文件名
+            miss_ttl: 查询未命中时重新扫描的最短间隔（秒）
+        """
+        self.names = set(INDEXED_TOOL_NAMES) | {n.lower() for n in (names or ())}
+        self.store = store
+        self.key = key
+        self.max_depth = max_depth
+        self.miss_ttl = miss_ttl
+        self._lock = threading.Lock()
+        self._rescanning = set()
+        self._data = None
+
+    def _load(self):
+        if self._data is None:
+            data = self.store.get(self.key, {}) if self.store is not None else {}
+            # 使用副本，避免与存储中的对象共享（存储写盘时本线程可能正在修改）
+            self._data = copy.deepcopy(data) if isinstance(data, dict) else {}
+        return self._data
+
+    def _save(self):
+        if self.store is not None:
+            try:
+                self.store.set(self.key, self._data)
+            except Exception as e:
+                logging.getLogger("zipcracker").error(f"保存工具索引失败: {str(e)}")
+
+    @staticmethod
+    def _normalize_root(root):
+        return os.path.normcase(os.path.abspath(root or os.getcwd()))
+
+    def scan(self, root):
+        """同步扫描根目录并更新索引
+
+        Args:
+            root: 扫描根目录
+
+        Returns:
+            dict: 工具名（小写） -> [{"path", "mtime"}] 的映射
+        """
+        root = self._normalize_root(root)
+        tools = {}
+        stack = [(root, 0)]
+        while stack:
+            current, depth = stack.pop()
+            try:
+                entries = list(os.scandir(current))
+            except OSError:
+                continue
+            # 按名称排序，保证同一目录树的结果顺序稳定
+            entries.sort(key=lambda e: e.name.lower())
+            subdirs = []
+            for entry in entries:
+                lower = entry.name.lower()
+                try:
+                    is_dir = entry.is_dir(follow_symlinks=False)
+                except OSError:
+                    continue
+                matched = None
+                if not is_dir and lower in self.names:
+                    matched = lower
+                else:
+                    for prefix in INDEXED_TOOL_PREFIXES:
+                        if lower.startswith(prefix):
+                            matched = prefix + '*'
+                            break
+                if matched:
+                    try:
+                        mtime = entry.stat(follow_symlinks=False).st_mtime
+                    except OSError:
+                        mtime = 0
+                    tools.setdefault(matched, []).append({"path": entry.path, "mtime": mtime})
+                if is_dir and depth < self.max_depth:
+                    if lower in TOOL_INDEX_PRUNE_DIRS or lower.startswith('.'):
+                        continue
+                    subdirs.append(entry.path)
+            # 逆序入栈，按字母顺序深度优先
+            for path in reversed(subdirs):
+                stack.append((path, depth + 1))
+        with self._lock:
+            data = self._load()
+            data[root] = {"scanned_at": time.time(), "tools": tools}
+            self._save()
+        return tools
+
+    def rescan_async(self, root):
+        """在后台重新扫描根目录（同一根目录同时只有一个扫描）"""
+        root = self._normalize_root(root)
+        with self._lock:
+            if root in self._rescanning:
+                return
+            self._rescanning.add(root)
+
+        def worker():
+            try:
+                self.scan(root)
+            except Exception as e:
+                logging.getLogger("zipcracker").error(f"后台扫描工具目录失败: {str(e)}")
+            finally:
+                with self._lock:
+                    self._rescanning.discard(root)
+        threading.Thread(target=worker, daemon=True).start()
+
+    def find_all(self, name, root=None):
+        """查询根目录下某个工具的全部有效位置
+
+        Args:
+            name: 工具文件名，如 "john.exe"；以 * 结尾表示前缀匹配，如 "OpenCL*"
+            root: 扫描根目录，默认为当前工作目录
+
+        Returns:
+            list: 校验通过的路径列表
+        """
+        root = self._normalize_root(root)
+        key = name.lower()
+        with self._lock:
+            if not key.endswith('*') and key not in self.names:
+                # 新的工具名，需要重新扫描才能收录
+                self.names.add(key)
+                self._load().pop(root, None)
+            entry = self._load().get(root)
+        if entry is None:
+            # 首次查询该根目录，同步扫描一次
+            tools = self.scan(root)
+        else:
+            tools = entry.get("tools", {})
+            if not tools.get(key) and time.time() - entry.get("scanned_at", 0) >= self.miss_ttl:
+                # 未命中也是校验失败：工具可能在上次扫描后才安装，按TTL限频同步重扫
+                tools = self.scan(root)
+        candidates = tools.get(key, [])
+        valid = []
+        stale = False
+        for item in candidates:
+            try:
+                mtime = os.stat(item["path"]).st_mtime
+            except OSError:
+                stale = True
+                continue
+            if abs(mtime - item.get("mtime", 0)) > 1e-3:
+                stale = True
+            valid.append(item["path"])
+        if stale or (candidates and not valid):
+            self.rescan_async(root)
+        return valid
+
+    def find(self, name, root=None):
+        """查询根目录下某个工具的第一个有效位置，未找到返回None"""
+        paths = self.find_all(name, root)
+        return paths[0] if paths else None
+
+    def invalidate(self, root=None):
+        """丢弃根目录的索引，下次查询时重新扫描"""
+        root = self._normalize_root(root)
+        with self._lock:
+            if self._load().pop(root, None) is not None:
+                self._save()
+
+
+_tool_index = None
+_tool_index_lock = threading.Lock()
+
+
+def get_tool_index():
+    """获取保存在全局配置中的工具索引"""
+    global _tool_index
+    with _tool_index_lock:
+        if _tool_index is None:
+            from zipcracker_config import config
+            _tool_index = ToolIndex(store=config)
+        return _tool_index
+
+
+# 能力探测的命令超时（秒）
+TOOL_PROBE_TIMEOUT = 15
+
+# 空设备列表的缓存时间（秒）：驱动/OpenCL装好后不必等hashcat本身变化就能重新探测到
+EMPTY_DEVICES_TTL = 600
+
+
+def _run_probe(cmd, timeout=TOOL_PROBE_TIMEOUT):
+    """运行探测命令，返回合并后的stdout+stderr文本；超时或无法执行时返回None"""
+    kwargs = {}
+    if sys.platform == "win32":
+        kwargs["creationflags"] = getattr(subprocess, "CREATE_NO_WINDOW", 0)
+    try:
+        process = subprocess.run(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            timeout=timeout,
+            **kwargs
+        )
+    except (OSError, subprocess.SubprocessError) as e:
+        logging.getLogger("zipcracker").error(f"探测命令失败: {' '.join(cmd)}, {str(e)}")
+        return None
+    output = process.stdout.decode("utf-8", errors="ignore")
+    error = process.stderr.decode("utf-8", errors="ignore")
+    return output + error if error else output
+
+
+def _parse_hashcat_devices(output):
+    """从 hashcat -I 或 --benchmark --machine-readable 的输出中提取显卡名称"""
+    devices = []
+    for line in output.splitlines():
+        m = re.search(r'Name.*?:\s*(NVIDIA.*|AMD.*)', line)
+        if not m:
+            m = re.search(r'DEVICE_NAME:(.*?)(?:,|$)', line)
+        if m:
+            device_name = m.group(1).strip()
+            if device_name and device_name not in devices:
+                devices.append(device_name)
+    if not devices:
+        for line in output.splitlines():
+            if "NVIDIA" in line or "AMD" in line:
+                line = line.strip()
+                if line not in devices:
+                    devices.append(line)
+    return devices
+
+
+class ToolProbeCache:
+    """工具能力探测缓存
+
+    以可执行文件的路径、大小和修改时间作为指纹，缓存版本号、支持的
+    格式/模式和设备列表等探测结果。指纹不变时直接返回缓存，工具被
+    替换或升级后自动重新探测。
+    """
+
+    def __init__(self, store=None, key="tool_probes"):
+        """初始化缓存
+
+        Args:
+            store: 持久化存储，需提供 get(key, default)/set(key, value)；
+                   为None时只保存在内存中
+            key: 存储中的键名
+        """
+        self.store = store
+        self.key = key
+        self._lock = threading.Lock()
+        self._data = None
+
+    def _load(self):
+        if self._data is None:
+            data = self.store.get(self.key, {}) if self.store is not None else {}
+            # 使用副本，避免与存储中的对象共享（存储写盘时本线程可能正在修改）
+            self._data = copy.deepcopy(data) if isinstance(data, dict) else {}
+        return self._data
+
+    def _save(self):
+        if self.store is not None:
+            try:
+                self.store.set(self.key, self._data)
+            except Exception as e:
+                logging.getLogger("zipcracker").error(f"保存工具探测缓存失败: {str(e)}")
+
+    @staticmethod
+    def fingerprint(exe):
+        """计算可执行文件的指纹
+
+        Args:
+            exe: 可执行文件路径或PATH中的命令名
+
+        Returns:
+            tuple: (规范化路径, 大小, 修改时间)，文件不存在时返回None
+        """
+        if not exe:
+            return None
+        path = exe if os.path.isfile(exe) else shutil.which(exe)
+        if not path:
+            return None
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return os.path.normcase(os.path.abspath(path)), st.st_size, st.st_mtime
+
+    def probe(self, exe, kind, func, empty_ttl=None):
+        """获取一项探测结果，必要时调用func重新探测
+
+        Args:
+            exe: 可执行文件路径
+            kind: 探测项名称，如 "version"
+            func: 实际探测函数，参数为exe，返回可JSON序列化的结果；
+                  返回None表示探测失败，不写入缓存
+            empty_ttl: 空结果（如空列表）的缓存秒数，为None时与其他结果一样
+                       一直有效到工具变化
+
+        Returns:
+            探测结果，失败时返回None
+        """
+        fp = self.fingerprint(exe)
+        if fp is None:
+            # 无法取得指纹，不缓存
+            return func(exe)
+        path, size, mtime = fp
+        with self._lock:
+            entry = self._load().get(path)
+            if entry and entry.get("size") == size and abs(entry.get("mtime", 0) - mtime) < 1e-3:
+                probes = entry.get("probes", {})
+                if kind in probes:
+                    probed_at = entry.get("probed_at", {}).get(kind, 0)
+                    if probes[kind] or empty_ttl is None or time.time() - probed_at < empty_ttl:
+                        return probes[kind]
+        result = func(exe)
+        if result is None:
+            return None
+        with self._lock:
+            data = self._load()
+            entry = data.get(path)
+            if not entry or entry.get("size") != size or abs(entry.get("mtime", 0) - mtime) >= 1e-3:
+                entry = {"size": size, "mtime": mtime, "probes": {}}
+                data[path] = entry
+            entry["probes"][kind] = result
+            entry.setdefault("probed_at", {})[kind] = time.time()
+            self._save()
+        return result
+
+    def invalidate(self, exe=None):
+        """丢弃某个工具（或全部工具）的探测结果"""
+        with self._lock:
+            data = self._load()
+            if exe is None:
+                data.clear()
+            else:
+                fp = self.fingerprint(exe)
+                path = fp[0] if fp else os.path.normcase(os.path.abspath(exe))
+                data.pop(path, None)
+            self._save()
+
+    def get_version_output(self, exe, timeout=TOOL_PROBE_TIMEOUT):
+        """获取 `exe --version` 的输出"""
+        def run(exe):
+            output = _run_probe([exe, "--version"], timeout=timeout)
+            return output.strip() if output and output.strip() else None
+        return self.probe(exe, "version", run)
+
+    def get_hashcat_version(self, exe):
+        """获取Hashcat的(主版本, 次版本, 原始输出)，无法解析时返回None"""
+        output = self.get_version_output(exe)
+        if not output:
+            return None
+        match = re.search(r'v?(\d+)\.(\d+)', output)
+        if not match:
+            return None
+        return int(match.group(1)), int(match.group(2)), output
+
+    def get_john_banner(self, exe, timeout=TOOL_PROBE_TIMEOUT):
+        """获取John不带参数运行时的横幅，不是John时返回None"""
+        def run(exe):
+            output = _run_probe([exe], timeout=timeout)
+            return output if output and "John the Ripper" in output else None
+        return self.probe(exe, "banner", run)
+
+    def get_john_formats(self, exe):
+        """获取 `john --list=formats` 的输出"""
+        def run(exe):
+            output = _run_probe([exe, "--list=formats"])
+            return output if output and output.strip() else None
+        return self.probe(exe, "formats", run)
+
+    def get_hashcat_modes(self, exe):
+        """获取Hashcat支持的哈希模式编号列表"""
+        def run(exe):
+            output = _run_probe([exe, "--help"])
+            if not output:
+                return None
+            modes = sorted({int(m) for m in re.findall(r'^\s*(\d+)\s*\|', output, re.MULTILINE)})
+            return modes or None
+        return self.probe(exe, "modes", run)
+
+    def get_hashcat_devices(self, exe):
+        """获取Hashcat可用的显卡设备名称列表
+
+        优先解析 `hashcat -I`，失败时降级为 --benchmark --machine-readable。
+        没有找到设备时只缓存 EMPTY_DEVICES_TTL 秒。
+        """
+        def run(exe):
+            output = _run_probe([exe, "-I"])
+            devices = _parse_hashcat_devices(output) if output else []
+            if not devices:
+                output = _run_probe([exe, "--benchmark", "--machine-readable"], timeout=60)
+                devices = _parse_hashcat_devices(output) if output else []
+            return devices if output is not None else None
+        return self.probe(exe, "devices", run, empty_ttl=EMPTY_DEVICES_TTL)
+
+
+_tool_probes = None
+_tool_probes_lock = threading.Lock()
+
+
+def get_tool_probes():
+    """获取保存在全局配置中的工具探测缓存"""
+    global _tool_probes
+    with _tool_probes_lock:
+        if _tool_probes is None:
+            from zipcracker_config import config
+            _tool_probes = ToolProbeCache(store=config)
+        return _tool_probes
@@ -13,12 +13,19 @@ import datetime
 import traceback
 import tempfile
 import subprocess
-from PyQt5 import QtCore, QtWidgets
+import threading
+import hashlib
+import atexit
+from PyQt5 import QtCore, QtWidgets, QtGui
 import shutil
 import logging
 from logging.handlers import RotatingFileHandler
 from zipcracker_config import config
+from zipcracker_tools import get_tool_probes
+from zipcracker_extractors import extract_native_hash, extract_rar_hash, NATIVE_EXTRACTORS
 import re
+import html
+from collections import deque
 
 def log_error(error):
     """记录错误到日志文件（使用标准logging）
@@ -56,6 +63,10 @@ def get_ui_update_handler():
     global _ui_update_handler
     if _ui_update_handler is None:
         _ui_update_handler = UiUpdateHandler()
+        # 确保处理器归属UI线程，子线程发出的信号才会排队到UI线程执行
+        app = QtWidgets.QApplication.instance()
+        if app is not None and _ui_update_handler.thread() != app.thread():
+            _ui_update_handler.moveToThread(app.thread())
     return _ui_update_handler
 
 def safe_ui_update(func):
@@ -70,25 +81,9 @@ def safe_ui_update(func):
             # 在主线程中，直接调用
             func()
         else:
-            # 在子线程中，使用QMetaObject.invokeMethod
-            # 为函数创建一个包装器槽函数
-            class FunctionWrapper(QtCore.QObject):
-                @QtCore.pyqtSlot()
-                def run(self):
-                    try:
-                        func()
-                    except Exception as e:
-                        print(f"UI更新错误: {str(e)}")
-                        log_error(e)
-            
-            # 创建包装器对象
-            wrapper = FunctionWrapper()
-            # 使用invokeMethod调用槽函数
-            QtCore.QMetaObject.invokeMethod(
-                wrapper,
-                "run",
-                QtCore.Qt.QueuedConnection
-            )
+            # 在子线程中（包括没有事件循环的Python线程），
+            # 通过归属UI线程的处理器信号排队执行
+            get_ui_update_handler().update_signal.emit(func)
     except Exception as e:
         print(f"UI更新出错: {str(e)}")
         log_error(e)
@@ -96,7 +91,7 @@ def safe_ui_update(func):
 def extract_rar_hash_py(file_path):
     """使用Python提取RAR文件的哈希
     
-    这是一个简化版的rar2john实现，用于在rar2john工具不可用时提供备用方案
+    直接解析RAR5/RAR3头部，在rar2john工具不可用时提供备用方案
     
     Args:
         file_path (str): RAR文件路径
@@ -105,142 +100,14 @@ def extract_rar_hash_py(file_path):
         str: 提取的哈希值，失败则返回None
     """
     try:
-        # 尝试导入必要的模块
-        try:
-            import binascii
-            import struct
-        except ImportError as e:
-            log_error(f"导入模块失败: {str(e)}")
-            return None
-            
-        print(f"尝试用Python提取RAR哈希: {file_path}")
-        
-        # RAR文件头标志
-        RAR_ID = b"Rar!\x1a\x07\x00"
-        RAR5_ID = b"Rar!\x1a\x07\x01\x00"
-        
-        # 打开文件并读取头部
-        with open(file_path, 'rb') as f:
-            # 读取前8个字节来识别RAR版本
-            signature = f.read(8)
-            
-            # 检查是否是RAR文件
-            if signature.startswith(RAR_ID):
-                # RAR 4.x
-                print("检测到RAR 4.x格式")
-                # 重置文件指针
-                f.seek(0)
-                
-                # 寻找加密的文件头
-                while True:
-                    pos = f.tell()
-                    header = f.read(7)
-                    if len(header) < 7:
-                        break  # 文件结束
-                    
-                    # 解析头部
-                    try:
-                        crc, header_type, flags, size = struct.unpack("<HBHH", header)
-                        
-                        # 检查是否为文件头
-                        if header_type == 0x74:  # 文件头
-                            if flags & 0x04:  # 检查是否加密
-                                print(f"找到加密文件头 位置: {pos}")
-                                # 读取盐值
-                                f.seek(pos + 24)
-                                salt = f.read(8)
-                                if len(salt) == 8:
-                                    salt_hex = binascii.hexlify(salt).decode('ascii')
-                                    hash_line = f"$RAR3$*0*{salt_hex}*0*{os.path.basename(file_path)}"
-                                    print(f"提取的RAR哈希: {hash_line}")
-                                    return hash_line
-                        
-                        # 跳到下一个头部
-                        f.seek(pos + size)
-                    except:
-                        # 结构解析错误，尝试继续
-                        f.seek(pos + 1)
-                
-                print("未找到加密的RAR文件头")
-                return None
-                
-            elif signature.startswith(RAR5_ID):
-                # RAR 5.x
-                print("检测到RAR 5.x格式")
-                # 简单检测RAR5是否加密（具体算法比较复杂）
-                f.seek(0)
-                
-                # RAR5需要更复杂的算法支持，这里只是检测可能的加密标志
-                try:
-                    # 跳过签名
-                    f.seek(8)
-                    
-                    # 读取头部CRC
-                    header_crc = f.read(4)
-                    
-                    # 读取头部类型
-                    vint = read_vint(f)
-                    header_type = vint & 0x7f
-                    
-                    # 如果是主头部（类型为1）
-                    if header_type == 1:
-                        # 读取头部标志
-                        vint = read_vint(f)
-                        flags = vint
-                        
-                        # 检查是否设置了加密标志（第2位）
-                        if flags & 0x02:
-                            print("检测到RAR5文件可能加密")
-                            # 返回一个简单的RAR5哈希格式
-                            hash_line = f"$RAR5$*{os.path.basename(file_path)}*这个文件是RAR5格式，需要专业工具提取哈希"
-                            return hash_line
-                except:
-                    print("RAR5格式解析失败")
-                
-                print("RAR5格式，需要使用rar2john工具提取哈希")
-                return None
-            else:
-                print("文件不是RAR格式")
-                return None
+        hash_line = extract_rar_hash(file_path)
+        if not hash_line:
+            logging.getLogger("zipcracker").info(f"未找到加密的RAR文件头: {file_path}")
+        return hash_line
     except Exception as e:
         log_error(f"Python提取RAR哈希失败: {str(e)}")
-        print(f"Python提取RAR哈希失败: {str(e)}")
         return None
 
-def read_vint(f):
-    """读取RAR5中的可变长整数
-    
-    Args:
-        f: 文件对象
-    
-    Returns:
-        int: 可变长整数值
-    """
-    b = ord(f.read(1))
-    if (b & 0x80) == 0:
-        return b
-    
-    value = b & 0x7f
-    
-    b = ord(f.read(1))
-    value |= (b & 0x7f) << 7
-    if (b & 0x80) == 0:
-        return value
-    
-    b = ord(f.read(1))
-    value |= (b & 0x7f) << 14
-    if (b & 0x80) == 0:
-        return value
-    
-    b = ord(f.read(1))
-    value |= (b & 0x7f) << 21
-    if (b & 0x80) == 0:
-        return value
-    
-    b = ord(f.read(1))
-    value |= (b & 0x7f) << 28
-    return value
-
 def fix_hash_format(hash_value, file_ext, hash_file):
     """修复哈希格式以兼容hashcat
     
@@ -311,6 +178,28 @@ def check_perl():
         return True
     return False
 
+def normalize_extracted_hash(hash_value, file_ext):
+    """清理提取出的哈希：去除空白和空行，只保留第一行，RAR5只保留$rar5$部分
+    
+    Args:
+        hash_value (str): extract_hash_safe 返回的哈希值
+        file_ext (str): 文件扩展名（不含点）
+    
+    Returns:
+        str: 清理后的哈希值
+    """
+    if not hash_value:
+        return hash_value
+    hash_value = hash_value.strip()
+    if "\n" in hash_value:
+        lines = [line.strip() for line in hash_value.split("\n") if line.strip()]
+        hash_value = lines[0] if lines else ""
+    if file_ext == "rar" and "$rar5$" in hash_value:
+        match = re.search(r'(\$rar5\$[^\s]+)', hash_value)
+        if match:
+            hash_value = match.group(1)
+    return hash_value
+
 def extract_hash_safe(john_path, file_path, file_ext):
     """安全提取哈希值
     
@@ -324,6 +213,13 @@ def extract_hash_safe(john_path, file_path, file_ext):
     """
     logger = logging.getLogger("zipcracker")
     try:
+        # 优先使用原生解析器，不需要启动外部工具
+        native_hash = extract_native_hash(file_path, file_ext)
+        if native_hash:
+            hash_file = write_hash_file(native_hash)
+            logger.info(f"原生解析提取哈希成功: {native_hash[:80]}...")
+            return native_hash, hash_file
+        
         # 检查John路径
         if not john_path:
             log_error("John the Ripper路径未设置")
@@ -626,7 +522,7 @@ def extract_hash_safe(john_path, file_path, file_ext):
             # 再尝试perl脚本
             if script_pl:
                 if not check_perl():
-                    QtWidgets.QMessageBox.critical(None, "缺少 Perl 环境", "检测到您需要提取哈希的文件类型（如 Office）需要 Perl 解释器支持。\n\n请先安装 Perl（推荐 Strawberry Perl），并确保其已加入系统 PATH 环境变量。\n\n否则无法正常提取哈希！")
+                    _extract_error_dialog("检测到您需要提取哈希的文件类型（如 Office）需要 Perl 解释器支持。\n\n请先安装 Perl（推荐 Strawberry Perl），并确保其已加入系统 PATH 环境变量。\n\n否则无法正常提取哈希！", title="缺少 Perl 环境")
                     return None, None
                 cmd = ["perl", script_pl, file_path]
                 logger.info(f"执行命令: {' '.join(cmd)}")
@@ -650,7 +546,7 @@ def extract_hash_safe(john_path, file_path, file_ext):
                 else:
                     logger.info(f"office2john.pl 未输出哈希")
             if not script_py and not script_pl:
-                show_error_dialog(None, "未找到 office2john.py 或 office2john.pl，请确认 John the Ripper 目录下存在该脚本。\n\n否则无法正常提取哈希！", title="缺少 Office2John 脚本")
+                _extract_error_dialog("未找到 office2john.py 或 office2john.pl，请确认 John the Ripper 目录下存在该脚本。\n\n否则无法正常提取哈希！", title="缺少 Office2John 脚本")
                 log_error(f"无法提取哈希值: {file_path}")
                 logger.error(f"哈希提取失败: {file_path}")
                 return None, None
@@ -659,8 +555,7 @@ def extract_hash_safe(john_path, file_path, file_ext):
             print(f"哈希提取失败: {file_path}")
             return None, None
         # 构建命令
-        cmd = [john_exe, "--list=formats"]
-        output = run_cmd_with_output(cmd)
+        output = get_tool_probes().get_john_formats(john_exe) or ""
         logger.info(f"支持的格式: {output}")
         if format_arg:
             format_name = format_arg[9:]
@@ -709,6 +604,118 @@ def extract_hash_safe(john_path, file_path, file_ext):
         print(f"哈希提取异常: {str(e)}")
         return None, None
 
+# 缓存命中和原生提取的哈希文件统一写在一个进程级临时目录中，退出时删除
+_hash_file_dir = None
+_hash_file_dir_lock = threading.Lock()
+
+def write_hash_file(hash_value):
+    """把哈希写入进程级临时目录，同一哈希复用同一个文件
+    
+    Args:
+        hash_value (str): 哈希值
+    
+    Returns:
+        str: 哈希文件路径
+    """
+    global _hash_file_dir
+    with _hash_file_dir_lock:
+        if _hash_file_dir is None or not os.path.isdir(_hash_file_dir):
+            _hash_file_dir = tempfile.mkdtemp(prefix="zipcracker_")
+            atexit.register(shutil.rmtree, _hash_file_dir, True)
+    name = hashlib.sha256(hash_value.encode("utf-8")).hexdigest()[:32]
+    hash_file = os.path.join(_hash_file_dir, f"{name}.txt")
+    if not os.path.exists(hash_file):
+        # 先写临时文件再改名，并发写同一哈希时其他线程不会读到半个文件
+        temp_file = f"{hash_file}.{threading.get_ident()}.tmp"
+        with open(temp_file, "w", encoding="utf-8") as f:
+            f.write(hash_value)
+        os.replace(temp_file, hash_file)
+    return hash_file
+
+def extract_hash_cached(john_path, file_path, file_ext, wait_prefetch=True):
+    """带缓存的哈希提取：同一文件或内容相同的副本只调用一次提取工具
+    
+    Args:
+        john_path (str): John the Ripper路径
+        file_path (str): 文件路径
+        file_ext (str): 文件扩展名
+        wait_prefetch (bool): 该文件正在后台预提取时先等待其完成
+    
+    Returns:
+        tuple: (哈希值, 哈希文件路径)
+    """
+    from zipcracker_cache import get_hash_cache
+    if wait_prefetch:
+        get_hash_prefetcher().wait(file_path)
+    cache = get_hash_cache()
+    cached = cache.get(file_path, file_ext)
+    if cached:
+        logging.getLogger("zipcracker").info(f"哈希缓存命中: {file_path}")
+        try:
+            hash_file = write_hash_file(cached)
+        except OSError as e:
+            log_error(e)
+            hash_file = None
+        return cached, hash_file
+    hash_value, hash_file = extract_hash_safe(john_path, file_path, file_ext)
+    # 只缓存真正的哈希，不缓存工具输出的错误信息
+    if hash_value and "$" in hash_value:
+        cache.put(file_path, file_ext, hash_value)
+    return hash_value, hash_file
+
+# 当前线程启动的子进程是否降低优先级（后台预提取时使用）
+_cmd_priority = threading.local()
+
+# 当前线程的提取是否静默：只写日志不弹窗（后台预提取时使用）
+_extract_quiet = threading.local()
+
+def _extract_error_dialog(message, title):
+    """提取过程中的错误提示，静默模式下只写日志"""
+    if getattr(_extract_quiet, "enabled", False):
+        logging.getLogger("zipcracker").warning(f"{title}: {message}")
+    else:
+        show_error_dialog(None, message, title=title)
+
+_hash_prefetcher = None
+_hash_prefetcher_lock = threading.Lock()
+
+def _prefetch_extract(john_path, file_path, file_ext):
+    """预提取任务：以低优先级运行提取工具，结果写入哈希缓存"""
+    _cmd_priority.low = True
+    _extract_quiet.enabled = True
+    try:
+        extract_hash_cached(john_path, file_path, file_ext, wait_prefetch=False)
+    finally:
+        _cmd_priority.low = False
+        _extract_quiet.enabled = False
+
+def get_hash_prefetcher():
+    """获取全局哈希预提取器"""
+    global _hash_prefetcher
+    with _hash_prefetcher_lock:
+        if _hash_prefetcher is None:
+            from zipcracker_cache import HashPrefetcher
+            _hash_prefetcher = HashPrefetcher(_prefetch_extract)
+        return _hash_prefetcher
+
+def prefetch_hash(john_path, file_path):
+    """在后台预提取文件哈希，用户点击提取时可直接命中缓存
+    
+    Args:
+        john_path (str): John the Ripper路径
+        file_path (str): 文件路径
+    
+    Returns:
+        bool: 是否提交了预提取任务
+    """
+    if not john_path or not file_path or not os.path.isfile(file_path) or not is_supported_file(file_path):
+        return False
+    file_ext = os.path.splitext(file_path)[1].lower().lstrip('.')
+    # 只预提取有原生解析器的格式，其余格式等用户点击提取时再调用外部工具
+    if file_ext not in NATIVE_EXTRACTORS:
+        return False
+    return get_hash_prefetcher().submit(john_path, file_path, file_ext)
+
 def run_cmd_with_output(cmd, timeout=30):
     """运行命令并获取输出
     
@@ -728,12 +735,21 @@ def run_cmd_with_output(cmd, timeout=30):
         
         print(f"执行命令: {' '.join(cmd)}")
         
+        # 后台预提取时降低子进程优先级，避免影响前台操作
+        priority_kwargs = {}
+        if getattr(_cmd_priority, "low", False):
+            if sys.platform == "win32":
+                priority_kwargs["creationflags"] = subprocess.BELOW_NORMAL_PRIORITY_CLASS
+            else:
+                priority_kwargs["preexec_fn"] = lambda: os.nice(10)
+        
         # 运行命令
         process = subprocess.Popen(
             cmd,
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
-            startupinfo=startupinfo
+            startupinfo=startupinfo,
+            **priority_kwargs
         )
         
         # 等待命令完成
@@ -854,6 +870,211 @@ def get_logger(name=None):
     """获取logger实例"""
     return logging.getLogger(name)
 
+# hashcat状态块中的字段行，如 "Progress.........: 1024/10000 (10.24%)"
+_STATUS_LINE_RE = re.compile(
+    r'^(Session|Status|Hash\.[A-Za-z]+|Time\.[A-Za-z]+|Kernel\.[A-Za-z]+|Guess\.[A-Za-z]+|'
+    r'Speed\.#[\w*]+|Recovered(?:\.[A-Za-z]+)?|Progress|Rejected|Restore\.[A-Za-z]+|'
+    r'Candidates\.#[\w*]+|Candidate\.Engine|Hardware\.Mon\.#[\w*]+)\.*:\s*(.*)$'
+)
+# hashcat交互提示行
+_STATUS_PROMPT_RE = re.compile(r'^\[s\]tatus \[p\]ause')
+# 折叠后的状态行显示的字段
+_STATUS_SUMMARY_KEYS = ("Status", "Progress", "Speed.#*", "Speed.#1", "Recovered", "Time.Estimated")
+
+
+class _SessionRotatingFileHandler(RotatingFileHandler):
+    """记录本次会话轮转次数的RotatingFileHandler，便于导出时只取本次会话的文件"""
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.session_rollovers = 0
+    
+    def doRollover(self):
+        super().doRollover()
+        self.session_rollovers += 1
+    
+    def session_files(self):
+        """按时间顺序返回本次会话写入的日志文件"""
+        count = min(self.session_rollovers, self.backupCount)
+        files = [f"{self.baseFilename}.{i}" for i in range(count, 0, -1)]
+        files.append(self.baseFilename)
+        return [f for f in files if os.path.exists(f)]
+
+
+class LogPipeline(QtCore.QObject):
+    """批量、限速的日志管道
+    
+    任意线程都可以调用 append 入队，UI线程按固定间隔一次性把队列中的
+    消息插入 QPlainTextEdit。连续的hashcat状态块折叠成一行原地更新，
+    完整日志（含状态行）写入轮转文件，导出时直接从磁盘流式复制。
+    """
+    
+    def __init__(self, widget, interval=100, log_file=None, parent=None):
+        """初始化日志管道
+        
+        Args:
+            widget: 目标 QPlainTextEdit
+            interval: 刷新间隔（毫秒）
+            log_file: 完整日志文件路径，为None时不写文件
+            parent: 父对象
+        """
+        super().__init__(parent or widget)
+        self.widget = widget
+        self._queue = deque()
+        self._status = {}
+        self._status_is_last = False
+        self._file_handler = None
+        self._file_logger = None
+        if log_file:
+            try:
+                log_dir = os.path.dirname(log_file)
+                if log_dir:
+                    os.makedirs(log_dir, exist_ok=True)
+                handler = _SessionRotatingFileHandler(
+                    log_file,
+                    maxBytes=config.get("log_max_bytes", 5 * 1024 * 1024),
+                    backupCount=config.get("log_backup_count", 10),
+                    encoding="utf-8"
+                )
+                handler.setFormatter(logging.Formatter('%(message)s'))
+                # 每次启动从新文件开始，旧内容轮转为备份
+                if os.path.exists(log_file) and os.path.getsize(log_file) > 0:
+                    handler.doRollover()
+                    handler.session_rollovers = 0
+                self._file_handler = handler
+                self._file_logger = logging.getLogger(f"zipcracker.view.{id(self)}")
+                self._file_logger.propagate = False
+                self._file_logger.setLevel(logging.INFO)
+                self._file_logger.addHandler(handler)
+            except Exception as e:
+                print(f"创建日志文件失败: {str(e)}")
+                log_error(e)
+        self._timer = QtCore.QTimer(self)
+        self._timer.timeout.connect(self.flush)
+        self._timer.start(interval)
+    
+    def append(self, message, color=None, prefix=""):
+        """追加一条消息（线程安全）
+        
+        Args:
+            message: 消息文本，可包含多行
+            color: 显示颜色，为None时使用默认颜色
+            prefix: 每行前缀，如时间和级别
+        """
+        for line in str(message).split("\n"):
+            match = _STATUS_LINE_RE.match(line.strip())
+            if match or _STATUS_PROMPT_RE.match(line.strip()):
+                self._queue.append(("status", line.strip(), match, prefix))
+            else:
+                self._queue.append(("line", prefix + line, color, None))
+    
+    def append_html(self, html_text):
+        """追加一条原样显示的HTML消息（线程安全）"""
+        self._queue.append(("html", html_text, None, None))
+    
+    def _status_text(self, prefix):
+        """生成折叠后的状态行文本"""
+        parts = []
+        for key in _STATUS_SUMMARY_KEYS:
+            if key == "Speed.#1" and "Speed.#*" in self._status:
+                continue
+            if key in self._status:
+                parts.append(f"{key}: {self._status[key]}")
+        return prefix + "[状态] " + (" | ".join(parts) if parts else "hashcat运行中")
+    
+    def flush(self):
+        """把队列中的消息一次性写入文本框（仅在UI线程调用）"""
+        if not self._queue:
+            return
+        items = []
+        while self._queue:
+            try:
+                items.append(self._queue.popleft())
+            except IndexError:
+                break
+        # 先合并为操作序列：普通行依次追加，连续的状态行合并为一次更新
+        ops = []
+        file_lines = []
+        for kind, text, extra, prefix in items:
+            if kind == "status":
+                file_lines.append(prefix + text)
+                if extra is not None:
+                    key, value = extra.group(1), extra.group(2).strip()
+                    if key == "Session":
+                        self._status = {}
+                    self._status[key] = value
+                if ops and ops[-1][0] == "status":
+                    ops[-1] = ("status", self._status_text(prefix))
+                else:
+                    ops.append(("status", self._status_text(prefix)))
+            elif kind == "line":
+                file_lines.append(text)
+                style = f" style='color: {extra};'" if extra else ""
+                ops.append(("block", f"<span{style}>{html.escape(text)}</span>"))
+            else:
+                ops.append(("block", text))
+        if self._file_logger and file_lines:
+            try:
+                self._file_logger.info("\n".join(file_lines))
+            except Exception:
+                pass
+        try:
+            doc = self.widget.document()
+            cursor = QtGui.QTextCursor(doc)
+            cursor.beginEditBlock()
+            for op, content in ops:
+                cursor.movePosition(QtGui.QTextCursor.End)
+                if op == "status":
+                    content = f"<span style='color: #9E9E9E;'>{html.escape(content)}</span>"
+                    if self._status_is_last:
+                        # 原地替换最后一行状态
+                        cursor.movePosition(QtGui.QTextCursor.StartOfBlock, QtGui.QTextCursor.KeepAnchor)
+                        cursor.removeSelectedText()
+                        cursor.setCharFormat(QtGui.QTextCharFormat())
+                        cursor.insertHtml(content)
+                        continue
+                if not doc.isEmpty():
+                    cursor.insertBlock()
+                # 重置字符格式，避免新行继承上一行的颜色
+                cursor.setCharFormat(QtGui.QTextCharFormat())
+                cursor.insertHtml(content)
+                self._status_is_last = (op == "status")
+            cursor.endEditBlock()
+            scrollbar = self.widget.verticalScrollBar()
+            scrollbar.setValue(scrollbar.maximum())
+        except Exception as e:
+            print(f"刷新日志出错: {str(e)}")
+    
+    def clear(self):
+        """清空文本框，并让导出从此刻重新开始"""
+        self._queue.clear()
+        self._status = {}
+        self._status_is_last = False
+        self.widget.clear()
+        if self._file_handler:
+            try:
+                self._file_handler.doRollover()
+                self._file_handler.session_rollovers = 0
+            except Exception as e:
+                log_error(e)
+    
+    def export(self, filename):
+        """把本次会话的完整日志从磁盘流式复制到目标文件
+        
+        Args:
+            filename: 导出文件路径
+        """
+        self.flush()
+        if not self._file_handler:
+            with open(filename, "w", encoding="utf-8") as f:
+                f.write(self.widget.toPlainText())
+            return
+        self._file_handler.flush()
+        with open(filename, "wb") as out:
+            for path in self._file_handler.session_files():
+                with open(path, "rb") as src:
+                    shutil.copyfileobj(src, out)
+
 def show_error_dialog(parent, message, detail=None, suggestion=None, title="错误"): 
     """弹出错误对话框并写入日志，可选详细信息和建议"""
     import logging
@@ -865,7 +1086,8 @@ def show_error_dialog(parent, message, detail=None, suggestion=None, title="错
     if suggestion:
         full_msg += f"\n\n建议: {suggestion}"
     logger.error(full_msg)
-    QtWidgets.QMessageBox.critical(parent, title, full_msg)
+    # 提取哈希等后台线程也会调用，统一排队到UI线程弹窗
+    safe_ui_update(lambda: QtWidgets.QMessageBox.critical(parent, title, full_msg))
 
 def show_info_dialog(parent, message, detail=None, suggestion=None, title="提示"): 
     """弹出信息对话框并写入日志，可选详细信息和建议"""
@@ -878,4 +1100,4 @@ def show_info_dialog(parent, message, detail=None, suggestion=None, title="提
     if suggestion:
         full_msg += f"\n\n建议: {suggestion}"
     logger.info(full_msg)
-    QtWidgets.QMessageBox.information(parent, title, full_msg) 
\ No newline at end of file
+    safe_ui_update(lambda: QtWidgets.QMessageBox.information(parent, title, full_msg)) 
\ No newline at end of file
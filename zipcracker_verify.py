@@ -0,0 +1,427 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+ZIP Cracker - 原生密码校验模块
+负责在进程内按哈希格式直接校验候选密码，常用密码和已知密码无需启动hashcat/john即可确认
+"""
+
+import os
+import sys
+import time
+import zlib
+import hmac
+import struct
+import hashlib
+import threading
+import binascii
+
+from zipcracker_store import get_result_store, mutate_passwords
+from zipcracker_extractors import PKZIP_MIN_PARTIAL_ENTRIES
+
+COMMON_PASSWORDS_FILE = "common_passwords.txt"
+
+# 提取哈希后进程内预检的时间上限（秒），慢哈希在时限内只校验排在前面的候选
+PRECHECK_TIME_BUDGET = 2.0
+
+# 每校验多少个候选检查一次时限和停止标志
+PRECHECK_CHECK_INTERVAL = 16
+
+# RAR5迭代次数的对数上限，超出时视为异常哈希不做原生校验
+RAR5_MAX_LG2_COUNT = 24
+
+# PDF标准安全处理程序的密码填充串
+PDF_PADDING = bytes.fromhex(
+    "28bf4e5e4e758a4164004e56fffa01082e2e00b6d0683e802f0ca9fe6453697a")
+
+
+def _crc_table():
+    table = []
+    for i in range(256):
+        c = i
+        for _ in range(8):
+            c = (c >> 1) ^ 0xEDB88320 if c & 1 else c >> 1
+        table.append(c)
+    return table
+
+
+_CRC_TABLE = _crc_table()
+
+
+def _rc4(key, data):
+    """RC4加解密（纯Python实现，仅用于校验少量字节）"""
+    s = list(range(256))
+    j = 0
+    key_len = len(key)
+    for i in range(256):
+        j = (j + s[i] + key[i % key_len]) & 0xFF
+        s[i], s[j] = s[j], s[i]
+    out = bytearray(len(data))
+    i = j = 0
+    for n, c in enumerate(data):
+        i = (i + 1) & 0xFF
+        j = (j + s[i]) & 0xFF
+        s[i], s[j] = s[j], s[i]
+        out[n] = c ^ s[(s[i] + s[j]) & 0xFF]
+    return bytes(out)
+
+
+def _unhex(text):
+    return binascii.unhexlify(text)
+
+
+# ---------------------------------------------------------------- ZIP
+
+def _zip_crypto_keys(password):
+    """按密码初始化ZipCrypto的三个密钥"""
+    table = _CRC_TABLE
+    k0, k1, k2 = 0x12345678, 0x23456789, 0x34567890
+    for c in password:
+        k0 = table[(k0 ^ c) & 0xFF] ^ (k0 >> 8)
+        k1 = ((k1 + (k0 & 0xFF)) * 134775813 + 1) & 0xFFFFFFFF
+        k2 = table[(k2 ^ (k1 >> 24)) & 0xFF] ^ (k2 >> 8)
+    return k0, k1, k2
+
+
+def _zip_crypto_decrypt(keys, data):
+    """用ZipCrypto密钥解密数据
+
+    Returns:
+        tuple: (明文, 解密后的密钥状态)
+    """
+    table = _CRC_TABLE
+    k0, k1, k2 = keys
+    out = bytearray(len(data))
+    for n, c in enumerate(data):
+        t = (k2 | 2) & 0xFFFF
+        p = c ^ (((t * (t ^ 1)) >> 8) & 0xFF)
+        out[n] = p
+        k0 = table[(k0 ^ p) & 0xFF] ^ (k0 >> 8)
+        k1 = ((k1 + (k0 & 0xFF)) * 134775813 + 1) & 0xFFFFFFFF
+        k2 = table[(k2 ^ (k1 >> 24)) & 0xFF] ^ (k2 >> 8)
+    return bytes(out), (k0, k1, k2)
+
+
+def _parse_pkzip2(hash_value):
+    """解析 $pkzip2$C*B*[DT*MT{CL*UL*CR*OF*OX}*CT*DL*CS*TC*DA]*$/pkzip2$
+
+    Returns:
+        tuple: (校验字节数, 条目列表)
+    """
+    body = hash_value[len("$pkzip2$"):]
+    end = body.find("*$/pkzip2$")
+    if end < 0:
+        raise ValueError("缺少$/pkzip2$结束标记")
+    fields = body[:end].split("*")
+    count, check_bytes = int(fields[0], 16), int(fields[1], 16)
+    pos = 2
+    entries = []
+    for _ in range(count):
+        data_type = int(fields[pos], 16)
+        pos += 2  # DT, MT
+        entry = {"data_type": data_type}
+        if data_type == 3:
+            raise ValueError("数据未内联在哈希中")
+        if data_type != 1:
+            entry["compress_size"] = int(fields[pos], 16)
+            entry["crc"] = int(fields[pos + 2], 16)
+            pos += 5  # CL, UL, CR, OF, OX
+        entry["method"] = int(fields[pos], 16)
+        data_len = int(fields[pos + 1], 16)
+        entry["checksum"] = int(fields[pos + 2], 16)
+        entry["time_checksum"] = int(fields[pos + 3], 16)
+        entry["data"] = _unhex(fields[pos + 4])[:data_len]
+        pos += 5
+        if len(entry["data"]) < 12:
+            raise ValueError("数据长度不足")
+        entries.append(entry)
+    return check_bytes, entries
+
+
+def _pkzip_check_byte_ok(header, entry, check_bytes):
+    """加密头末尾的校验字节需与CRC高位或修改时间一致（置位数据描述符时使用修改时间）"""
+    for value in (entry["checksum"], entry["time_checksum"]):
+        if header[11] == value >> 8 and (check_bytes < 2 or header[10] == value & 0xFF):
+            return True
+    return False
+
+
+def _pkzip_full_ok(keys, entry):
+    """解密完整数据并校验CRC"""
+    plain, _ = _zip_crypto_decrypt(keys, entry["data"][12:])
+    try:
+        if entry["method"] == 8:
+            plain = zlib.decompressobj(-15).decompress(plain)
+        elif entry["method"] != 0:
+            return False
+    except zlib.error:
+        return False
+    return zlib.crc32(plain) & 0xFFFFFFFF == entry["crc"]
+
+
+def _pkzip_partial_ok(keys, entry):
+    """解密部分数据并检查能否作为deflate流开头解压"""
+    if entry["method"] != 8 or len(entry["data"]) <= 12:
+        return True
+    plain, _ = _zip_crypto_decrypt(keys, entry["data"][12:])
+    try:
+        zlib.decompressobj(-15).decompress(plain)
+    except zlib.error:
+        return False
+    return True
+
+
+def _pkzip2_verifier(hash_value):
+    check_bytes, entries = _parse_pkzip2(hash_value)
+    full = [e for e in entries if e["data_type"] == 2 and e["method"] in (0, 8)
+            and len(e["data"]) >= e["compress_size"]]
+    if not full and len(entries) < PKZIP_MIN_PARTIAL_ENTRIES:
+        raise ValueError("缺少可靠的校验数据")
+
+    def verify(password):
+        keys = _zip_crypto_keys(password.encode("utf-8"))
+        passed = []
+        for entry in entries:
+            header, after = _zip_crypto_decrypt(keys, entry["data"][:12])
+            if not _pkzip_check_byte_ok(header, entry, check_bytes):
+                return False
+            passed.append((entry, after))
+        # 校验字节全部通过后（约1/256概率）再做解密解压校验
+        for entry, after in passed:
+            if any(entry is e for e in full):
+                if not _pkzip_full_ok(after, entry):
+                    return False
+            elif not _pkzip_partial_ok(after, entry):
+                return False
+        return True
+    return verify
+
+
+def _zip2_verifier(hash_value):
+    """$zip2$*Ty*Mo*Ma*Sa*Va*Le*DF*Auth*$/zip2$（WinZip AES）"""
+    fields = hash_value.split("*")
+    strength = int(fields[2])
+    salt, check = _unhex(fields[4]), _unhex(fields[5])
+    length = int(fields[6], 16)
+    payload, auth = _unhex(fields[7]), _unhex(fields[8])
+    key_len = {1: 16, 2: 24, 3: 32}[strength]
+    if len(payload) != length or len(auth) != 10 or len(check) != 2:
+        raise ValueError("数据不完整，无法校验HMAC")
+
+    def verify(password):
+        derived = hashlib.pbkdf2_hmac("sha1", password.encode("utf-8"), salt, 1000, key_len * 2 + 2)
+        if derived[-2:] != check:
+            return False
+        mac = hmac.new(derived[key_len:key_len * 2], payload, hashlib.sha1).digest()
+        return mac[:10] == auth
+    return verify
+
+
+# ---------------------------------------------------------------- RAR5
+
+def _rar5_verifier(hash_value):
+    """$rar5$16$salt$lg2count$iv$8$pswcheck：PBKDF2-HMAC-SHA256(count+32) 折叠为8字节"""
+    fields = hash_value.split("$")
+    salt, lg2_count, check = _unhex(fields[3]), int(fields[4]), _unhex(fields[7])
+    if lg2_count > RAR5_MAX_LG2_COUNT or len(check) != 8:
+        raise ValueError("迭代次数异常")
+    iterations = (1 << lg2_count) + 32
+
+    def verify(password):
+        derived = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, iterations, 32)
+        folded = bytearray(8)
+        for i, b in enumerate(derived):
+            folded[i % 8] ^= b
+        return bytes(folded) == check
+    return verify
+
+
+# ---------------------------------------------------------------- PDF
+
+def _pdf_verifier(hash_value):
+    """$pdf$V*R*Len*P*EM*idlen*id*ulen*U*olen*O，支持R2-R5（R6需要AES，交给hashcat）"""
+    fields = hash_value[len("$pdf$"):].split("*")
+    revision, length = int(fields[1]), int(fields[2])
+    permissions, encrypt_metadata = int(fields[3]), int(fields[4])
+    doc_id, user, owner = _unhex(fields[6]), _unhex(fields[8]), _unhex(fields[10])
+
+    if revision == 5:
+        if len(user) < 40:
+            raise ValueError("U值长度不足")
+
+        def verify_r5(password):
+            data = password.encode("utf-8")[:127] + user[32:40]
+            return hashlib.sha256(data).digest() == user[:32]
+        return verify_r5
+    if revision not in (2, 3, 4) or len(user) < 16 or len(owner) < 32:
+        raise ValueError("不支持的修订版本")
+
+    key_len = 5 if revision == 2 else max(5, min(16, length // 8))
+    tail = owner[:32] + struct.pack("<i", permissions) + doc_id
+    if revision >= 4 and not encrypt_metadata:
+        tail += b"\xff\xff\xff\xff"
+    user_seed = hashlib.md5(PDF_PADDING + doc_id).digest()
+
+    def verify(password):
+        pw = password.encode("latin-1", errors="ignore")[:32]
+        key = hashlib.md5(pw + PDF_PADDING[:32 - len(pw)] + tail).digest()[:key_len]
+        if revision == 2:
+            return _rc4(key, PDF_PADDING) == user[:32]
+        for _ in range(50):
+            key = hashlib.md5(key).digest()[:key_len]
+        data = _rc4(key, user_seed)
+        for i in range(1, 20):
+            data = _rc4(bytes(b ^ i for b in key), data)
+        return data == user[:16]
+    return verify
+
+
+# ---------------------------------------------------------------- Office
+
+def _oldoffice_verifier(hash_value):
+    """$oldoffice$T*salt*verifier*verifier_hash：0/1为RC4+MD5，3/4为RC4 CryptoAPI+SHA1（3为40位密钥，4为128位）"""
+    fields = hash_value[len("$oldoffice$"):].split("*")
+    kind = int(fields[0])
+    salt, verifier, verifier_hash = _unhex(fields[1]), _unhex(fields[2]), _unhex(fields[3])
+    encrypted = verifier + verifier_hash
+
+    if kind in (0, 1):
+        def verify_md5(password):
+            h0 = hashlib.md5(password.encode("utf-16-le")[:30]).digest()[:5]
+            h1 = hashlib.md5((h0 + salt) * 16).digest()[:5]
+            key = hashlib.md5(h1 + b"\0\0\0\0").digest()
+            plain = _rc4(key, encrypted)
+            return hashlib.md5(plain[:16]).digest() == plain[16:32]
+        return verify_md5
+    if kind in (3, 4):
+        def verify_sha1(password):
+            h0 = hashlib.sha1(salt + password.encode("utf-16-le")).digest()
+            final = hashlib.sha1(h0 + b"\0\0\0\0").digest()
+            # 与hashcat一致按类型号选择密钥长度：40位密钥补零到128位
+            key = final[:5] + b"\0" * 11 if kind == 3 else final[:16]
+            plain = _rc4(key, encrypted)
+            return hashlib.sha1(plain[:16]).digest() == plain[16:36]
+        return verify_sha1
+    raise ValueError("不支持的旧版Office类型")
+
+
+_VERIFIER_FACTORIES = (
+    ("$pkzip2$", _pkzip2_verifier),
+    ("$zip2$", _zip2_verifier),
+    ("$rar5$", _rar5_verifier),
+    ("$pdf$", _pdf_verifier),
+    ("$oldoffice$", _oldoffice_verifier),
+)
+
+
+def get_verifier(hash_value):
+    """返回哈希对应的原生校验函数
+
+    Args:
+        hash_value (str): hashcat格式的哈希
+
+    Returns:
+        callable: verify(password) -> bool；格式不支持或哈希不完整时返回None
+    """
+    if not hash_value:
+        return None
+    text = hash_value.strip().splitlines()[0].strip() if hash_value.strip() else ""
+    for prefix, factory in _VERIFIER_FACTORIES:
+        pos = text.find(prefix)
+        if pos >= 0:
+            try:
+                return factory(text[pos:])
+            except (ValueError, IndexError, KeyError, binascii.Error):
+                return None
+    return None
+
+
+def find_password(verifier, candidates, time_budget=PRECHECK_TIME_BUDGET, stop_event=None):
+    """依次校验候选密码
+
+    Args:
+        verifier (callable): get_verifier 返回的校验函数
+        candidates (iterable): 候选密码
+        time_budget (float): 时间上限（秒），为None时不限时
+        stop_event (threading.Event, optional): 置位时停止
+
+    Returns:
+        tuple: (命中的密码或None, 是否校验完全部候选)
+    """
+    deadline = None if time_budget is None else time.monotonic() + time_budget
+    for index, candidate in enumerate(candidates):
+        if index % PRECHECK_CHECK_INTERVAL == 0 and index:
+            if stop_event is not None and stop_event.is_set():
+                return None, False
+            if deadline is not None and time.monotonic() > deadline:
+                return None, False
+        if candidate and verifier(candidate):
+            return candidate, True
+    return None, True
+
+
+def common_passwords_path():
+    """返回随程序分发的常用密码表路径（模块目录、打包后的资源目录或exe所在目录），不存在时返回None"""
+    dirs = [os.path.dirname(os.path.abspath(__file__))]
+    if getattr(sys, "_MEIPASS", None):
+        dirs.append(sys._MEIPASS)
+    if getattr(sys, "frozen", False):
+        dirs.append(os.path.dirname(sys.executable))
+    for directory in dirs:
+        path = os.path.join(directory, COMMON_PASSWORDS_FILE)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+_common_passwords = None
+_common_passwords_lock = threading.Lock()
+
+
+def load_common_passwords():
+    """读取随程序分发的常用密码表（按常见程度排序，只读取一次）
+
+    Returns:
+        list: 常用密码列表，文件不存在时为空列表
+    """
+    global _common_passwords
+    with _common_passwords_lock:
+        if _common_passwords is None:
+            path = common_passwords_path()
+            passwords = []
+            if path:
+                try:
+                    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+                        passwords = [line.rstrip("\r\n") for line in f if line.rstrip("\r\n")]
+                except OSError:
+                    passwords = []
+            _common_passwords = passwords
+        return _common_passwords
+
+
+def precheck_password(hash_value, time_budget=PRECHECK_TIME_BUDGET, stop_event=None, known=True):
+    """提取哈希后在进程内先校验已知密码及其变形，再校验常用密码表
+
+    Args:
+        hash_value (str): hashcat格式的哈希
+        time_budget (float): 时间上限（秒）
+        stop_event (threading.Event, optional): 置位时停止
+        known (bool): 是否校验结果库中的已知密码及其变形
+
+    Returns:
+        tuple: (命中的密码或None, 已知密码是否已全部在进程内校验过)；
+               格式不支持原生校验时返回(None, False)
+    """
+    verifier = get_verifier(hash_value)
+    if verifier is None:
+        return None, False
+    deadline = time.monotonic() + time_budget
+    known_checked = not known
+    if known:
+        known_candidates = mutate_passwords(get_result_store().passwords())
+        password, known_checked = find_password(verifier, known_candidates, time_budget, stop_event)
+        if password:
+            return password, True
+    remaining = max(0.0, deadline - time.monotonic())
+    password, _ = find_password(verifier, load_common_passwords(), remaining, stop_event)
+    return password, known_checked